@@ -0,0 +1,20 @@
+from django.contrib import admin
+
+from .models import IndexingDeadLetter
+from .queue import get_index_queue
+from .tasks import schedule_flush
+
+
+@admin.register(IndexingDeadLetter)
+class IndexingDeadLetterAdmin(admin.ModelAdmin):
+    list_display = ("model_label", "object_pk", "attempts", "created_at")
+    list_filter = ("model_label", "created_at")
+    search_fields = ("model_label", "object_pk", "error")
+    readonly_fields = ("model_label", "object_pk", "error", "attempts", "created_at")
+    actions = ["requeue"]
+
+    @admin.action(description="Вернуть в очередь индексации")
+    def requeue(self, request, queryset):
+        get_index_queue().push(entry.queue_key for entry in queryset)
+        schedule_flush()
+        queryset.delete()
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class IndexingConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.indexing"
+    label = "indexing"
+
+    def ready(self):
+        # django_elasticsearch_dsl ищет только documents.py, а документы проекта лежат в search_document.py
+        autodiscover_modules("search_document")
@@ -0,0 +1,19 @@
+from django.db import models
+
+
+class IndexingDeadLetter(models.Model):
+    model_label = models.CharField(max_length=100)
+    object_pk = models.CharField(max_length=64)
+    error = models.TextField()
+    attempts = models.PositiveIntegerField(default=1)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        ordering = ["-created_at"]
+
+    @property
+    def queue_key(self):
+        return f"{self.model_label}:{self.object_pk}"
+
+    def __str__(self):
+        return f"{self.queue_key} ({self.attempts})"
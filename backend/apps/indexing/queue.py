@@ -0,0 +1,96 @@
+from functools import cache
+from threading import Lock
+
+from django.apps import apps
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+
+def make_key(instance) -> str:
+    return f"{instance._meta.label_lower}:{instance.pk}"
+
+
+def parse_key(key: str):
+    model_label, pk = key.rsplit(":", 1)
+    return apps.get_model(model_label), int(pk)
+
+
+class InMemoryIndexQueue:
+    """Очередь в памяти процесса — для тестов и локального запуска без Redis."""
+
+    def __init__(self, **options):
+        self._keys = {}
+        self._flush_scheduled = False
+        self._lock = Lock()
+
+    def push(self, keys):
+        with self._lock:
+            for key in keys:
+                self._keys[key] = None
+
+    def pop(self, count):
+        with self._lock:
+            batch = list(self._keys)[:count]
+            for key in batch:
+                del self._keys[key]
+            return batch
+
+    def __len__(self):
+        return len(self._keys)
+
+    def acquire_flush(self, window):
+        with self._lock:
+            if self._flush_scheduled:
+                return False
+            self._flush_scheduled = True
+            return True
+
+    def release_flush(self):
+        self._flush_scheduled = False
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+            self._flush_scheduled = False
+
+
+class RedisIndexQueue:
+    """
+    Множество ключей "app_label.model:pk" в Redis: повторные сохранения одного объекта
+    до сброса схлопываются в одну запись.
+    """
+
+    def __init__(self, location, key_prefix="es:index", **options):
+        import redis
+
+        self._client = redis.Redis.from_url(location)
+        self._keys_name = f"{key_prefix}:pending"
+        self._flush_name = f"{key_prefix}:flush"
+
+    def push(self, keys):
+        keys = list(keys)
+        if keys:
+            self._client.sadd(self._keys_name, *keys)
+
+    def pop(self, count):
+        return [key.decode() for key in self._client.spop(self._keys_name, count) or []]
+
+    def __len__(self):
+        return self._client.scard(self._keys_name)
+
+    def acquire_flush(self, window):
+        # Флаг живёт с запасом на случай, если воркер так и не заберёт задачу
+        return bool(self._client.set(self._flush_name, 1, nx=True, ex=max(int(window) * 10, 60)))
+
+    def release_flush(self):
+        self._client.delete(self._flush_name)
+
+    def clear(self):
+        self._client.delete(self._keys_name, self._flush_name)
+
+
+@cache
+def get_index_queue():
+    options = dict(settings.ELASTICSEARCH_INDEX_QUEUE)
+    backend = import_string(options.pop("BACKEND"))
+    return backend(**{key.lower(): value for key, value in options.items()})
@@ -0,0 +1,118 @@
+from collections import defaultdict
+
+from django.core.exceptions import ObjectDoesNotExist
+from django.db import models
+from django_elasticsearch_dsl.registries import registry
+from elasticsearch import helpers
+from elasticsearch.dsl.connections import connections
+
+from ..queue import make_key, parse_key
+from .journal import record
+from .related_updates import apply_related_update, document_index, get_related_update
+
+
+def related_pks(doc_instance, instance):
+    """pk объектов документа, которые нужно переиндексировать после изменения связанного instance."""
+    try:
+        related = doc_instance.get_instances_from_related(instance)
+    except ObjectDoesNotExist:
+        return []
+    if related is None:
+        return []
+    if isinstance(related, models.Model):
+        return [related.pk]
+    if isinstance(related, models.QuerySet):
+        return list(related.values_list("pk", flat=True))
+    return [obj.pk for obj in related]
+
+
+def _expand_related(grouped):
+    """
+    Распространяет изменения связанных объектов: документы, умеющие обновляться скриптом,
+    получают update_by_query, остальные зависимые документы добавляются к пачке на переиндексацию.
+    """
+    updates = []
+    for model, pks in list(grouped.items()):
+        if model not in registry._related_models:
+            continue
+        for instance in model._default_manager.filter(pk__in=pks):
+            for doc in registry._get_related_doc(instance):
+                doc_instance = doc()
+                update = get_related_update(doc_instance, instance)
+                if update is not None:
+                    updates.append((document_index(doc_instance), update, make_key(instance)))
+                else:
+                    grouped[doc.django.model].update(related_pks(doc_instance, instance))
+    return updates
+
+
+def build_actions(keys):
+    """
+    Превращает ключи очереди в bulk-действия. Объекты, которых уже нет в БД, удаляются из индекса,
+    поэтому в очереди не нужно различать сохранение и удаление.
+    Возвращает действия, отображение (индекс, _id) -> ключ очереди для разбора ошибок
+    и скриптовые обновления связанных документов.
+    """
+    grouped = defaultdict(set)
+    for key in keys:
+        model, pk = parse_key(key)
+        grouped[model].add(pk)
+    updates = _expand_related(grouped)
+
+    actions, origins = [], {}
+    for model, pks in grouped.items():
+        for doc in registry.get_documents([model]):
+            if doc.django.ignore_signals:
+                continue
+            doc_instance = doc()
+            existing = doc_instance.get_queryset().in_bulk(pks)
+            missing = sorted(pk for pk in pks if pk not in existing)
+            get_missing_delete = getattr(doc_instance, "get_missing_delete", None)
+            missing_delete = get_missing_delete(missing) if missing and get_missing_delete else None
+            if missing_delete is not None:
+                # Документ раскладывается по routing: удаляем запросом, а не bulk-действием по _id
+                change = f"{model._meta.label_lower}:{','.join(map(str, missing))}"
+                updates.append((document_index(doc_instance), missing_delete, change))
+            for pk in pks:
+                instance = existing.get(pk)
+                if instance is None:
+                    if missing_delete is not None:
+                        continue
+                    action = {"_op_type": "delete", "_index": doc._index._name, "_id": pk}
+                    # Копирующийся индекс мог уже получить этот документ — удаление повторится из журнала
+                    record(doc._index._name, {"query": {"ids": {"values": [str(pk)]}}, "script": None}, f"delete:{pk}")
+                elif doc_instance.should_index_object(instance):
+                    action = doc_instance._prepare_action(instance, "index")
+                else:
+                    continue
+                actions.append(action)
+                origins[(action["_index"], str(action["_id"]))] = (
+                    make_key(instance) if instance is not None else f"{model._meta.label_lower}:{pk}"
+                )
+    return actions, origins, updates
+
+
+def bulk_index(keys):
+    """Индексирует пачку одним bulk-запросом. Возвращает {ключ: ошибка} по отклонённым документам."""
+    actions, origins, updates = build_actions(keys)
+    for index, update, change in updates:
+        apply_related_update(index, update, change)
+    if not actions:
+        return {}
+
+    _, errors = helpers.bulk(connections.get_connection(), actions, raise_on_error=False, stats_only=False)
+
+    failed = {}
+    for item in errors:
+        op_type, result = next(iter(item.items()))
+        # Удаление документа, которого и так нет в индексе, ошибкой не считаем
+        if op_type == "delete" and result.get("status") == 404:
+            continue
+        index, doc_id = result.get("_index", ""), str(result.get("_id"))
+        # При записи через алиас ES возвращает имя конкретного индекса (tasks_v2 для tasks)
+        key = origins.get((index, doc_id)) or next(
+            (origin for (name, pk), origin in origins.items() if pk == doc_id and index.startswith(name)), None
+        )
+        if key:
+            failed[key] = str(result.get("error", result))
+    return failed
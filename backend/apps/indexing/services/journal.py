@@ -0,0 +1,48 @@
+from django.core.cache import cache as shared_cache
+
+ACTIVE_KEY = "indexing:journal:active"
+SEQ_KEY = "indexing:journal:seq"
+ENTRY_KEY = "indexing:journal:{seq}"
+ENTRY_TIMEOUT = 24 * 60 * 60
+
+
+def start_journal():
+    """
+    Начинает запись изменений, применённых к индексам запросами (update_by_query / delete_by_query
+    и удаления документов). Нужна на время копирования индекса: правки, попавшие в старый индекс
+    после того как документ уже скопирован, переносятся в новый через replay_journal.
+    Возвращает номер, после которого читать журнал.
+    """
+    shared_cache.add(SEQ_KEY, 0, None)
+    shared_cache.set(ACTIVE_KEY, True, ENTRY_TIMEOUT)
+    return shared_cache.get(SEQ_KEY)
+
+
+def stop_journal():
+    shared_cache.delete(ACTIVE_KEY)
+
+
+def record(index, update, change):
+    if not shared_cache.get(ACTIVE_KEY):
+        return
+    shared_cache.add(SEQ_KEY, 0, None)
+    seq = shared_cache.incr(SEQ_KEY)
+    shared_cache.set(ENTRY_KEY.format(seq=seq), (index, update, change), ENTRY_TIMEOUT)
+
+
+def journal_entries(after):
+    """(последний номер, записи после after в порядке применения)."""
+    last = shared_cache.get(SEQ_KEY) or 0
+    keys = [ENTRY_KEY.format(seq=seq) for seq in range(after + 1, last + 1)]
+    entries = shared_cache.get_many(keys)
+    return last, [entries[key] for key in keys if key in entries]
+
+
+def replay_journal(index, after):
+    """Применяет к index всё записанное после after. Скрипты и удаления идемпотентны, повтор безопасен."""
+    from .related_updates import apply_related_update
+
+    last, entries = journal_entries(after)
+    for _, update, change in entries:
+        apply_related_update(index, update, change, journal=False)
+    return last
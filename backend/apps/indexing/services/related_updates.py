@@ -0,0 +1,47 @@
+import logging
+
+from elasticsearch.dsl.connections import connections
+
+from .journal import record
+
+logger = logging.getLogger(__name__)
+
+
+def document_index(doc_instance):
+    """Индексы документа через запятую: документ может раскладываться по нескольким (get_index_names)."""
+    get_index_names = getattr(doc_instance, "get_index_names", None)
+    return ",".join(get_index_names()) if get_index_names else doc_instance._index._name
+
+
+def get_related_update(doc_instance, instance, deleted=False):
+    get_update = getattr(doc_instance, "get_related_update", None)
+    return get_update(instance, deleted=deleted) if get_update else None
+
+
+def apply_related_update(index, update, change, journal=True):
+    """
+    Применяет изменение связанного объекта ко всем затронутым документам одним запросом на стороне ES.
+    Возвращает число затронутых документов — fan-out изменения. journal=False — повтор из журнала.
+    """
+    client = connections.get_connection()
+    if update["script"] is None:
+        response = client.delete_by_query(index=index, query=update["query"], conflicts="proceed", slices="auto")
+        fan_out = response["deleted"]
+    else:
+        response = client.update_by_query(
+            index=index, query=update["query"], script=update["script"], conflicts="proceed", slices="auto"
+        )
+        fan_out = response["updated"]
+
+    if journal:
+        record(index, update, change)
+
+    logger.info(
+        "Related change %s fanned out to %s documents in %s in %s ms",
+        change,
+        fan_out,
+        index,
+        response["took"],
+        extra={"change": change, "index": index, "fan_out": fan_out, "took_ms": response["took"]},
+    )
+    return fan_out
@@ -0,0 +1,83 @@
+from django.db import models, transaction
+from django_elasticsearch_dsl.registries import registry
+from django_elasticsearch_dsl.signals import RealTimeSignalProcessor
+
+from .queue import make_key
+from .services.bulk_index import related_pks
+from .services.related_updates import document_index, get_related_update
+
+
+def _through_pks(through, instance, model):
+    """pk объектов model, связанных с instance через промежуточную таблицу M2M."""
+    source = next(field for field in through._meta.fields if field.related_model is instance.__class__)
+    target = next(field for field in through._meta.fields if field.related_model is model and field is not source)
+    return set(through.objects.filter(**{source.name: instance}).values_list(target.attname, flat=True))
+
+
+class QueuedSignalProcessor(RealTimeSignalProcessor):
+    """
+    Вместо синхронного обращения к Elasticsearch кладёт (модель, pk) в очередь после коммита,
+    а пачку отправляет Celery-задача flush_index_queue.
+    """
+
+    def enqueue(self, keys):
+        from .tasks import enqueue_index
+
+        enqueue_index(keys)
+
+    def enqueue_related_update(self, index, update, change):
+        from .tasks import update_related_documents
+
+        transaction.on_commit(lambda: update_related_documents.delay(index, update, change))
+
+    def setup(self):
+        super().setup()
+        models.signals.pre_save.connect(self.handle_pre_save)
+
+    def teardown(self):
+        super().teardown()
+        models.signals.pre_save.disconnect(self.handle_pre_save)
+
+    def handle_pre_save(self, sender, instance, **kwargs):
+        # Смена поля, от которого зависит индекс или routing, оставляет старую копию документа — удаляем её
+        if instance.__class__ not in registry:
+            return
+        for doc in registry.get_documents([instance.__class__]):
+            get_moved_delete = getattr(doc(), "get_moved_delete", None)
+            moved = get_moved_delete(instance) if get_moved_delete else None
+            if moved is not None:
+                index, update = moved
+                self.enqueue_related_update(index, update, make_key(instance))
+
+    def handle_save(self, sender, instance, **kwargs):
+        if instance.__class__ in registry:
+            self.enqueue([make_key(instance)])
+
+    def handle_m2m_changed(self, sender, instance, action, model=None, pk_set=None, **kwargs):
+        if action == "pre_clear":
+            pk_set = _through_pks(sender, instance, model)
+        elif action not in ("post_add", "post_remove"):
+            return
+
+        keys = [make_key(instance)] if instance.__class__ in registry._models else []
+        # Связь меняли со стороны связанной модели (label.tasks.add(task)) — переиндексируем сами документы
+        if pk_set and any(instance.__class__ in doc.django.related_models for doc in registry.get_documents([model])):
+            keys.extend(f"{model._meta.label_lower}:{pk}" for pk in pk_set)
+        self.enqueue(keys)
+
+    def handle_pre_delete(self, sender, instance, **kwargs):
+        # После удаления связи уже не найти, поэтому зависимые документы собираем заранее
+        keys = []
+        for doc in registry._get_related_doc(instance):
+            doc_instance = doc(related_instance_to_ignore=instance)
+            update = get_related_update(doc_instance, instance, deleted=True)
+            if update is not None:
+                self.enqueue_related_update(document_index(doc_instance), update, make_key(instance))
+                continue
+            model_label = doc.django.model._meta.label_lower
+            keys.extend(f"{model_label}:{pk}" for pk in related_pks(doc_instance, instance))
+        self.enqueue(keys)
+
+    def handle_delete(self, sender, instance, **kwargs):
+        if instance.__class__ in registry:
+            self.enqueue([make_key(instance)])
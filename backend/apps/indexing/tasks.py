@@ -0,0 +1,92 @@
+import logging
+
+from celery import shared_task
+from django.conf import settings
+from django.db import transaction
+from elasticsearch import ApiError, TransportError
+
+from .models import IndexingDeadLetter
+from .queue import get_index_queue
+from .services.bulk_index import bulk_index
+from .services.related_updates import apply_related_update
+
+logger = logging.getLogger(__name__)
+
+
+def pipeline_setting(name):
+    return settings.ELASTICSEARCH_INDEX_PIPELINE[name]
+
+
+def schedule_flush():
+    """Ставит сброс очереди через окно FLUSH_WINDOW, если он ещё не запланирован."""
+    window = pipeline_setting("FLUSH_WINDOW")
+    if get_index_queue().acquire_flush(window):
+        flush_index_queue.apply_async(countdown=window)
+
+
+def enqueue_index(keys):
+    """Кладёт ключи в очередь индексации после коммита. Для записей в обход сигналов (bulk_create, bulk_update)."""
+    keys = list(keys)
+    if not keys:
+        return
+
+    def push():
+        get_index_queue().push(keys)
+        schedule_flush()
+
+    transaction.on_commit(push)
+
+
+def dead_letter(failed, attempts):
+    IndexingDeadLetter.objects.bulk_create(
+        [
+            IndexingDeadLetter(
+                model_label=key.rsplit(":", 1)[0], object_pk=key.rsplit(":", 1)[1], error=error, attempts=attempts
+            )
+            for key, error in failed.items()
+        ]
+    )
+
+
+@shared_task(bind=True, max_retries=None)
+def flush_index_queue(self, keys=None):
+    queue = get_index_queue()
+    if keys is None:
+        # Снимаем флаг до выборки: всё, что придёт во время сброса, запланирует следующий
+        queue.release_flush()
+        keys = queue.pop(pipeline_setting("BATCH_SIZE"))
+    if not keys:
+        return 0
+
+    attempts = self.request.retries + 1
+    try:
+        failed = bulk_index(keys)
+    except (ApiError, TransportError) as exc:
+        if self.request.retries >= pipeline_setting("MAX_RETRIES"):
+            logger.error("Indexing batch of %s keys gave up after %s attempts: %s", len(keys), attempts, exc)
+            dead_letter({key: str(exc) for key in keys}, attempts)
+            return 0
+        countdown = pipeline_setting("RETRY_BACKOFF") ** attempts
+        raise self.retry(exc=exc, kwargs={"keys": keys}, countdown=countdown) from exc
+
+    if failed:
+        dead_letter(failed, attempts)
+
+    if len(queue):
+        schedule_flush()
+    return len(keys) - len(failed)
+
+
+@shared_task(bind=True, max_retries=None)
+def update_related_documents(self, index, update, change):
+    """Правка денормализованных полей после удаления связанного объекта (см. get_related_update)."""
+    attempts = self.request.retries + 1
+    try:
+        return apply_related_update(index, update, change)
+    except (ApiError, TransportError) as exc:
+        if self.request.retries >= pipeline_setting("MAX_RETRIES"):
+            logger.error("Related update %s in %s gave up after %s attempts: %s", change, index, attempts, exc)
+            dead_letter({change: str(exc)}, attempts)
+            return 0
+        countdown = pipeline_setting("RETRY_BACKOFF") ** attempts
+        raise self.retry(exc=exc, countdown=countdown) from exc
@@ -0,0 +1,12 @@
+from django.apps import AppConfig
+
+
+class LiveConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "apps.live"
+    label = "live"
+
+    def ready(self):
+        from . import events
+
+        events.connect_signals()
@@ -0,0 +1,147 @@
+import asyncio
+import json
+import re
+from contextlib import suppress
+from urllib.parse import parse_qs
+
+from asgiref.sync import sync_to_async
+from rest_framework import exceptions
+
+from apps.users.token import Bearer
+from apps.workspaces.membership import get_user_workspace_ids
+
+from .broker import get_broker, live_setting, workspace_channel
+
+SSE_PATH = re.compile(r"^/api/live/workspaces/(?P<workspace_id>\d+)/events/$")
+WEBSOCKET_PATH = re.compile(r"^/ws/workspaces/(?P<workspace_id>\d+)/$")
+
+
+@sync_to_async
+def authorize(scope, workspace_id):
+    """
+    Токен из заголовка Authorization: Bearer или из ?token= (EventSource и WebSocket в браузере
+    заголовки не передают). Возвращает HTTP-статус отказа или None.
+    """
+    headers = dict(scope.get("headers", ()))
+    keyword, _, key = headers.get(b"authorization", b"").decode().partition(" ")
+    if keyword != Bearer.keyword:
+        key = next(iter(parse_qs(scope.get("query_string", b"").decode()).get("token", ())), "")
+    if not key:
+        return 401
+    try:
+        user, _ = Bearer().authenticate_credentials(key)
+    except exceptions.AuthenticationFailed:
+        return 401
+    if workspace_id not in get_user_workspace_ids(user):
+        return 403
+    return None
+
+
+async def stream_events(subscription, send_events, send_ping):
+    """Отдаёт пачки событий, пока соединение открыто; send_* ждут, пока клиент примет данные."""
+    heartbeat = live_setting("HEARTBEAT")
+    while True:
+        try:
+            events = await asyncio.wait_for(subscription.get(), heartbeat)
+        except TimeoutError:
+            await send_ping()
+            continue
+        if events:
+            await send_events(events)
+
+
+async def run_until_disconnect(receive, disconnect_type, stream):
+    stream_task = asyncio.ensure_future(stream)
+    try:
+        while True:
+            receive_task = asyncio.ensure_future(receive())
+            done, _ = await asyncio.wait({stream_task, receive_task}, return_when=asyncio.FIRST_COMPLETED)
+            if stream_task in done:
+                receive_task.cancel()
+                stream_task.result()
+                return
+            if receive_task.result()["type"] == disconnect_type:
+                return
+    finally:
+        stream_task.cancel()
+        with suppress(asyncio.CancelledError):
+            await stream_task
+
+
+async def sse_feed(scope, receive, send, workspace_id):
+    denied = await authorize(scope, workspace_id)
+    if denied:
+        await send({"type": "http.response.start", "status": denied, "headers": [(b"content-type", b"text/plain")]})
+        await send({"type": "http.response.body", "body": b""})
+        return
+
+    subscription = get_broker().subscribe(workspace_channel(workspace_id))
+    await send(
+        {
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [
+                (b"content-type", b"text/event-stream"),
+                (b"cache-control", b"no-cache"),
+                (b"x-accel-buffering", b"no"),
+            ],
+        }
+    )
+
+    async def send_events(events):
+        body = "".join(f"event: {event['event']}\ndata: {json.dumps(event)}\n\n" for event in events)
+        await send({"type": "http.response.body", "body": body.encode(), "more_body": True})
+
+    async def send_ping():
+        await send({"type": "http.response.body", "body": b": ping\n\n", "more_body": True})
+
+    try:
+        await run_until_disconnect(receive, "http.disconnect", stream_events(subscription, send_events, send_ping))
+    finally:
+        subscription.close()
+
+
+async def websocket_feed(scope, receive, send, workspace_id):
+    if (await receive())["type"] != "websocket.connect":
+        return
+    denied = await authorize(scope, workspace_id)
+    if denied:
+        # 4401/4403: коды закрытия приложения, повторяющие HTTP-статус отказа
+        await send({"type": "websocket.close", "code": 4000 + denied})
+        return
+
+    subscription = get_broker().subscribe(workspace_channel(workspace_id))
+    await send({"type": "websocket.accept"})
+
+    async def send_events(events):
+        await send({"type": "websocket.send", "text": json.dumps(events)})
+
+    async def send_ping():
+        await send({"type": "websocket.send", "text": json.dumps([{"event": "ping"}])})
+
+    try:
+        await run_until_disconnect(receive, "websocket.disconnect", stream_events(subscription, send_events, send_ping))
+    finally:
+        subscription.close()
+
+
+class LiveFeedRouter:
+    """
+    Живая лента пространства поверх ASGI-приложения Django:
+    SSE — GET /api/live/workspaces/<id>/events/, WebSocket — /ws/workspaces/<id>/.
+    Остальные запросы уходят в application как есть.
+    """
+
+    def __init__(self, application):
+        self.application = application
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "websocket":
+            match = WEBSOCKET_PATH.match(scope["path"])
+            if match is None:
+                await send({"type": "websocket.close", "code": 4404})
+                return
+            return await websocket_feed(scope, receive, send, int(match["workspace_id"]))
+        if scope["type"] == "http" and scope["method"] == "GET" and (match := SSE_PATH.match(scope["path"])):
+            return await sse_feed(scope, receive, send, int(match["workspace_id"]))
+        return await self.application(scope, receive, send)
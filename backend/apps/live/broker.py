@@ -0,0 +1,172 @@
+import asyncio
+import json
+import logging
+from collections import OrderedDict, defaultdict
+from functools import cache
+from threading import Lock
+
+from django.conf import settings
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+RESYNC = {"event": "resync"}
+
+
+def live_setting(name):
+    return settings.LIVE_FEED[name]
+
+
+def workspace_channel(workspace_id):
+    return f"workspace:{workspace_id}"
+
+
+def event_key(event):
+    return event.get("model"), event.get("id")
+
+
+def merge_events(previous, event):
+    """Подряд идущие изменения одного объекта: удаление вытесняет всё, иначе поля сливаются, тип первого сохраняется."""
+    if event["event"].endswith(".deleted"):
+        return event
+    return {**previous, **event, "event": previous["event"], "fields": {**previous["fields"], **event["fields"]}}
+
+
+class Subscription:
+    """
+    Буфер событий одного соединения. События одного объекта склеиваются, пока соединение их не забрало;
+    если клиент отстал больше чем на max_pending объектов, буфер сбрасывается и клиент получает resync
+    (перечитать список через REST) — память на медленное соединение ограничена.
+    """
+
+    def __init__(self, broker, channel, loop, max_pending, window):
+        self.broker = broker
+        self.channel = channel
+        self._loop = loop
+        self._max_pending = max_pending
+        self._window = window
+        self._pending = OrderedDict()
+        self._overflowed = False
+        self._ready = asyncio.Event()
+
+    def put(self, event):
+        # publish приходит из потоков синхронного Django, буфер меняем только в цикле соединения
+        try:
+            self._loop.call_soon_threadsafe(self._put, event)
+        except RuntimeError:
+            self.broker.unsubscribe(self)
+
+    def _put(self, event):
+        key = event_key(event)
+        if key in self._pending:
+            self._pending[key] = merge_events(self._pending[key], event)
+        elif self._overflowed or len(self._pending) >= self._max_pending:
+            self._overflowed = True
+            self._pending.clear()
+        else:
+            self._pending[key] = event
+        self._ready.set()
+
+    async def get(self):
+        """Следующая пачка событий. Ждёт window после первого события, чтобы склеить частые правки."""
+        await self._ready.wait()
+        if self._window:
+            await asyncio.sleep(self._window)
+        self._ready.clear()
+        if self._overflowed:
+            self._overflowed = False
+            return [RESYNC]
+        events = list(self._pending.values())
+        self._pending.clear()
+        return events
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class InMemoryBroker:
+    """Pub/sub в памяти процесса — для тестов и одного ASGI-процесса без Redis."""
+
+    def __init__(self, **options):
+        self._subscribers = defaultdict(set)
+        self._lock = Lock()
+
+    def publish(self, channel, event):
+        self.deliver(channel, event)
+
+    def deliver(self, channel, event):
+        with self._lock:
+            subscribers = list(self._subscribers.get(channel, ()))
+        for subscription in subscribers:
+            subscription.put(event)
+
+    def subscribe(self, channel):
+        subscription = Subscription(
+            self,
+            channel,
+            asyncio.get_running_loop(),
+            max_pending=live_setting("MAX_PENDING"),
+            window=live_setting("COALESCE_WINDOW"),
+        )
+        with self._lock:
+            self._subscribers[channel].add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            subscribers = self._subscribers.get(subscription.channel)
+            if subscribers is not None:
+                subscribers.discard(subscription)
+                if not subscribers:
+                    del self._subscribers[subscription.channel]
+
+    def subscribers_count(self, channel):
+        return len(self._subscribers.get(channel, ()))
+
+
+class RedisBroker(InMemoryBroker):
+    """
+    Публикация через Redis PUBLISH из любого процесса (WSGI, Celery), доставка — локальным подпискам
+    ASGI-процесса. На процесс одна подписка на Redis по шаблону, раздача по соединениям — в памяти.
+    """
+
+    def __init__(self, location, key_prefix="live", **options):
+        import redis
+
+        super().__init__(**options)
+        self._location = location
+        self._prefix = f"{key_prefix}:"
+        self._client = redis.Redis.from_url(location)
+        self._listener = None
+
+    def publish(self, channel, event):
+        self._client.publish(self._prefix + channel, json.dumps(event))
+
+    def subscribe(self, channel):
+        subscription = super().subscribe(channel)
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self._listen())
+        return subscription
+
+    async def _listen(self):
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(self._location)
+        pubsub = client.pubsub(ignore_subscribe_messages=True)
+        await pubsub.psubscribe(f"{self._prefix}*")
+        try:
+            async for message in pubsub.listen():
+                channel = message["channel"].decode()[len(self._prefix) :]
+                self.deliver(channel, json.loads(message["data"]))
+        except Exception:
+            logger.exception("Live feed Redis listener stopped")
+        finally:
+            await pubsub.aclose()
+            await client.aclose()
+
+
+@cache
+def get_broker():
+    options = dict(settings.LIVE_FEED_BROKER)
+    backend = import_string(options.pop("BACKEND"))
+    return backend(**{key.lower(): value for key, value in options.items()})
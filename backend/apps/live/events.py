@@ -0,0 +1,111 @@
+from collections import defaultdict
+
+from django.db import transaction
+
+from apps.tasks.models import Task, TaskChecklistItem, TaskComment
+from apps.tasks.tracking import to_json
+
+from .broker import get_broker, workspace_channel
+
+# Поля, которые доски показывают без перезапроса; остальные изменения приходят без значений
+FEED_FIELDS = {
+    Task: ("title", "status", "task_type", "priority", "assignee", "parent_task", "due_date"),
+    TaskComment: ("author", "is_pinned"),
+    TaskChecklistItem: ("text", "is_completed", "order"),
+}
+MODEL_NAMES = {Task: "task", TaskComment: "comment", TaskChecklistItem: "checklist_item"}
+
+
+def build_event(instance, action, changed=None):
+    model = type(instance)
+    fields = {}
+    if action != "deleted":
+        for name in FEED_FIELDS[model]:
+            if changed is None or name in changed:
+                fields[name] = to_json(getattr(instance, model._meta.get_field(name).attname))
+    task_id = instance.pk if model is Task else instance.task_id
+    return {
+        "event": f"{MODEL_NAMES[model]}.{action}",
+        "model": MODEL_NAMES[model],
+        "id": instance.pk,
+        "task": task_id,
+        "fields": fields,
+    }
+
+
+def publish(workspace_id, event):
+    """Отправляет событие подписчикам пространства после коммита; отказ брокера не ломает запрос."""
+    transaction.on_commit(lambda: get_broker().publish(workspace_channel(workspace_id), event), robust=True)
+
+
+def publish_tasks(tasks, action, changed=None, label_task_ids=()):
+    """
+    События по задачам, записанным в обход сигналов (bulk_create, bulk_update). changed — имена
+    изменённых полей; задачам из label_task_ids в событие добавляется новый набор меток.
+    """
+    labels = defaultdict(list)
+    if label_task_ids:
+        rows = Task.labels.through.objects.filter(task_id__in=label_task_ids).order_by("label_id")
+        for task_id, label_id in rows.values_list("task_id", "label_id"):
+            labels[task_id].append(label_id)
+    for task in tasks:
+        event = build_event(task, action, changed)
+        if task.pk in label_task_ids:
+            event["fields"]["labels"] = labels[task.pk]
+        publish(task.workspace_id, event)
+
+
+def _workspace_id(instance):
+    return instance.workspace_id if isinstance(instance, Task) else instance.task.workspace_id
+
+
+def _receivers():
+    from django.db.models.signals import m2m_changed, post_delete, post_save, pre_save
+
+    for model in FEED_FIELDS:
+        yield pre_save, handle_pre_save, model
+        yield post_save, handle_save, model
+        yield post_delete, handle_delete, model
+    yield m2m_changed, handle_labels_changed, Task.labels.through
+
+
+def connect_signals():
+    for signal, handler, sender in _receivers():
+        signal.connect(handler, sender=sender, dispatch_uid=f"live_feed_{handler.__name__}_{sender.__name__}")
+
+
+def disconnect_signals():
+    for signal, handler, sender in _receivers():
+        signal.disconnect(sender=sender, dispatch_uid=f"live_feed_{handler.__name__}_{sender.__name__}")
+
+
+def handle_pre_save(sender, instance, raw=False, **kwargs):
+    # Изменённые поля берём до post_save: журнал задач обновляет снимок загрузки в своём обработчике
+    changes = None if raw else instance.get_tracked_changes()
+    instance._live_changed = set(changes) if changes is not None else None
+
+
+def handle_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    changed = getattr(instance, "_live_changed", None)
+    instance._live_changed = None
+    if not created and changed == set():
+        return
+    event = build_event(instance, "created" if created else "updated", None if created else changed)
+    publish(_workspace_id(instance), event)
+
+
+def handle_delete(sender, instance, origin=None, **kwargs):
+    # При каскадном удалении задачи хватает события о самой задаче
+    if sender is not Task and getattr(origin, "model", type(origin)) is not sender:
+        return
+    publish(_workspace_id(instance), build_event(instance, "deleted"))
+
+
+def handle_labels_changed(sender, instance, action, reverse, **kwargs):
+    if reverse or action not in ("post_add", "post_remove", "post_clear"):
+        return
+    event = build_event(instance, "updated", changed=set())
+    event["fields"]["labels"] = sorted(instance.labels.values_list("pk", flat=True))
+    publish(instance.workspace_id, event)
@@ -1,6 +1,7 @@
 from django.contrib import admin
 from django.utils.html import format_html
 from django.urls import reverse
+from .counters import tasks_count_subquery
 from .models import (
     TaskType,
     TaskStatus,
@@ -100,9 +101,13 @@ class TaskTypeAdmin(admin.ModelAdmin):
     color_display.short_description = "Цвет"
 
     def tasks_count(self, obj):
-        return obj.task_set.count()
+        return obj.tasks_total
 
     tasks_count.short_description = "Задач"
+    tasks_count.admin_order_field = "tasks_total"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(tasks_total=tasks_count_subquery("type"))
 
 
 @admin.register(TaskStatus)
@@ -121,9 +126,18 @@ class TaskStatusAdmin(admin.ModelAdmin):
     workspace_link.short_description = "Рабочее пространство"
 
     def tasks_count(self, obj):
-        return obj.task_set.count()
+        return obj.tasks_total
 
     tasks_count.short_description = "Задач"
+    tasks_count.admin_order_field = "tasks_total"
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("workspace")
+            .annotate(tasks_total=tasks_count_subquery("status"))
+        )
 
 
 @admin.register(Label)
@@ -148,9 +162,18 @@ class LabelAdmin(admin.ModelAdmin):
     color_display.short_description = "Цвет"
 
     def tasks_count(self, obj):
-        return obj.tasks.count()
+        return obj.tasks_total
 
     tasks_count.short_description = "Задач"
+    tasks_count.admin_order_field = "tasks_total"
+
+    def get_queryset(self, request):
+        return (
+            super()
+            .get_queryset(request)
+            .select_related("workspace")
+            .annotate(tasks_total=tasks_count_subquery("label"))
+        )
 
 
 @admin.register(Task)
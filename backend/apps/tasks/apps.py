@@ -5,3 +5,10 @@ class TasksConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.tasks"
     label = "tasks"
+
+    def ready(self):
+        from . import audit, counters, graph
+
+        audit.connect_signals()
+        counters.connect_signals()
+        graph.connect_signals()
@@ -0,0 +1,181 @@
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.contrib.contenttypes.models import ContentType
+from django.db import IntegrityError, transaction
+
+from .models import Task, TaskAttachment, TaskChecklistItem, TaskComment, TaskLog
+from .tracking import to_json
+
+logger = logging.getLogger(__name__)
+
+# Строки журнала копятся в пачку текущего запроса и пишутся одним bulk_create при выходе из неё
+_batch = ContextVar("task_log_batch", default=None)
+_request = ContextVar("task_log_request", default=None)
+
+CHILD_ACTIONS = {TaskComment: "comment", TaskAttachment: "attachment", TaskChecklistItem: "update"}
+CREATE_FIELDS = {
+    Task: ("title",),
+    TaskComment: ("content",),
+    TaskAttachment: ("file_name", "file_size"),
+    TaskChecklistItem: ("text",),
+}
+
+
+def current_user():
+    request = _request.get()
+    user = getattr(request, "user", None)
+    return user if user is not None and user.is_authenticated else None
+
+
+def _write(rows):
+    batch = _batch.get()
+    if batch is None:
+        TaskLog.objects.bulk_create(rows)
+    else:
+        batch.extend(rows)
+
+
+def record(rows):
+    """
+    Откладывает строки журнала до коммита: при откате транзакции on_commit не сработает
+    и строки пропадут вместе с изменениями.
+    """
+    if rows:
+        transaction.on_commit(lambda: _write(rows))
+
+
+@contextmanager
+def task_log_batch(request=None):
+    if _batch.get() is not None:
+        yield
+        return
+    rows = []
+    batch_token = _batch.set(rows)
+    request_token = _request.set(request)
+    try:
+        yield
+    finally:
+        _batch.reset(batch_token)
+        _request.reset(request_token)
+        if rows:
+            try:
+                TaskLog.objects.bulk_create(rows)
+            except IntegrityError:
+                # Задачу успели удалить в том же запросе — её журнал уже не нужен
+                logger.warning("Dropped %s task log rows for deleted tasks", len(rows), exc_info=True)
+
+
+class TaskLogMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # Пользователя читаем лениво: DRF аутентифицирует токен уже внутри view
+        with task_log_batch(request):
+            return self.get_response(request)
+
+
+def build_log(instance, action, changes, user=None):
+    user = user or current_user()
+    # *_id вместо объектов: конструктор модели на горячем пути без дескрипторов связей
+    user_id = user.pk if user is not None else None
+    if isinstance(instance, Task):
+        return TaskLog(
+            task_id=instance.pk, workspace_id=instance.workspace_id, user_id=user_id, action=action, changes=changes
+        )
+    return TaskLog(
+        task_id=instance.task_id,
+        workspace_id=instance.task.workspace_id,
+        user_id=user_id,
+        action=action,
+        changes=changes,
+        content_type_id=ContentType.objects.get_for_model(instance).pk,
+        object_id=instance.pk,
+    )
+
+
+def log_created(instances, user=None):
+    rows = []
+    for instance in instances:
+        model = type(instance)
+        changes = {field: to_json(getattr(instance, field)) for field in CREATE_FIELDS[model]}
+        rows.append(build_log(instance, CHILD_ACTIONS.get(model, "create"), changes, user))
+        instance.snapshot_tracked_fields()
+    record(rows)
+
+
+def log_updated(instances, user=None):
+    rows = []
+    moved = {}
+    for instance in instances:
+        changes = instance.get_tracked_changes()
+        if changes == {}:
+            continue
+        # Без снимка (changes is None) перенос в другое пространство не отличить — перештамповываем на всякий случай
+        if isinstance(instance, Task) and (changes is None or "workspace" in changes):
+            moved[instance.pk] = instance.workspace_id
+        rows.append(build_log(instance, "update", changes, user))
+        instance.snapshot_tracked_fields()
+    record(rows)
+    if moved:
+        transaction.on_commit(lambda: restamp_workspace(moved))
+
+
+def restamp_workspace(moved):
+    """
+    {task_id: workspace_id}: задачу перенесли в другое пространство — денормализованный workspace
+    её журнала идёт следом. Вызывается после записи строк журнала, поэтому правит и ещё не
+    сброшенную пачку текущего запроса.
+    """
+    for row in _batch.get() or ():
+        if row.task_id in moved:
+            row.workspace_id = moved[row.task_id]
+    for task_id, workspace_id in moved.items():
+        TaskLog.objects.filter(task_id=task_id).exclude(workspace_id=workspace_id).update(workspace_id=workspace_id)
+
+
+def _receivers():
+    from django.db.models.signals import m2m_changed, post_delete, post_save
+
+    for model in CREATE_FIELDS:
+        yield post_save, handle_save, model
+        yield post_delete, handle_delete, model
+    for through in (Task.labels.through, Task.watchers.through):
+        yield m2m_changed, handle_m2m_changed, through
+
+
+def connect_signals():
+    for signal, handler, sender in _receivers():
+        signal.connect(handler, sender=sender, dispatch_uid=f"task_log_{handler.__name__}_{sender.__name__}")
+
+
+def disconnect_signals():
+    for signal, handler, sender in _receivers():
+        signal.disconnect(sender=sender, dispatch_uid=f"task_log_{handler.__name__}_{sender.__name__}")
+
+
+def handle_save(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    if created:
+        log_created([instance])
+    else:
+        log_updated([instance])
+
+
+def handle_delete(sender, instance, origin=None, **kwargs):
+    # Журнал удалённой задачи уходит каскадом вместе с ней, поэтому пишем только
+    # прямые удаления комментариев, вложений и пунктов чек-листа
+    if sender is Task or getattr(origin, "model", type(origin)) is not sender:
+        return
+    record([build_log(instance, "delete", {"id": instance.pk})])
+
+
+def handle_m2m_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if reverse or action not in ("post_add", "post_remove") or not pk_set:
+        return
+    field = "labels" if sender is Task.labels.through else "watchers"
+    key = "added" if action == "post_add" else "removed"
+    record([build_log(instance, "update", {field: {key: sorted(pk_set)}})])
@@ -0,0 +1,330 @@
+import logging
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, OuterRef, Q, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
+
+from apps.users.models import User
+from apps.workspaces.models import Workspace
+
+from .models import Label, Task, TaskCounter, TaskStatus, TaskType
+
+logger = logging.getLogger(__name__)
+
+# Приращения считаются по ключу (workspace_id, dimension, key, closed)
+SCALAR_DIMENSIONS = {"status": "status_id", "type": "task_type_id", "assignee": "assignee_id"}
+UNSET_ON_DELETE = {TaskStatus: "status", TaskType: "type", User: "assignee"}
+
+# Внутри recount() счётчики ведёт он сам, сигналы их не трогают
+_suspended = ContextVar("task_counters_suspended", default=False)
+
+
+def _write(deltas):
+    rows = defaultdict(lambda: [0, 0])
+    for (workspace_id, dimension, key, closed), delta in deltas.items():
+        rows[(workspace_id, dimension, key)][closed] += delta
+    # Фиксированный порядок строк: параллельные пачки не ждут друг друга крест-накрест
+    for (workspace_id, dimension, key), (open_delta, closed_delta) in sorted(rows.items()):
+        if not open_delta and not closed_delta:
+            continue
+        lookup = {"workspace_id": workspace_id, "dimension": dimension, "key": key}
+        changes = {"open_count": F("open_count") + open_delta, "closed_count": F("closed_count") + closed_delta}
+        if TaskCounter.objects.filter(**lookup).update(**changes):
+            continue
+        try:
+            with transaction.atomic():
+                TaskCounter.objects.create(**lookup, open_count=open_delta, closed_count=closed_delta)
+        except IntegrityError:
+            # Строку успел создать соседний процесс, либо пространство уже удалено
+            TaskCounter.objects.filter(**lookup).update(**changes)
+
+
+def apply_deltas(deltas):
+    """
+    Применяет приращения после коммита отдельными короткими UPDATE, чтобы горячие строки
+    (total пространства) не держались заблокированными всю транзакцию. Потерянное при падении
+    между коммитом и записью исправит reconcile_counters.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if deltas:
+        transaction.on_commit(lambda: _write(deltas))
+
+
+def _closed_status_ids(status_ids):
+    status_ids = {pk for pk in status_ids if pk is not None}
+    if not status_ids:
+        return set()
+    return set(TaskStatus.objects.filter(pk__in=status_ids, is_closed=True).values_list("pk", flat=True))
+
+
+def _task_values(instance):
+    return {attname: getattr(instance, attname) for attname in ("workspace_id", *SCALAR_DIMENSIONS.values())}
+
+
+def _task_deltas(deltas, values, closed, sign):
+    workspace_id = values["workspace_id"]
+    deltas[(workspace_id, "total", 0, closed)] += sign
+    for dimension, attname in SCALAR_DIMENSIONS.items():
+        deltas[(workspace_id, dimension, values[attname] or 0, closed)] += sign
+
+
+def _label_deltas(deltas, through_rows, sign):
+    rows = through_rows.values_list("label_id", "task__workspace_id", "task__status__is_closed")
+    for label_id, workspace_id, closed in rows:
+        deltas[(workspace_id, "label", label_id, bool(closed))] += sign
+
+
+def count_contributions(tasks):
+    """Вклад задач queryset в счётчики: по запросу на измерение, total складывается из статусов."""
+    deltas = Counter()
+    closed = Q(status__is_closed=True)
+    dimensions = {**SCALAR_DIMENSIONS, "label": "labels"}
+    for dimension, field in dimensions.items():
+        rows = (
+            tasks.order_by()
+            .values_list("workspace_id", field)
+            .annotate(total=Count("pk"), closed=Count("pk", filter=closed))
+        )
+        for workspace_id, key, total, closed_count in rows:
+            if dimension == "label" and key is None:
+                continue
+            buckets = [(dimension, key or 0)]
+            if dimension == "status":
+                buckets.append(("total", 0))
+            for bucket_dimension, bucket_key in buckets:
+                deltas[(workspace_id, bucket_dimension, bucket_key, False)] += total - closed_count
+                deltas[(workspace_id, bucket_dimension, bucket_key, True)] += closed_count
+    return deltas
+
+
+@contextmanager
+def recount(task_ids):
+    """
+    Для пакетных операций: вклад задач task_ids считается агрегатами до и после блока, применяется разница.
+    Число запросов не зависит от размера пачки; поштучные сигналы внутри блока счётчики не трогают.
+    """
+    task_ids = list(task_ids)
+    before = count_contributions(Task.objects.filter(pk__in=task_ids))
+    token = _suspended.set(True)
+    try:
+        yield
+    finally:
+        _suspended.reset(token)
+    after = count_contributions(Task.objects.filter(pk__in=task_ids))
+    after.subtract(before)
+    apply_deltas(after)
+
+
+def count_created(tasks):
+    """Для bulk_create: сигналов нет, вклад новых задач считаем агрегатами."""
+    apply_deltas(count_contributions(Task.objects.filter(pk__in=[task.pk for task in tasks])))
+
+
+def reconcile_counters(workspace_id):
+    """
+    Сверяет счётчики пространства с таблицей задач и исправляет расхождения.
+    Возвращает число исправленных строк — ненулевое значение означает дрейф.
+    """
+    actual = defaultdict(lambda: [0, 0])
+    contributions = count_contributions(Task.objects.filter(workspace_id=workspace_id))
+    for (_, dimension, key, closed), count in contributions.items():
+        actual[(dimension, key)][closed] += count
+
+    with transaction.atomic():
+        stored = {
+            (counter.dimension, counter.key): counter
+            for counter in TaskCounter.objects.select_for_update().filter(workspace_id=workspace_id)
+        }
+        to_create, to_update = [], []
+        for (dimension, key), (open_count, closed_count) in actual.items():
+            counter = stored.pop((dimension, key), None)
+            if counter is None:
+                to_create.append(
+                    TaskCounter(
+                        workspace_id=workspace_id,
+                        dimension=dimension,
+                        key=key,
+                        open_count=open_count,
+                        closed_count=closed_count,
+                    )
+                )
+            elif (counter.open_count, counter.closed_count) != (open_count, closed_count):
+                counter.open_count, counter.closed_count = open_count, closed_count
+                to_update.append(counter)
+        # Оставшиеся строки — измерения, задач в которых больше нет
+        stale = [counter.pk for counter in stored.values() if counter.open_count or counter.closed_count]
+        TaskCounter.objects.filter(pk__in=[counter.pk for counter in stored.values()]).delete()
+        TaskCounter.objects.bulk_create(to_create)
+        TaskCounter.objects.bulk_update(to_update, ["open_count", "closed_count"])
+
+    drift = len(to_create) + len(to_update) + len(stale)
+    if drift:
+        logger.warning("Task counters of workspace %s drifted: %s rows corrected", workspace_id, drift)
+    return drift
+
+
+def get_workspace_stats(workspace_id):
+    stats = {"total": 0, "open": 0, "closed": 0, "by_status": [], "by_label": [], "by_type": [], "by_assignee": []}
+    counters = TaskCounter.objects.filter(workspace_id=workspace_id).order_by("dimension", "key")
+    for dimension, key, open_count, closed_count in counters.values_list(
+        "dimension", "key", "open_count", "closed_count"
+    ):
+        if dimension == "total":
+            stats.update(total=open_count + closed_count, open=open_count, closed=closed_count)
+        elif open_count or closed_count:
+            stats[f"by_{dimension}"].append(
+                {"id": key or None, "total": open_count + closed_count, "open": open_count, "closed": closed_count}
+            )
+    return stats
+
+
+def tasks_count_subquery(dimension, outer_field="key"):
+    """
+    Число задач из счётчиков для annotate в списках админки: один подзапрос вместо COUNT на строку.
+    outer_field — поле счётчика, сопоставляемое с pk строки списка (key или workspace для total).
+    """
+    counters = (
+        TaskCounter.objects.filter(dimension=dimension, **{outer_field: OuterRef("pk")})
+        .order_by()
+        .values("dimension")
+        .annotate(total=Sum(F("open_count") + F("closed_count")))
+        .values("total")
+    )
+    return Coalesce(Subquery(counters), Value(0))
+
+
+# Сигналы
+
+
+def _receivers():
+    from django.db.models.signals import m2m_changed, post_delete, post_save, pre_delete, pre_save
+
+    yield pre_save, handle_task_pre_save, Task
+    yield post_save, handle_task_save, Task
+    yield pre_delete, handle_task_delete, Task
+    yield m2m_changed, handle_labels_changed, Task.labels.through
+    yield pre_save, handle_status_pre_save, TaskStatus
+    yield post_save, handle_status_save, TaskStatus
+    yield post_delete, handle_label_delete, Label
+    for model in UNSET_ON_DELETE:
+        yield post_delete, handle_dimension_delete, model
+
+
+def connect_signals():
+    for signal, handler, sender in _receivers():
+        signal.connect(handler, sender=sender, dispatch_uid=f"task_counters_{handler.__name__}_{sender.__name__}")
+
+
+def disconnect_signals():
+    for signal, handler, sender in _receivers():
+        signal.disconnect(sender=sender, dispatch_uid=f"task_counters_{handler.__name__}_{sender.__name__}")
+
+
+def _from_workspace_cascade(origin):
+    return isinstance(origin, Workspace) or getattr(origin, "model", None) is Workspace
+
+
+def handle_task_pre_save(sender, instance, raw=False, **kwargs):
+    # Прежние значения берём из снимка загрузки до того, как журнал обновит его в post_save
+    instance._counter_deltas = None
+    if raw or _suspended.get():
+        return
+    new = _task_values(instance)
+    if instance._state.adding:
+        old = None
+    else:
+        loaded = getattr(instance, "_loaded_values", None)
+        if loaded is None:
+            return
+        old = {attname: loaded.get(attname, value) for attname, value in new.items()}
+        if old == new:
+            return
+
+    closed_ids = _closed_status_ids({new["status_id"], old and old["status_id"]})
+    new_closed = new["status_id"] in closed_ids
+    deltas = Counter()
+    _task_deltas(deltas, new, new_closed, 1)
+    if old is not None:
+        old_closed = old["status_id"] in closed_ids
+        _task_deltas(deltas, old, old_closed, -1)
+        if old_closed != new_closed or old["workspace_id"] != new["workspace_id"]:
+            # Метки задачи переезжают в другую корзину вместе с ней
+            for label_id in Task.labels.through.objects.filter(task_id=instance.pk).values_list("label_id", flat=True):
+                deltas[(new["workspace_id"], "label", label_id, new_closed)] += 1
+                deltas[(old["workspace_id"], "label", label_id, old_closed)] -= 1
+    instance._counter_deltas = deltas
+
+
+def handle_task_save(sender, instance, raw=False, **kwargs):
+    deltas = getattr(instance, "_counter_deltas", None)
+    if deltas:
+        instance._counter_deltas = None
+        apply_deltas(deltas)
+
+
+def handle_task_delete(sender, instance, origin=None, **kwargs):
+    # При удалении пространства его счётчики уходят каскадом
+    if _suspended.get() or _from_workspace_cascade(origin):
+        return
+    deltas = Counter()
+    _task_deltas(deltas, _task_values(instance), bool(_closed_status_ids({instance.status_id})), -1)
+    _label_deltas(deltas, Task.labels.through.objects.filter(task_id=instance.pk), -1)
+    apply_deltas(deltas)
+
+
+def handle_labels_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if _suspended.get() or action not in ("post_add", "pre_remove", "pre_clear"):
+        return
+    if action != "pre_clear" and not pk_set:
+        return
+    own, other = ("label_id", "task_id") if reverse else ("task_id", "label_id")
+    rows = sender.objects.filter(**{own: instance.pk})
+    if pk_set:
+        rows = rows.filter(**{f"{other}__in": pk_set})
+    # post_add получает только действительно добавленные связи, pre_remove — запрошенные, поэтому
+    # до удаления берём лишь существующие
+    deltas = Counter()
+    _label_deltas(deltas, rows, 1 if action == "post_add" else -1)
+    apply_deltas(deltas)
+
+
+def handle_status_pre_save(sender, instance, raw=False, **kwargs):
+    instance._closed_changed = False
+    if raw or instance._state.adding:
+        return
+    was_closed = TaskStatus.objects.filter(pk=instance.pk).values_list("is_closed", flat=True).first()
+    instance._closed_changed = was_closed is not None and was_closed != instance.is_closed
+
+
+def handle_status_save(sender, instance, raw=False, **kwargs):
+    # Задачи статуса переходят между открытыми и закрытыми во всех измерениях — проще пересчитать
+    if getattr(instance, "_closed_changed", False):
+        workspace_id = instance.workspace_id
+        transaction.on_commit(lambda: reconcile_counters(workspace_id))
+
+
+def handle_label_delete(sender, instance, origin=None, **kwargs):
+    if not _from_workspace_cascade(origin):
+        TaskCounter.objects.filter(workspace_id=instance.workspace_id, dimension="label", key=instance.pk).delete()
+
+
+def handle_dimension_delete(sender, instance, origin=None, **kwargs):
+    """Статус, тип или исполнитель удалён, у задач поле стало NULL: строки переезжают на ключ 0."""
+    if _from_workspace_cascade(origin):
+        return
+    if sender is TaskStatus and instance.is_closed:
+        # Задачи закрытого статуса стали открытыми (status=NULL) во всех измерениях — как в handle_status_save
+        workspace_id = instance.workspace_id
+        transaction.on_commit(lambda: reconcile_counters(workspace_id))
+        return
+    dimension = UNSET_ON_DELETE[sender]
+    counters = TaskCounter.objects.filter(dimension=dimension, key=instance.pk)
+    deltas = Counter()
+    for workspace_id, open_count, closed_count in counters.values_list("workspace_id", "open_count", "closed_count"):
+        deltas[(workspace_id, dimension, 0, False)] += open_count
+        deltas[(workspace_id, dimension, 0, True)] += closed_count
+    counters.delete()
+    apply_deltas(deltas)
@@ -0,0 +1,241 @@
+import heapq
+from functools import cache
+from uuid import uuid4
+
+import numpy as np
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import transaction
+
+from apps.workspaces.membership import LocalLRUCache
+from apps.workspaces.models import Workspace
+
+from .models import Task, TaskDependency
+
+VERSION_KEY = "tasks:dependency_graph:{workspace_id}"
+BLOCKING_TYPES = ("blocks", "is_blocked_by")
+
+
+def graph_setting(name):
+    return settings.TASK_DEPENDENCY_GRAPH[name]
+
+
+def blocking_edge(from_task_id, to_task_id, dependency_type):
+    """(блокирующая, блокируемая) для блокирующих связей, None для relates_to."""
+    if dependency_type == "blocks":
+        return from_task_id, to_task_id
+    if dependency_type == "is_blocked_by":
+        return to_task_id, from_task_id
+    return None
+
+
+class DependencyGraph:
+    """
+    Граф блокировок пространства в CSR-виде: отсортированные id задач и по паре массивов
+    (смещения, соседи) на каждое направление. Задачи без блокирующих связей в граф не входят.
+    """
+
+    def __init__(self, edges):
+        pairs = np.array(sorted(set(edges)), dtype=np.int64).reshape(-1, 2)
+        self.task_ids = np.unique(pairs)
+        blockers = np.searchsorted(self.task_ids, pairs[:, 0]).astype(np.int32)
+        blocked = np.searchsorted(self.task_ids, pairs[:, 1]).astype(np.int32)
+        self._forward = self._csr(blockers, blocked)
+        self._backward = self._csr(blocked, blockers)
+
+    def _csr(self, sources, targets):
+        offsets = np.zeros(len(self.task_ids) + 1, dtype=np.int32)
+        np.cumsum(np.bincount(sources, minlength=len(self.task_ids)), out=offsets[1:])
+        return offsets, targets[np.argsort(sources, kind="stable")]
+
+    def __len__(self):
+        return len(self.task_ids)
+
+    def node(self, task_id):
+        index = int(np.searchsorted(self.task_ids, task_id))
+        if index < len(self.task_ids) and self.task_ids[index] == task_id:
+            return index
+        return None
+
+    @staticmethod
+    def _neighbours(csr, node):
+        offsets, targets = csr
+        return targets[offsets[node] : offsets[node + 1]]
+
+    def _reach(self, csr, start, goal=None, skip=None):
+        seen = np.zeros(len(self.task_ids), dtype=bool)
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for neighbour in self._neighbours(csr, node).tolist():
+                if seen[neighbour] or (node, neighbour) == skip:
+                    continue
+                if neighbour == goal:
+                    return True
+                seen[neighbour] = True
+                stack.append(neighbour)
+        if goal is not None:
+            return False
+        seen[start] = False
+        return self.task_ids[seen].tolist()
+
+    def blockers(self, task_id):
+        """Все задачи, от которых транзитивно зависит task_id."""
+        node = self.node(task_id)
+        return [] if node is None else self._reach(self._backward, node)
+
+    def blocked(self, task_id):
+        """Все задачи, транзитивно ждущие task_id."""
+        node = self.node(task_id)
+        return [] if node is None else self._reach(self._forward, node)
+
+    def creates_cycle(self, blocker_id, blocked_id, ignore=None):
+        """
+        Замкнёт ли ребро blocker -> blocked цикл: да, если blocker уже достижим из blocked.
+        ignore — ребро (blocker, blocked), которое не учитывается (при изменении существующей связи).
+        """
+        if blocker_id == blocked_id:
+            return True
+        blocker, blocked = self.node(blocker_id), self.node(blocked_id)
+        if blocker is None or blocked is None:
+            return False
+        skip = (self.node(ignore[0]), self.node(ignore[1])) if ignore else None
+        return self._reach(self._forward, blocked, goal=blocker, skip=skip)
+
+    def _topological_nodes(self):
+        # Kahn с кучей по индексу: индексы упорядочены как id, поэтому порядок детерминирован
+        waiting = np.diff(self._backward[0])
+        ready = np.flatnonzero(waiting == 0).tolist()
+        heapq.heapify(ready)
+        order = []
+        while ready:
+            node = heapq.heappop(ready)
+            order.append(node)
+            for neighbour in self._neighbours(self._forward, node).tolist():
+                waiting[neighbour] -= 1
+                if not waiting[neighbour]:
+                    heapq.heappush(ready, neighbour)
+        return order, np.flatnonzero(waiting > 0)
+
+    def topological_order(self):
+        """(id в порядке выполнения, id задач в циклах или за ними) — циклы могли остаться с прежних версий."""
+        order, cyclic = self._topological_nodes()
+        return self.task_ids[order].tolist(), self.task_ids[cyclic].tolist()
+
+    def critical_path(self, weights, task_id=None):
+        """
+        Самая длинная по весу цепочка блокировок: weights — {id задачи: часы}, отсутствующие считаются нулём.
+        task_id — цепочка, заканчивающаяся этой задачей, иначе самая длинная в пространстве.
+        Возвращает (id от начала цепочки к концу, суммарный вес).
+        """
+        weight = np.array([weights.get(task, 0) or 0 for task in self.task_ids.tolist()], dtype=np.float64)
+        total = np.zeros(len(self.task_ids), dtype=np.float64)
+        previous = np.full(len(self.task_ids), -1, dtype=np.int32)
+        order, _ = self._topological_nodes()
+        for node in order:
+            blockers = self._neighbours(self._backward, node)
+            if blockers.size:
+                best = blockers[np.argmax(total[blockers])]
+                total[node] = total[best] + weight[node]
+                previous[node] = best
+            else:
+                total[node] = weight[node]
+
+        if task_id is not None:
+            end = self.node(task_id)
+            if end is None:
+                return [task_id], weights.get(task_id) or 0
+        elif order:
+            end = order[int(np.argmax(total[order]))]
+        else:
+            return [], 0
+        path = []
+        node = end
+        while node != -1:
+            path.append(node)
+            node = previous[node]
+        path.reverse()
+        return self.task_ids[path].tolist(), round(float(total[end]), 2)
+
+
+@cache
+def get_local_cache():
+    return LocalLRUCache(graph_setting("LOCAL_MAXSIZE"), graph_setting("LOCAL_TTL"))
+
+
+def _version(workspace_id):
+    # Версия — случайный токен: после очистки или вытеснения из общего кеша старые графы не совпадут с новой
+    key = VERSION_KEY.format(workspace_id=workspace_id)
+    version = shared_cache.get(key)
+    if version is None:
+        shared_cache.add(key, uuid4().hex, None)
+        version = shared_cache.get(key)
+    return version
+
+
+def load_dependency_graph(workspace_id):
+    rows = TaskDependency.objects.filter(
+        from_task__workspace_id=workspace_id, dependency_type__in=BLOCKING_TYPES
+    ).values_list("from_task_id", "to_task_id", "dependency_type")
+    return DependencyGraph(blocking_edge(*row) for row in rows)
+
+
+def get_dependency_graph(workspace_id):
+    """Граф пространства из памяти процесса; перечитывается одним запросом, если версия в общем кеше сменилась."""
+    version = _version(workspace_id)
+    local_cache = get_local_cache()
+    cached = local_cache.get(workspace_id)
+    if cached is not None and cached[0] == version:
+        return cached[1]
+    graph = load_dependency_graph(workspace_id)
+    local_cache.set(workspace_id, (version, graph))
+    return graph
+
+
+def invalidate_dependency_graph(workspace_id):
+    key = VERSION_KEY.format(workspace_id=workspace_id)
+    shared_cache.set(key, uuid4().hex, None)
+    get_local_cache().delete(workspace_id)
+    # Параллельный запрос мог успеть перечитать граф до коммита — меняем версию ещё раз после него
+    transaction.on_commit(lambda: shared_cache.set(key, uuid4().hex, None))
+
+
+def _receivers():
+    from django.db.models.signals import post_delete, post_save
+
+    yield post_save, handle_dependency_save, TaskDependency
+    yield post_delete, handle_dependency_delete, TaskDependency
+
+
+def connect_signals():
+    for signal, handler, sender in _receivers():
+        signal.connect(handler, sender=sender, dispatch_uid=f"dependency_graph_{handler.__name__}")
+
+
+def disconnect_signals():
+    for signal, handler, sender in _receivers():
+        signal.disconnect(sender=sender, dispatch_uid=f"dependency_graph_{handler.__name__}")
+
+
+def _invalidate_for(instance, origin=None):
+    # Тип не проверяем: правка могла перевести блокирующую связь в relates_to
+    if isinstance(origin, Task):
+        workspace_id = origin.workspace_id
+    elif TaskDependency.from_task.is_cached(instance):
+        workspace_id = instance.from_task.workspace_id
+    else:
+        workspace_id = Task.objects.filter(pk=instance.from_task_id).values_list("workspace_id", flat=True).first()
+    if workspace_id is not None:
+        invalidate_dependency_graph(workspace_id)
+
+
+def handle_dependency_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        _invalidate_for(instance)
+
+
+def handle_dependency_delete(sender, instance, origin=None, **kwargs):
+    # Пространство удаляется целиком — его граф больше никто не запросит
+    if isinstance(origin, Workspace) or getattr(origin, "model", None) is Workspace:
+        return
+    _invalidate_for(instance, origin)
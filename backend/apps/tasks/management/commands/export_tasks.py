@@ -0,0 +1,36 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.tasks.models import Task
+from apps.tasks.selectors.users import filter_by_user_workspaces
+from apps.tasks.services.export import EXPORT_FORMATS, encode, iter_task_records, render
+from apps.users.models import User
+
+
+class Command(BaseCommand):
+    help = "Потоковая выгрузка задач пространства в CSV или NDJSON, опционально со сжатием gzip"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--workspace", type=int, required=True)
+        parser.add_argument("--format", dest="export_format", choices=list(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--output", "-o", help="Файл выгрузки, по умолчанию stdout")
+        parser.add_argument("--user", help="Email пользователя: выгрузить только доступное ему")
+
+    def handle(self, *args, **options):
+        tasks = Task.objects.all()
+        if options["user"]:
+            user = User.objects.filter(email=options["user"]).first()
+            if user is None:
+                raise CommandError(f"User {options['user']} not found")
+            tasks = filter_by_user_workspaces(Task, user)
+        tasks = tasks.filter(workspace_id=options["workspace"])
+
+        chunks = encode(render(iter_task_records(tasks), options["export_format"]), compress=options["gzip"])
+        if options["output"]:
+            with open(options["output"], "wb") as output:
+                output.writelines(chunks)
+        else:
+            sys.stdout.buffer.writelines(chunks)
+            sys.stdout.flush()
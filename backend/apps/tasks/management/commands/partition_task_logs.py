@@ -0,0 +1,60 @@
+from datetime import datetime
+from pathlib import Path
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from apps.tasks.models import TaskLog
+from apps.tasks.partitions import (
+    add_months,
+    archive_partition,
+    archive_rows,
+    create_partition,
+    default_months,
+    is_partitioned,
+    list_partitions,
+    month_start,
+    partition_name,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Обслуживание секций журнала задач: создаёт месячные секции наперёд, старые выгружает "
+        "в сжатый JSONL и удаляет. Запускать по расписанию, например раз в сутки"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--ahead", type=int, default=2, help="Сколько будущих месяцев держать готовыми")
+        parser.add_argument("--retain", type=int, default=12, help="Сколько месяцев, включая текущий, хранить в БД")
+        parser.add_argument("--archive-dir", default="task_log_archive", help="Каталог для архивов *.jsonl.gz")
+
+    def handle(self, *args, **options):
+        archive_dir = Path(options["archive_dir"])
+        archive_dir.mkdir(parents=True, exist_ok=True)
+        current = month_start(timezone.now())
+        cutoff = add_months(current, 1 - options["retain"])
+
+        if not is_partitioned():
+            self.stdout.write("Таблица не секционирована, архивирую строки старше " + f"{cutoff:%Y-%m}")
+            for day in TaskLog.objects.filter(timestamp__lt=cutoff).dates("timestamp", "month"):
+                month = timezone.make_aware(datetime(day.year, day.month, 1))
+                self.report(*archive_rows(month, archive_dir))
+            return
+
+        partitions = list_partitions()
+        for offset in range(options["ahead"] + 1):
+            month = add_months(current, offset)
+            if partition_name(month) not in partitions:
+                self.stdout.write(f"Создана секция {create_partition(month)}")
+
+        for name, year_month in sorted(partitions.items()):
+            if year_month < (cutoff.year, cutoff.month):
+                self.report(*archive_partition(name, archive_dir))
+
+        # Старые строки из DEFAULT выносятся в свои месячные секции и архивируются вместе с ними
+        for month in default_months(cutoff):
+            self.report(*archive_partition(create_partition(month), archive_dir))
+
+    def report(self, path, count):
+        self.stdout.write(self.style.SUCCESS(f"{count} записей выгружено в {path}"))
@@ -0,0 +1,185 @@
+import json
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections as db_connections
+from django.db.models import Max, Min
+from django.utils import timezone
+from elasticsearch import NotFoundError, helpers
+from elasticsearch.dsl.connections import connections
+
+from apps.indexing.services.journal import replay_journal, start_journal, stop_journal
+from apps.tasks.models import Task
+from apps.tasks.search_document import TaskDocument, task_index
+from apps.tasks.search_routing import get_dedicated_indices, routing_enabled
+
+
+def shared_index_queryset(document):
+    # Задачи пространств с отдельным индексом переносит split_task_index, в общий индекс они не попадают
+    return document.get_queryset().exclude(workspace_id__in=list(get_dedicated_indices()))
+
+
+def prepare_action(document, index_name, task):
+    action = {"_index": index_name, "_id": task.pk, "_source": document.prepare(task)}
+    if routing_enabled():
+        action["routing"] = str(task.workspace_id)
+    return action
+
+
+def prepare_chunk(index_name, lower_pk, upper_pk):
+    """Готовит документы для задач с pk в [lower_pk, upper_pk). Выполняется в процессе пула."""
+    document = TaskDocument()
+    tasks = shared_index_queryset(document).filter(pk__gte=lower_pk, pk__lt=upper_pk).order_by("pk")
+    return [prepare_action(document, index_name, task) for task in tasks]
+
+
+def _init_worker():
+    import django
+
+    django.setup()
+    # Соединения, унаследованные от родителя при fork, использовать нельзя
+    db_connections.close_all()
+
+
+class Command(BaseCommand):
+    help = "Полная переиндексация задач в новый версионный индекс с атомарным переключением алиаса"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--chunk-size", type=int, default=1000, help="Размер диапазона pk на один чанк")
+        parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Процессов для prepare")
+        parser.add_argument("--checkpoint", default="reindex_tasks.checkpoint.json", help="Файл прогресса")
+        parser.add_argument("--resume", action="store_true", help="Продолжить с последнего чанка")
+        parser.add_argument("--keep-old", action="store_true", help="Не удалять предыдущие индексы")
+
+    def handle(self, *args, **options):
+        self.client = connections.get_connection()
+        self.alias = task_index._name
+        self.checkpoint_path = Path(options["checkpoint"])
+
+        state = self.load_checkpoint() if options["resume"] else None
+        if state is None:
+            state = self.create_index()
+        else:
+            # Флаг журнала мог истечь, пока загрузка стояла; повтор с начала журнала безопасен
+            start_journal()
+            state.setdefault("journal", 0)
+        self.stdout.write(f"Индекс {state['index']}, начиная с pk > {state['last_pk']}")
+
+        bounds = Task.objects.aggregate(min_pk=Min("pk"), max_pk=Max("pk"))
+        started = time.monotonic()
+        indexed = 0
+        if bounds["max_pk"] is not None:
+            first_pk = max(state["last_pk"] + 1, bounds["min_pk"])
+            chunks = [
+                (lower, min(lower + options["chunk_size"], bounds["max_pk"] + 1))
+                for lower in range(first_pk, bounds["max_pk"] + 1, options["chunk_size"])
+            ]
+            indexed = self.load_chunks(state, chunks, options["workers"], started)
+
+        # Изменения, пришедшие во время загрузки, ушли в старый индекс через алиас — догоняем их
+        document = TaskDocument()
+        catch_up = shared_index_queryset(document).filter(updated_at__gte=state["started_at"])
+        indexed += self.bulk_load([
+            prepare_action(document, state["index"], task)
+            for task in catch_up.iterator(chunk_size=options["chunk_size"])
+        ])
+
+        self.finalize_index(state["index"])
+        # Повтор журнала до переключения и ещё раз после: правки, успевшие в старый индекс между ними
+        replayed = replay_journal(state["index"], state["journal"])
+        self.swap_alias(state["index"], keep_old=options["keep_old"])
+        replay_journal(state["index"], replayed)
+        stop_journal()
+        self.checkpoint_path.unlink(missing_ok=True)
+
+        elapsed = time.monotonic() - started
+        rate = indexed / elapsed if elapsed else indexed
+        self.stdout.write(
+            self.style.SUCCESS(f"Готово: {indexed} документов за {elapsed:.1f} с ({rate:.0f} docs/sec)")
+        )
+
+    def create_index(self):
+        name = f"{self.alias}_{timezone.now():%Y%m%d%H%M%S}"
+        body = task_index.to_dict()
+        # На время загрузки отключаем refresh и реплики
+        body["settings"] = {**body.get("settings", {}), "refresh_interval": "-1", "number_of_replicas": 0}
+        self.client.indices.create(index=name, **body)
+        # Удаления и update_by_query связанных объектов во время загрузки попадают только в старый индекс —
+        # журнал с этого момента повторяется на новом перед переключением алиаса
+        journal = start_journal()
+        state = {"index": name, "last_pk": 0, "started_at": timezone.now().isoformat(), "journal": journal}
+        self.save_checkpoint(state)
+        return state
+
+    def load_chunks(self, state, chunks, workers, started):
+        indexed = 0
+        if workers <= 1:
+            for lower, upper in chunks:
+                indexed += self.bulk_load(prepare_chunk(state["index"], lower, upper))
+                self.chunk_done(state, upper, indexed, started)
+            return indexed
+
+        db_connections.close_all()
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as pool:
+            pending = deque()
+            for lower, upper in chunks:
+                pending.append((upper, pool.submit(prepare_chunk, state["index"], lower, upper)))
+                # Держим ограниченное число чанков в полёте, чтобы не копить готовые документы в памяти
+                if len(pending) >= workers * 2:
+                    upper_done, future = pending.popleft()
+                    indexed += self.bulk_load(future.result())
+                    self.chunk_done(state, upper_done, indexed, started)
+            while pending:
+                upper_done, future = pending.popleft()
+                indexed += self.bulk_load(future.result())
+                self.chunk_done(state, upper_done, indexed, started)
+        return indexed
+
+    def bulk_load(self, actions):
+        if not actions:
+            return 0
+        success, _ = helpers.bulk(self.client, actions, refresh=False)
+        return success
+
+    def chunk_done(self, state, upper_pk, indexed, started):
+        state["last_pk"] = upper_pk - 1
+        self.save_checkpoint(state)
+        elapsed = time.monotonic() - started
+        rate = indexed / elapsed if elapsed else indexed
+        self.stdout.write(f"  pk < {upper_pk}: {indexed} документов, {rate:.0f} docs/sec")
+
+    def finalize_index(self, name):
+        replicas = task_index.to_dict().get("settings", {}).get("number_of_replicas", 1)
+        self.client.indices.put_settings(
+            index=name, settings={"index": {"refresh_interval": None, "number_of_replicas": replicas}}
+        )
+        self.client.indices.refresh(index=name)
+
+    def swap_alias(self, name, keep_old=False):
+        actions = [{"add": {"index": name, "alias": self.alias}}]
+        try:
+            old_indices = list(self.client.indices.get_alias(name=self.alias))
+        except NotFoundError:
+            old_indices = []
+            # Первый запуск: на месте алиаса лежит обычный индекс, удаляем его в той же операции
+            if self.client.indices.exists(index=self.alias):
+                actions.append({"remove_index": {"index": self.alias}})
+        actions += [{"remove": {"index": old, "alias": self.alias}} for old in old_indices if old != name]
+        self.client.indices.update_aliases(actions=actions)
+
+        if not keep_old:
+            for old in old_indices:
+                if old != name:
+                    self.client.indices.delete(index=old)
+
+    def load_checkpoint(self):
+        if not self.checkpoint_path.exists():
+            raise CommandError(f"Нет файла прогресса {self.checkpoint_path}, продолжать нечего")
+        return json.loads(self.checkpoint_path.read_text())
+
+    def save_checkpoint(self, state):
+        self.checkpoint_path.write_text(json.dumps(state))
@@ -0,0 +1,123 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models import Count
+from django.utils import timezone
+from elasticsearch import helpers
+from elasticsearch.dsl.connections import connections
+
+from apps.indexing.services.journal import replay_journal, start_journal, stop_journal
+from apps.tasks.models import Task, WorkspaceSearchIndex
+from apps.tasks.search_document import TaskDocument, task_index
+from apps.tasks.search_routing import (
+    DEDICATED_INDEX,
+    TASK_INDEX,
+    get_dedicated_indices,
+    index_setting,
+    invalidate_dedicated_indices,
+    routing_enabled,
+)
+from apps.workspaces.models import Workspace
+
+
+class Command(BaseCommand):
+    help = "Выносит задачи крупных пространств из общего индекса в отдельные индексы"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--threshold", type=int, default=None, help="Минимум задач для отдельного индекса (DEDICATED_THRESHOLD)"
+        )
+        parser.add_argument("--workspace", type=int, action="append", help="Вынести это пространство без порога")
+        parser.add_argument("--settle", type=float, default=None, help="Пауза после переключения (LOCAL_TTL)")
+        parser.add_argument("--dry-run", action="store_true", help="Только показать кандидатов")
+
+    def handle(self, *args, **options):
+        self.client = connections.get_connection()
+        dedicated = get_dedicated_indices()
+        if options["workspace"]:
+            workspace_ids = [pk for pk in options["workspace"] if pk not in dedicated]
+            existing = Workspace.objects.filter(pk__in=workspace_ids).values_list("pk", flat=True)
+            missing = set(workspace_ids) - set(existing)
+            if missing:
+                raise CommandError(f"Нет пространств: {sorted(missing)}")
+        else:
+            threshold = options["threshold"] or index_setting("DEDICATED_THRESHOLD")
+            sizes = (
+                Task.objects.order_by()
+                .values("workspace_id")
+                .annotate(total=Count("pk"))
+                .filter(total__gte=threshold)
+                .exclude(workspace_id__in=list(dedicated))
+                .values_list("workspace_id", "total")
+            )
+            workspace_ids = [workspace_id for workspace_id, _ in sorted(sizes, key=lambda row: -row[1])]
+
+        if not workspace_ids:
+            self.stdout.write("Нет пространств для отдельного индекса")
+            return
+        if options["dry_run"]:
+            self.stdout.write(f"Кандидаты: {', '.join(map(str, workspace_ids))}")
+            return
+
+        settle = index_setting("LOCAL_TTL") if options["settle"] is None else options["settle"]
+        for workspace_id in workspace_ids:
+            self.split(workspace_id, settle)
+
+    def split(self, workspace_id, settle):
+        """
+        Копия на стороне ES (_reindex), переключение записи и поиска, догрузка изменённого за время
+        копирования из БД, повтор журнала связанных изменений и удалений и удаление задач
+        пространства из общего индекса.
+        """
+        started = time.monotonic()
+        started_at = timezone.now()
+        name = DEDICATED_INDEX.format(workspace_id=workspace_id)
+        body = task_index.to_dict()
+        body["settings"] = {
+            **body.get("settings", {}),
+            "number_of_shards": index_setting("DEDICATED_SHARDS"),
+            "number_of_replicas": 0,
+            "refresh_interval": "-1",
+        }
+        # update_by_query связанных объектов и удаления за время копирования попадают только в общий индекс
+        journal = start_journal()
+        self.client.indices.create(index=name, **body)
+
+        query = {"term": {"workspace.id": workspace_id}}
+        source = {"index": TASK_INDEX, "query": query}
+        # routing общего индекса в отдельном не нужен: там задачи пространства раскладываются по _id
+        copied = self.client.reindex(
+            source=source, dest={"index": name, "routing": "discard"}, wait_for_completion=True, refresh=False
+        )["total"]
+
+        # Поиск переключается на индекс сразу после регистрации — к этому моменту он должен быть виден целиком
+        replicas = task_index.to_dict().get("settings", {}).get("number_of_replicas", 1)
+        self.client.indices.put_settings(
+            index=name, settings={"index": {"refresh_interval": None, "number_of_replicas": replicas}}
+        )
+        self.client.indices.refresh(index=name)
+        journal = replay_journal(name, journal)
+
+        WorkspaceSearchIndex.objects.create(workspace_id=workspace_id, index_name=name)
+        invalidate_dedicated_indices()
+        # Пока локальные кеши других процессов не истекли, они ещё пишут в общий индекс
+        time.sleep(settle)
+
+        document = TaskDocument()
+        catch_up = document.get_queryset().filter(workspace_id=workspace_id, updated_at__gte=started_at)
+        caught_up, _ = helpers.bulk(
+            self.client, document.get_actions(catch_up.iterator(chunk_size=1000), "index"), refresh=True
+        )
+        # Всё, что успело в общий индекс до переключения, переносится до удаления задач оттуда
+        replay_journal(name, journal)
+        stop_journal()
+
+        delete_kwargs = {"routing": str(workspace_id)} if routing_enabled() else {}
+        self.client.delete_by_query(index=TASK_INDEX, query=query, conflicts="proceed", **delete_kwargs)
+
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Пространство {workspace_id} -> {name}: {copied} скопировано, {caught_up} догружено за {elapsed:.1f} с"
+            )
+        )
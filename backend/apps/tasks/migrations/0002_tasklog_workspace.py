@@ -0,0 +1,41 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:10
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_workspace(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+    TaskLog = apps.get_model("tasks", "TaskLog")
+    TaskLog.objects.filter(workspace__isnull=True).update(
+        workspace_id=Subquery(Task.objects.filter(pk=OuterRef("task_id")).values("workspace_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('contenttypes', '0002_remove_content_type_name'),
+        ('tasks', '0001_initial'),
+        ('workspaces', '0003_alter_userworkspacerole_unique_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasklog',
+            name='workspace',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='task_logs', to='workspaces.workspace'),
+        ),
+        migrations.RunPython(backfill_workspace, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='tasklog',
+            index=models.Index(fields=['workspace', '-timestamp'], name='tasklog_workspace_ts_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasklog',
+            index=models.Index(fields=['task', '-timestamp'], name='tasklog_task_ts_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+from django.db import migrations
+
+
+def partition_task_log(apps, schema_editor):
+    """
+    Пересоздаёт tasks_tasklog как таблицу, секционированную по месяцам timestamp.
+    Первичный ключ секционированной таблицы обязан включать ключ секционирования, поэтому он (id, timestamp);
+    для ORM pk по-прежнему id — уникальность даёт последовательность.
+    Месячные секции создаёт и архивирует команда partition_task_logs, до неё всё попадает в секцию DEFAULT.
+    В sqlite таблица остаётся обычной.
+    """
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    TaskLog = apps.get_model("tasks", "TaskLog")
+    qn = schema_editor.quote_name
+    table = TaskLog._meta.db_table
+    old_table = f"{table}_unpartitioned"
+    sequence = f"{table}_id_seq"
+
+    columns, definitions, params = [], [], []
+    for field in TaskLog._meta.local_fields:
+        if field.primary_key:
+            definition, extra_params = "bigint NOT NULL", []
+        else:
+            definition, extra_params = schema_editor.column_sql(TaskLog, field)
+            check = field.db_parameters(connection=schema_editor.connection)["check"]
+            if check:
+                definition += f" CHECK ({check})"
+        columns.append(qn(field.column))
+        definitions.append(f"{qn(field.column)} {definition}")
+        params.extend(extra_params)
+    column_list = ", ".join(columns)
+
+    schema_editor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}")
+    schema_editor.execute(
+        f"CREATE TABLE {qn(table)} ({', '.join(definitions)}) PARTITION BY RANGE ({qn('timestamp')})", params
+    )
+    schema_editor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+    schema_editor.execute(f"INSERT INTO {qn(table)} ({column_list}) SELECT {column_list} FROM {qn(old_table)}")
+    # Вместе со старой таблицей уходят её pkey, индексы и identity-последовательность — имена освобождаются
+    schema_editor.execute(f"DROP TABLE {qn(old_table)}")
+
+    schema_editor.execute(f"CREATE SEQUENCE {qn(sequence)} OWNED BY {qn(table)}.{qn('id')}")
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ALTER COLUMN {qn('id')} SET DEFAULT nextval('{sequence}')")
+    schema_editor.execute(f"SELECT setval('{sequence}', COALESCE((SELECT MAX(id) FROM {qn(table)}), 0) + 1, false)")
+    schema_editor.execute(f"ALTER TABLE {qn(table)} ADD PRIMARY KEY ({qn('id')}, {qn('timestamp')})")
+
+    for sql in schema_editor._model_indexes_sql(TaskLog):
+        schema_editor.execute(sql)
+    for field in TaskLog._meta.local_fields:
+        if field.remote_field and field.db_constraint:
+            schema_editor.execute(schema_editor._create_fk_sql(TaskLog, field, "_fk_%(to_table)s_%(to_column)s"))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0002_tasklog_workspace"),
+    ]
+
+    operations = [
+        # Обратно не разворачиваем: секционированная таблица совместима со схемой модели
+        migrations.RunPython(partition_task_log, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0003_partition_tasklog'),
+        ('workspaces', '0003_alter_userworkspacerole_unique_together'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['workspace', 'status'], name='task_workspace_status_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['workspace', '-updated_at', '-id'], name='task_workspace_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(condition=models.Q(('due_date__isnull', False)), fields=['assignee', 'due_date'], name='task_assignee_due_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskchecklistitem',
+            index=models.Index(fields=['task', 'order', 'id'], name='checklist_task_order_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='taskcomment',
+            index=models.Index(fields=['task', 'created_at', 'id'], name='taskcomment_task_created_idx'),
+        ),
+    ]
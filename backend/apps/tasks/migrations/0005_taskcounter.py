@@ -0,0 +1,63 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:19
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, Q
+
+
+def backfill_counters(apps, schema_editor):
+    """Начальное заполнение; дальше счётчики ведут сигналы и сверка apps.tasks.counters.reconcile_counters."""
+    Task = apps.get_model("tasks", "Task")
+    TaskCounter = apps.get_model("tasks", "TaskCounter")
+    counters = {}
+    dimensions = {
+        "total": None,
+        "status": "status_id",
+        "label": "labels",
+        "type": "task_type_id",
+        "assignee": "assignee_id",
+    }
+    for dimension, field in dimensions.items():
+        rows = (
+            Task.objects.order_by()
+            .values_list("workspace_id", *([field] if field else []))
+            .annotate(total=Count("pk"), closed=Count("pk", filter=Q(status__is_closed=True)))
+        )
+        for workspace_id, *key, total, closed in rows:
+            key = key[0] if key else 0
+            if dimension == "label" and key is None:
+                continue
+            counters[(workspace_id, dimension, key or 0)] = (total - closed, closed)
+    TaskCounter.objects.bulk_create(
+        [
+            TaskCounter(workspace_id=workspace_id, dimension=dimension, key=key, open_count=open_, closed_count=closed)
+            for (workspace_id, dimension, key), (open_, closed) in counters.items()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0004_task_filter_indexes'),
+        ('workspaces', '0003_alter_userworkspacerole_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskCounter',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('dimension', models.CharField(choices=[('total', 'Всего'), ('status', 'Статус'), ('label', 'Метка'), ('type', 'Тип'), ('assignee', 'Исполнитель')], max_length=10)),
+                ('key', models.PositiveBigIntegerField(default=0)),
+                ('open_count', models.IntegerField(default=0)),
+                ('closed_count', models.IntegerField(default=0)),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_counters', to='workspaces.workspace')),
+            ],
+            options={
+                'unique_together': {('workspace', 'dimension', 'key')},
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
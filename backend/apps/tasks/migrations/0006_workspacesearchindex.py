@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('tasks', '0005_taskcounter'),
+        ('workspaces', '0003_alter_userworkspacerole_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='WorkspaceSearchIndex',
+            fields=[
+                ('workspace', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_index', serialize=False, to='workspaces.workspace')),
+                ('index_name', models.CharField(max_length=255, unique=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+    ]
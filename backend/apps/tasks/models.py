@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models import Q
 from django.utils import timezone
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
@@ -6,6 +7,8 @@ from django.contrib.contenttypes.models import ContentType
 from apps.users.models import User
 from apps.workspaces.models import Workspace
 
+from .tracking import TrackedFieldsMixin
+
 
 class TaskType(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -43,7 +46,7 @@ class Label(models.Model):
         return f"{self.name} ({self.workspace.name})"
 
 
-class Task(models.Model):
+class Task(TrackedFieldsMixin, models.Model):
     PRIORITY_CHOICES = (
         ("low", "Низкий"),
         ("medium", "Средний"),
@@ -72,10 +75,63 @@ class Task(models.Model):
 
     history = GenericRelation("TaskLog")
 
+    class Meta:
+        # Под реальные фильтры TaskViewSet и курсорную пагинацию, замеры — benchmarks/indexes.py
+        indexes = [
+            models.Index(fields=["workspace", "status"], name="task_workspace_status_idx"),
+            models.Index(fields=["workspace", "-updated_at", "-id"], name="task_workspace_updated_idx"),
+            models.Index(
+                fields=["assignee", "due_date"], name="task_assignee_due_idx", condition=Q(due_date__isnull=False)
+            ),
+        ]
+
     def __str__(self):
         return f"{self.title} ({self.workspace.name})"
 
 
+class TaskCounter(models.Model):
+    """
+    Число задач пространства в разрезе статуса, метки, типа и исполнителя, отдельно открытых и закрытых.
+    Ведётся приращениями при записи задач (apps.tasks.counters) и периодически сверяется с таблицей задач.
+    """
+
+    DIMENSION_CHOICES = (
+        ("total", "Всего"),
+        ("status", "Статус"),
+        ("label", "Метка"),
+        ("type", "Тип"),
+        ("assignee", "Исполнитель"),
+    )
+
+    workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, related_name="task_counters")
+    dimension = models.CharField(max_length=10, choices=DIMENSION_CHOICES)
+    key = models.PositiveBigIntegerField(default=0)  # id статуса/метки/типа/исполнителя, 0 — не задан
+    open_count = models.IntegerField(default=0)
+    closed_count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ("workspace", "dimension", "key")
+
+    def __str__(self):
+        return f"{self.workspace_id}:{self.dimension}:{self.key} = {self.open_count}/{self.closed_count}"
+
+
+class WorkspaceSearchIndex(models.Model):
+    """
+    Отдельный индекс Elasticsearch под задачи крупного пространства (команда split_task_index).
+    Задачи остальных пространств живут в общем индексе, на шарде по routing = workspace_id.
+    """
+
+    workspace = models.OneToOneField(
+        Workspace, on_delete=models.CASCADE, primary_key=True, related_name="search_index"
+    )
+    index_name = models.CharField(max_length=255, unique=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.workspace_id} -> {self.index_name}"
+
+
 class TaskDependency(models.Model):
     DEPENDENCY_TYPES = (
         ("blocks", "Блокирует"),
@@ -95,7 +151,7 @@ class TaskDependency(models.Model):
         return f"{self.from_task} {self.get_dependency_type_display()} {self.to_task}"
 
 
-class TaskComment(models.Model):
+class TaskComment(TrackedFieldsMixin, models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="comments")
     author = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     content = models.TextField()
@@ -103,11 +159,14 @@ class TaskComment(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     is_pinned = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [models.Index(fields=["task", "created_at", "id"], name="taskcomment_task_created_idx")]
+
     def __str__(self):
         return f"Комментарий к {self.task} от {self.author}"
 
 
-class TaskAttachment(models.Model):
+class TaskAttachment(TrackedFieldsMixin, models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="attachments")
     file = models.FileField(upload_to="task_attachments/%Y/%m/%d/")
     uploaded_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
@@ -126,7 +185,7 @@ class TaskAttachment(models.Model):
         return f"{self.file_name} ({self.task})"
 
 
-class TaskChecklistItem(models.Model):
+class TaskChecklistItem(TrackedFieldsMixin, models.Model):
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="checklist_items")
     text = models.CharField(max_length=255)
     is_completed = models.BooleanField(default=False)
@@ -136,6 +195,7 @@ class TaskChecklistItem(models.Model):
 
     class Meta:
         ordering = ["order"]
+        indexes = [models.Index(fields=["task", "order", "id"], name="checklist_task_order_idx")]
 
     def save(self, *args, **kwargs):
         if self.is_completed and not self.completed_at:
@@ -158,6 +218,8 @@ class TaskLog(models.Model):
     )
 
     task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="change_logs")
+    # Денормализовано из task: список журнала фильтруется по пространству без JOIN через Task
+    workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, null=True, blank=True, related_name="task_logs")
     user = models.ForeignKey(User, on_delete=models.SET_NULL, null=True)
     action = models.CharField(max_length=20, choices=ACTION_CHOICES)
     timestamp = models.DateTimeField(auto_now_add=True)
@@ -167,5 +229,17 @@ class TaskLog(models.Model):
     object_id = models.PositiveIntegerField(null=True, blank=True)
     related_object = GenericForeignKey("content_type", "object_id")
 
+    class Meta:
+        # В PostgreSQL таблица секционирована по месяцам timestamp (см. миграцию 0003 и partition_task_logs)
+        indexes = [
+            models.Index(fields=["workspace", "-timestamp"], name="tasklog_workspace_ts_idx"),
+            models.Index(fields=["task", "-timestamp"], name="tasklog_task_ts_idx"),
+        ]
+
+    def save(self, *args, **kwargs):
+        if self.workspace_id is None and self.task_id is not None:
+            self.workspace_id = self.task.workspace_id
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.get_action_display()} для {self.task} в {self.timestamp}"
@@ -0,0 +1,38 @@
+from rest_framework.pagination import CursorPagination, PageNumberPagination
+
+
+class BoundedCursorPagination(CursorPagination):
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
+
+
+class TaskCursorPagination(BoundedCursorPagination):
+    ordering = ("-updated_at", "-id")
+
+
+class TaskCommentCursorPagination(BoundedCursorPagination):
+    ordering = ("created_at", "id")
+
+
+class TaskAttachmentCursorPagination(BoundedCursorPagination):
+    ordering = ("-uploaded_at", "-id")
+
+
+class TaskChecklistItemCursorPagination(BoundedCursorPagination):
+    ordering = ("order", "id")
+
+
+class TaskLogCursorPagination(BoundedCursorPagination):
+    ordering = ("-timestamp", "-id")
+
+
+class TaskDependencyCursorPagination(BoundedCursorPagination):
+    ordering = ("-created_at", "-id")
+
+
+class TaskSearchPagination(PageNumberPagination):
+    # Порядок поисковой выдачи задаёт релевантность, поэтому курсор по полям модели здесь не подходит
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 200
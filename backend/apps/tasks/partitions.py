@@ -0,0 +1,129 @@
+import gzip
+import json
+import re
+from pathlib import Path
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connection, transaction
+
+from .models import TaskLog
+
+TABLE = TaskLog._meta.db_table
+DEFAULT_PARTITION = f"{TABLE}_default"
+PARTITION_RE = re.compile(rf"^{TABLE}_p(\d{{4}})_(\d{{2}})$")
+
+
+def month_start(value):
+    return value.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+
+
+def add_months(month, count):
+    years, month_index = divmod(month.month - 1 + count, 12)
+    return month.replace(year=month.year + years, month=month_index + 1)
+
+
+def partition_name(month):
+    return f"{TABLE}_p{month:%Y_%m}"
+
+
+def is_partitioned():
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT 1 FROM pg_partitioned_table WHERE partrelid = %s::regclass", [TABLE])
+        return cursor.fetchone() is not None
+
+
+def list_partitions():
+    """{имя секции: (год, месяц)} для месячных секций, без DEFAULT."""
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [TABLE],
+        )
+        names = [row[0] for row in cursor.fetchall()]
+    partitions = {}
+    for name in names:
+        match = PARTITION_RE.match(name)
+        if match:
+            partitions[name] = (int(match.group(1)), int(match.group(2)))
+    return partitions
+
+
+def default_months(before):
+    """
+    Месяцы (начала, по возрастанию) строк старше before в секции DEFAULT: туда миграция 0003 перенесла
+    весь прежний журнал и туда же попадают месяцы, для которых секцию не создали заранее.
+    """
+    qn = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT date_trunc('month', {qn('timestamp')}) AS month FROM {qn(DEFAULT_PARTITION)} "
+            f"WHERE {qn('timestamp')} < %s ORDER BY month",
+            [before],
+        )
+        return [row[0] for row in cursor.fetchall()]
+
+
+def create_partition(month):
+    """
+    Создаёт секцию [month, month + 1 мес.). Строки этого диапазона, успевшие попасть в DEFAULT,
+    переносятся в неё — иначе ATTACH не пройдёт проверку секции по умолчанию.
+    """
+    name, upper = partition_name(month), add_months(month, 1)
+    qn = connection.ops.quote_name
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"CREATE TABLE {qn(name)} (LIKE {qn(TABLE)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)")
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(DEFAULT_PARTITION)} "
+            f"WHERE {qn('timestamp')} >= %s AND {qn('timestamp')} < %s RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved",
+            [month, upper],
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(TABLE)} ATTACH PARTITION {qn(name)} FOR VALUES FROM (%s) TO (%s)", [month, upper]
+        )
+    return name
+
+
+def write_jsonl(path, columns, rows):
+    count = 0
+    with gzip.open(path, "wt", encoding="utf-8") as archive:
+        for row in rows:
+            archive.write(json.dumps(dict(zip(columns, row, strict=True)), cls=DjangoJSONEncoder, ensure_ascii=False))
+            archive.write("\n")
+            count += 1
+    return count
+
+
+def _fetch_in_chunks(cursor, size=2000):
+    while rows := cursor.fetchmany(size):
+        yield from rows
+
+
+def archive_partition(name, archive_dir):
+    """Выгружает секцию в <archive_dir>/<name>.jsonl.gz, затем отсоединяет и удаляет её."""
+    path = Path(archive_dir) / f"{name}.jsonl.gz"
+    qn = connection.ops.quote_name
+    with transaction.atomic():
+        # Серверный курсор: секция не поднимается в память целиком
+        with connection.chunked_cursor() as cursor:
+            cursor.execute(f"SELECT * FROM {qn(name)} ORDER BY id")
+            columns = [column[0] for column in cursor.description]
+            count = write_jsonl(path, columns, _fetch_in_chunks(cursor))
+        with connection.cursor() as cursor:
+            cursor.execute(f"ALTER TABLE {qn(TABLE)} DETACH PARTITION {qn(name)}")
+            cursor.execute(f"DROP TABLE {qn(name)}")
+    return path, count
+
+
+def archive_rows(month, archive_dir):
+    """То же для несекционированной таблицы (sqlite): строки месяца в архив и удаление из таблицы."""
+    path = Path(archive_dir) / f"{partition_name(month)}.jsonl.gz"
+    rows = TaskLog.objects.filter(timestamp__gte=month, timestamp__lt=add_months(month, 1)).order_by("id")
+    columns = [field.attname for field in TaskLog._meta.concrete_fields]
+    with transaction.atomic():
+        count = write_jsonl(path, columns, rows.values_list(*columns).iterator(chunk_size=2000))
+        rows.delete()
+    return path, count
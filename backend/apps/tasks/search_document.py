@@ -1,11 +1,42 @@
 from django.db import models
+from django.db.models import Prefetch
 from django_elasticsearch_dsl import Document, Index, fields
 from django_elasticsearch_dsl.registries import registry
 
 from .models import Task, TaskStatus, TaskType, Label, User, Workspace, TaskComment, TaskChecklistItem
-
-task_index = Index("tasks")
-task_index.settings(number_of_shards=1, number_of_replicas=0)
+from .search_routing import TASK_INDEX, all_task_indices, index_for_workspace, index_setting, routing_enabled
+
+task_index = Index(TASK_INDEX)
+task_index.settings(number_of_shards=index_setting("SHARDS"), number_of_replicas=index_setting("REPLICAS"))
+
+# Painless-скрипты для правки денормализованных полей задач на месте (update_by_query)
+RELATED_UPDATE_SCRIPTS = {
+    "workspace": "ctx._source.workspace.name = params.name",
+    "status": "ctx._source.status = params.status; ctx._source.is_closed = params.status.is_closed",
+    "status_deleted": "ctx._source.status = null; ctx._source.is_closed = false",
+    "task_type": "ctx._source.task_type = params.task_type",
+    "task_type_deleted": "ctx._source.task_type = null",
+    "label": (
+        "for (def label : ctx._source.labels) {"
+        " if (label.id == params.id) { label.name = params.name; label.color = params.color } }"
+    ),
+    "label_deleted": "ctx._source.labels.removeIf(label -> label.id == params.id)",
+    "user": (
+        "for (def field : ['creator', 'assignee']) { def user = ctx._source[field];"
+        " if (user != null && user.id == params.id) { user.email = params.email; user.fio = params.fio } }"
+        " for (def user : ctx._source.watchers) {"
+        " if (user.id == params.id) { user.email = params.email; user.fio = params.fio } }"
+        " for (def comment : ctx._source.comments) {"
+        " if (comment.author != null && comment.author.id == params.id) { comment.author.fio = params.fio } }"
+    ),
+    "user_deleted": (
+        "for (def field : ['creator', 'assignee']) { def user = ctx._source[field];"
+        " if (user != null && user.id == params.id) { ctx._source[field] = null } }"
+        " ctx._source.watchers.removeIf(user -> user.id == params.id);"
+        " for (def comment : ctx._source.comments) {"
+        " if (comment.author != null && comment.author.id == params.id) { comment.author = null } }"
+    ),
+}
 
 
 @registry.register_document
@@ -13,7 +44,14 @@ task_index.settings(number_of_shards=1, number_of_replicas=0)
 class TaskDocument(Document):
     id = fields.IntegerField()
     title = fields.TextField(
-        analyzer="standard", fields={"keyword": fields.KeywordField(), "suggest": fields.CompletionField()}
+        analyzer="standard",
+        fields={
+            "keyword": fields.KeywordField(),
+            # Контекст берётся из workspace.id.keyword: путь категории должен вести на keyword-поле
+            "suggest": fields.CompletionField(
+                contexts=[{"name": "workspace", "type": "category", "path": "workspace.id.keyword"}]
+            ),
+        },
     )
     description = fields.TextField(analyzer="standard")
     created_at = fields.DateField()
@@ -26,7 +64,7 @@ class TaskDocument(Document):
 
     workspace = fields.ObjectField(
         properties={
-            "id": fields.IntegerField(),
+            "id": fields.IntegerField(fields={"keyword": fields.KeywordField()}),
             "name": fields.KeywordField(),
         }
     )
@@ -111,6 +149,60 @@ class TaskDocument(Document):
     class Django:
         model = Task
         related_models = [TaskStatus, TaskType, Label, User, Workspace, TaskComment, TaskChecklistItem]
+        queryset_pagination = 1000
+
+    def get_queryset(self):
+        """Все связи, которые читают prepare_*, подтягиваются заранее — без запросов на каждый документ."""
+        return (
+            super()
+            .get_queryset()
+            .select_related("workspace", "status", "task_type", "creator", "assignee", "parent_task")
+            .prefetch_related(
+                Prefetch("labels", queryset=Label.objects.only("id", "name", "color")),
+                Prefetch("watchers", queryset=User.objects.only("id", "email", "fio")),
+                Prefetch("comments", queryset=TaskComment.objects.select_related("author")),
+                Prefetch("checklist_items", queryset=TaskChecklistItem.objects.all()),
+            )
+        )
+
+    def get_indexing_queryset(self):
+        # prefetch_related работает с iterator() только при заданном chunk_size: по пачке запросов на чанк
+        return self.get_queryset().order_by("pk").iterator(chunk_size=self.django.queryset_pagination)
+
+    def _prepare_action(self, object_instance, action):
+        """Задача пишется в индекс своего пространства с routing по workspace_id (см. search_routing)."""
+        index, routing = index_for_workspace(object_instance.workspace_id)
+        prepared = {**super()._prepare_action(object_instance, action), "_index": index}
+        if routing is not None:
+            prepared["routing"] = routing
+        return prepared
+
+    def get_index_names(self):
+        return all_task_indices()
+
+    def get_missing_delete(self, pks):
+        """
+        Удаление задач, которых уже нет в БД. Пространство удалённой задачи неизвестно, а без
+        routing bulk-delete ищет документ не на том шарде, поэтому удаляем запросом по _id.
+        None — хватает обычного delete в bulk.
+        """
+        if not routing_enabled() and len(self.get_index_names()) == 1:
+            return None
+        return {"query": {"ids": {"values": [str(pk) for pk in pks]}}, "script": None}
+
+    def get_moved_delete(self, instance):
+        """
+        Задачу перенесли в другое пространство: старая копия осталась на прежнем шарде или в прежнем
+        индексе. Возвращает (индекс, update) для её удаления или None, если переноса нет.
+        """
+        loaded = getattr(instance, "_loaded_values", None) or {}
+        old_workspace_id = loaded.get("workspace_id")
+        if instance.pk is None or old_workspace_id in (None, instance.workspace_id):
+            return None
+        query = {
+            "bool": {"filter": [{"ids": {"values": [str(instance.pk)]}}, {"term": {"workspace.id": old_workspace_id}}]}
+        }
+        return index_for_workspace(old_workspace_id)[0], {"query": query, "script": None}
 
     def prepare_is_closed(self, instance: Task):
         """Вычисляемое поле: закрыта ли задача"""
@@ -173,6 +265,80 @@ class TaskDocument(Document):
             for item in instance.checklist_items.all()
         ]
 
+    def get_related_update(self, related_instance, deleted=False):
+        """
+        Запрос и скрипт для update_by_query, которые правят вложенные поля затронутых задач в индексе,
+        не перечитывая их из БД. script=None означает delete_by_query. None — изменение
+        распространяется обычной переиндексацией через get_instances_from_related.
+        """
+        if isinstance(related_instance, Workspace):
+            query = {"term": {"workspace.id": related_instance.id}}
+            if deleted:
+                return {"query": query, "script": None}
+            return {"query": query, "script": self._script("workspace", name=related_instance.name)}
+
+        if isinstance(related_instance, TaskStatus):
+            query = {"term": {"status.id": related_instance.id}}
+            if deleted:
+                return {"query": query, "script": self._script("status_deleted")}
+            status = {"id": related_instance.id, "name": related_instance.name, "is_closed": related_instance.is_closed}
+            return {"query": query, "script": self._script("status", status=status)}
+
+        if isinstance(related_instance, TaskType):
+            query = {"term": {"task_type.id": related_instance.id}}
+            if deleted:
+                return {"query": query, "script": self._script("task_type_deleted")}
+            task_type = {
+                "id": related_instance.id,
+                "name": related_instance.name,
+                "icon": related_instance.icon,
+                "color": related_instance.color,
+            }
+            return {"query": query, "script": self._script("task_type", task_type=task_type)}
+
+        if isinstance(related_instance, Label):
+            query = {"nested": {"path": "labels", "query": {"term": {"labels.id": related_instance.id}}}}
+            if deleted:
+                return {"query": query, "script": self._script("label_deleted", id=related_instance.id)}
+            return {
+                "query": query,
+                "script": self._script(
+                    "label", id=related_instance.id, name=related_instance.name, color=related_instance.color
+                ),
+            }
+
+        if isinstance(related_instance, User):
+            query = {
+                "bool": {
+                    "should": [
+                        {"term": {"creator.id": related_instance.id}},
+                        {"term": {"assignee.id": related_instance.id}},
+                        {"nested": {"path": "watchers", "query": {"term": {"watchers.id": related_instance.id}}}},
+                        {
+                            "nested": {
+                                "path": "comments",
+                                "query": {"term": {"comments.author.id": related_instance.id}},
+                            }
+                        },
+                    ],
+                    "minimum_should_match": 1,
+                }
+            }
+            if deleted:
+                return {"query": query, "script": self._script("user_deleted", id=related_instance.id)}
+            return {
+                "query": query,
+                "script": self._script(
+                    "user", id=related_instance.id, email=related_instance.email, fio=related_instance.fio
+                ),
+            }
+
+        return None
+
+    @staticmethod
+    def _script(script_name, /, **params):
+        return {"source": RELATED_UPDATE_SCRIPTS[script_name], "lang": "painless", "params": params}
+
     def get_instances_from_related(self, related_instance):
         if isinstance(related_instance, TaskStatus):
             return related_instance.tasks.all()
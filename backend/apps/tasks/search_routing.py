@@ -0,0 +1,75 @@
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+
+from apps.workspaces.membership import LocalLRUCache
+
+from .models import WorkspaceSearchIndex
+
+# Общий индекс задач (алиас, за которым reindex_tasks держит версионированный индекс)
+TASK_INDEX = "tasks"
+DEDICATED_INDEX = TASK_INDEX + "-ws-{workspace_id}"
+CACHE_KEY = "tasks:search:dedicated_indices"
+
+
+def index_setting(name):
+    return settings.TASK_SEARCH_INDEX[name]
+
+
+def routing_enabled():
+    # На одном шарде маршрутизация ничего не даёт, а документы без routing уже лежат по _id
+    return index_setting("SHARDS") > 1
+
+
+@cache
+def get_local_cache():
+    return LocalLRUCache(1, index_setting("LOCAL_TTL"))
+
+
+def get_dedicated_indices() -> dict:
+    """{workspace_id: имя индекса} для пространств с отдельным индексом. Таблица маленькая — кешируется целиком."""
+    local_cache = get_local_cache()
+    indices = local_cache.get(CACHE_KEY)
+    if indices is None:
+        indices = shared_cache.get(CACHE_KEY)
+        if indices is None:
+            indices = dict(WorkspaceSearchIndex.objects.values_list("workspace_id", "index_name"))
+            shared_cache.set(CACHE_KEY, indices, None)
+        local_cache.set(CACHE_KEY, indices)
+    return indices
+
+
+def invalidate_dedicated_indices():
+    # Другие процессы увидят изменение не позже чем через LOCAL_TTL секунд
+    shared_cache.delete(CACHE_KEY)
+    get_local_cache().clear()
+
+
+def index_for_workspace(workspace_id):
+    """(индекс, routing) для записи задачи пространства."""
+    dedicated = get_dedicated_indices().get(workspace_id)
+    if dedicated is not None:
+        # В своём индексе пространство распределяется по шардам по _id
+        return dedicated, None
+    return TASK_INDEX, str(workspace_id) if routing_enabled() else None
+
+
+def all_task_indices():
+    return [TASK_INDEX, *sorted(get_dedicated_indices().values())]
+
+
+def search_target(workspace_ids=None):
+    """
+    (индексы, routing) для поиска по пространствам workspace_ids; None — по всем.
+    Пространства общего индекса сужают поиск до своих шардов через routing. Если в выборку
+    попал отдельный индекс, routing не передаётся: в запросе он общий для всех индексов.
+    """
+    if workspace_ids is None:
+        return all_task_indices(), None
+    dedicated = get_dedicated_indices()
+    shared_ids = sorted(workspace_id for workspace_id in workspace_ids if workspace_id not in dedicated)
+    indices = sorted({dedicated[workspace_id] for workspace_id in workspace_ids if workspace_id in dedicated})
+    if not indices:
+        return [TASK_INDEX], ",".join(map(str, shared_ids)) if shared_ids and routing_enabled() else None
+    return ([TASK_INDEX] if shared_ids else []) + indices, None
@@ -0,0 +1,66 @@
+from functools import cache
+from typing import NamedTuple
+
+from django.core.exceptions import FieldDoesNotExist
+from rest_framework import serializers
+
+
+class EagerLoadingPlan(NamedTuple):
+    select_related: tuple[str, ...]
+    prefetch_related: tuple[str, ...]
+
+
+def _is_single_valued_path(model, path: str) -> bool:
+    """Путь можно подтянуть через JOIN, если каждый шаг — прямой FK/OneToOne."""
+    for name in path.split("__"):
+        try:
+            field = model._meta.get_field(name)
+        except FieldDoesNotExist:
+            return False
+        if not field.is_relation or field.many_to_many or field.one_to_many:
+            return False
+        if field.auto_created and not field.concrete:
+            return False
+        model = field.related_model
+    return True
+
+
+def _collect(serializer, model, prefix, select, prefetch, in_prefetch):
+    for field in serializer.fields.values():
+        if field.write_only or field.source == "*":
+            continue
+
+        nested = field.child if isinstance(field, serializers.ListSerializer) else field
+        if not isinstance(nested, serializers.ModelSerializer):
+            continue
+
+        path = prefix + field.source.replace(".", "__")
+        if not in_prefetch and _is_single_valued_path(model, field.source.replace(".", "__")):
+            select.add(path)
+            _collect(nested, nested.Meta.model, f"{path}__", select, prefetch, in_prefetch=False)
+        else:
+            prefetch.add(path)
+            _collect(nested, nested.Meta.model, f"{path}__", select, prefetch, in_prefetch=True)
+
+    # Пути, которые читаются из SerializerMethodField и не видны при обходе полей
+    for path in getattr(serializer.Meta, "eager_loading_hints", ()):
+        full_path = prefix + path
+        if not in_prefetch and _is_single_valued_path(model, path):
+            select.add(full_path)
+        else:
+            prefetch.add(full_path)
+
+
+@cache
+def get_eager_loading_plan(serializer_class) -> EagerLoadingPlan:
+    select, prefetch = set(), set()
+    _collect(serializer_class(), serializer_class.Meta.model, "", select, prefetch, in_prefetch=False)
+
+    # select_related("a__b") уже покрывает "a"
+    select = {path for path in select if not any(other.startswith(f"{path}__") for other in select)}
+    return EagerLoadingPlan(tuple(sorted(select)), tuple(sorted(prefetch)))
+
+
+def eager_load(queryset, serializer_class):
+    plan = get_eager_loading_plan(serializer_class)
+    return queryset.select_related(*plan.select_related).prefetch_related(*plan.prefetch_related)
@@ -1,9 +1,90 @@
-from django.db.models import Case, When
-from elasticsearch.dsl import Q, Search
+from elasticsearch.dsl import A, Q, Search
 
+from apps.tasks.search_routing import search_target
 
-def task_search(queryset, search_query, filters):
-    s = Search(index="tasks").extra(size=1000)
+# Глубже from + size Elasticsearch не отдаёт (index.max_result_window)
+MAX_RESULT_WINDOW = 10_000
+
+# Фасеты доски: поле terms-агрегации и путь nested-документа, если поле вложенное
+FACETS = {
+    "status": {"field": "status.id"},
+    "priority": {"field": "priority"},
+    "assignee": {"field": "assignee.id"},
+    "task_type": {"field": "task_type.id"},
+    "is_closed": {"field": "is_closed"},
+    "labels": {"field": "labels.id", "path": "labels"},
+}
+FACET_SIZE = 50
+DATE_HISTOGRAMS = {"due_date": "month", "created_at": "month"}
+
+
+def build_facet_filters(filters):
+    """Фильтры по полям фасетов: при фасетном поиске они уходят в post_filter, а не в query."""
+    facet_filters = {}
+    if filters.get("status"):
+        facet_filters["status"] = Q("term", status__id=filters["status"])
+    if filters.get("priority"):
+        facet_filters["priority"] = Q("terms", priority=filters["priority"])
+    if filters.get("assignee"):
+        facet_filters["assignee"] = Q("term", assignee__id=filters["assignee"])
+    if filters.get("task_type"):
+        facet_filters["task_type"] = Q("term", task_type__id=filters["task_type"])
+    if filters.get("is_closed"):
+        facet_filters["is_closed"] = Q("term", is_closed=filters["is_closed"])
+    if filters.get("labels"):
+        # labels — nested-поле: без nested-запроса terms по labels.id ничего не находит
+        facet_filters["labels"] = Q("nested", path="labels", query=Q("terms", labels__id=filters["labels"]))
+    return facet_filters
+
+
+def build_facet_aggs(filters):
+    """
+    Агрегации фасетов с семантикой post_filter: счётчики каждого фасета учитывают выбор во всех
+    остальных фасетах, но не в нём самом — иначе по выбранному статусу остался бы один вариант.
+    """
+    facet_filters = build_facet_filters(filters)
+    aggs = {}
+    for name, facet in FACETS.items():
+        others = [query for other, query in facet_filters.items() if other != name]
+        values = A("terms", field=facet["field"], size=FACET_SIZE)
+        if "path" in facet:
+            values = A("nested", path=facet["path"], aggs={"values": values})
+        aggs[name] = A("filter", filter=Q("bool", filter=others), aggs={"values": values})
+    for field, interval in DATE_HISTOGRAMS.items():
+        histogram = A("date_histogram", field=field, calendar_interval=interval, format="yyyy-MM-dd", min_doc_count=1)
+        aggs[field] = A("filter", filter=Q("bool", filter=list(facet_filters.values())), aggs={"values": histogram})
+    return aggs
+
+
+def parse_facets(aggregations):
+    facets = {}
+    for name, agg in aggregations.items():
+        while "buckets" not in agg:
+            agg = agg["values"]
+        if name == "is_closed":
+            facets[name] = [{"value": bool(bucket["key"]), "count": bucket["doc_count"]} for bucket in agg["buckets"]]
+        else:
+            facets[name] = [
+                {"value": bucket.get("key_as_string", bucket["key"]), "count": bucket["doc_count"]}
+                for bucket in agg["buckets"]
+            ]
+    return facets
+
+
+def routed_search(workspace_ids=None) -> Search:
+    """Search только по индексам и шардам, где лежат задачи пространств workspace_ids."""
+    indices, routing = search_target(workspace_ids)
+    s = Search(index=indices)
+    return s.params(routing=routing) if routing else s
+
+
+def build_task_search(search_query, filters, workspace_ids=None, facets=False) -> Search:
+    target_ids = workspace_ids
+    if filters.get("workspace") and str(filters["workspace"]).isdigit():
+        target_ids = {int(filters["workspace"])}
+        if workspace_ids is not None:
+            target_ids &= set(workspace_ids)
+    s = routed_search(target_ids)
 
     if search_query:
         s = s.query(
@@ -15,36 +96,101 @@ def task_search(queryset, search_query, filters):
             )
         )
 
-    if "workspace" in filters:
+    if workspace_ids is not None:
+        s = s.filter("terms", workspace__id=list(workspace_ids))
+
+    if filters.get("workspace"):
         s = s.filter("term", workspace__id=filters["workspace"])
 
-    if "status" in filters:
-        s = s.filter("term", status__id=filters["status"])
+    if filters.get("creator"):
+        s = s.filter("term", creator__id=filters["creator"])
 
-    if "priority" in filters:
-        s = s.filter("terms", priority=filters["priority"])
+    if filters.get("due_date_before"):
+        s = s.filter("range", due_date={"lte": filters["due_date_before"]})
 
-    if "assignee" in filters:
-        s = s.filter("term", assignee__id=filters["assignee"])
+    if filters.get("due_date_after"):
+        s = s.filter("range", due_date={"gte": filters["due_date_after"]})
 
-    if "creator" in filters:
-        s = s.filter("term", creator__id=filters["creator"])
+    facet_filters = build_facet_filters(filters)
+    if facets and facet_filters:
+        # post_filter сужает только выдачу, агрегации считаются по запросу без него
+        s = s.post_filter(Q("bool", filter=list(facet_filters.values())))
+    else:
+        for query in facet_filters.values():
+            s = s.filter(query)
 
-    if "is_closed" in filters:
-        s = s.filter("term", is_closed=filters["is_closed"])
+    # id как тай-брейкер, чтобы страницы с одинаковым score не перемешивались
+    return s.sort("_score", {"id": "asc"})
 
-    if "labels" in filters:
-        s = s.filter("terms", labels__id=filters["labels"])
 
-    if "due_date_before" in filters:
-        s = s.filter("range", due_date={"lte": filters["due_date_before"]})
+class TaskSearchResults:
+    """
+    Ленивая выдача поиска для пагинатора: срез уходит в Elasticsearch как from/size,
+    из БД поднимаются только задачи текущей страницы, порядок восстанавливается в Python.
+    """
 
-    if "due_date_after" in filters:
-        s = s.filter("range", due_date={"gte": filters["due_date_after"]})
+    def __init__(self, queryset, search: Search, aggs=None):
+        self._queryset = queryset
+        self._search = search
+        self._aggs = aggs or {}
+        self._count = None
+        self._aggregations = None
+
+    def count(self):
+        if self._count is None:
+            response = self._search.extra(size=0, track_total_hits=True).execute()
+            self._count = min(response.hits.total.value, MAX_RESULT_WINDOW)
+        return self._count
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, item):
+        if not isinstance(item, slice):
+            return self[item : item + 1][0]
+
+        start = item.start or 0
+        stop = min(item.stop if item.stop is not None else self.count(), MAX_RESULT_WINDOW)
+        if stop <= start:
+            return []
+
+        return self.fetch_page(start, stop)
+
+    def execute(self, search):
+        """Запрос страницы; агрегации фасетов едут в нём же, отдельного запроса за ними нет."""
+        for name, agg in self._aggs.items():
+            search.aggs[name] = agg
+        response = search.execute()
+        if self._aggs:
+            self._aggregations = response.aggregations.to_dict()
+        return response
+
+    def facets(self):
+        if self._aggregations is None:
+            # Страница не запрашивалась (пустая выдача или номер за пределами) — только агрегации
+            self.execute(self._search.extra(size=0))
+        return parse_facets(self._aggregations)
+
+    def fetch_page(self, start, stop):
+        response = self.execute(self._search[start:stop].source(False))
+        task_ids = [int(hit.meta.id) for hit in response]
+        tasks_by_id = self._queryset.in_bulk(task_ids)
+        return [tasks_by_id[task_id] for task_id in task_ids if task_id in tasks_by_id]
+
+
+class TaskIndexSearchResults(TaskSearchResults):
+    """Выдача прямо из _source документа, без обращения к БД."""
+
+    source_excludes = ["comments", "checklist_items"]
 
-    response = s.execute()
+    def fetch_page(self, start, stop):
+        response = self.execute(self._search[start:stop].source(excludes=self.source_excludes).extra(version=True))
+        return [{**hit.to_dict(), "index_version": hit.meta.version} for hit in response]
 
-    task_ids = [hit.id for hit in response]
 
-    preserved_order = Case(*[When(id=id, then=pos) for pos, id in enumerate(task_ids)])  # noqa: A001
-    return queryset.filter(id__in=task_ids).order_by(preserved_order)
+def task_search(
+    queryset, search_query, filters, workspace_ids=None, from_index=False, facets=False
+) -> TaskSearchResults:
+    results_class = TaskIndexSearchResults if from_index else TaskSearchResults
+    search = build_task_search(search_query, filters, workspace_ids, facets=facets)
+    return results_class(queryset, search, aggs=build_facet_aggs(filters) if facets else None)
@@ -0,0 +1,88 @@
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from elasticsearch.dsl import Search
+
+from apps.tasks.selectors.search import routed_search
+from apps.workspaces.membership import LocalLRUCache
+
+LATEST_REQUEST_KEY = "tasks:suggest:latest:{user_id}:{client}"
+SUGGEST_SOURCE = ["id", "title", "workspace.id", "status.name", "is_closed"]
+
+
+def suggest_setting(name):
+    return settings.TASK_SUGGEST[name]
+
+
+@cache
+def get_local_cache():
+    return LocalLRUCache(suggest_setting("CACHE_MAXSIZE"), suggest_setting("CACHE_TTL"))
+
+
+def normalize_prefix(prefix):
+    # Анализатор completion-поля приводит к нижнему регистру — "Fix" и "fix " дают одну выдачу
+    return " ".join(prefix.split()).lower()[: suggest_setting("MAX_PREFIX_LENGTH")]
+
+
+def build_title_suggest(prefix, workspace_ids, size) -> Search:
+    """Completion suggester по title.suggest: только FST префиксов, без поиска по инвертированному индексу."""
+    completion = {
+        "field": "title.suggest",
+        "size": size,
+        "contexts": {"workspace": [str(workspace_id) for workspace_id in sorted(workspace_ids)]},
+    }
+    search = routed_search(workspace_ids).extra(size=0).source(SUGGEST_SOURCE)
+    return search.suggest("titles", prefix, completion=completion)
+
+
+def title_suggestions(prefix, workspace_ids, size=None):
+    """
+    Первые size задач, чьё название начинается с prefix, в пространствах workspace_ids.
+    Возвращает (подсказки, взяты ли из кеша). Кеш процесса короткий (CACHE_TTL): при быстром
+    наборе и стирании одни и те же префиксы не уходят в Elasticsearch повторно.
+    """
+    size = min(size or suggest_setting("SIZE"), suggest_setting("MAX_SIZE"))
+    prefix = normalize_prefix(prefix)
+    if len(prefix) < suggest_setting("MIN_PREFIX_LENGTH") or not workspace_ids:
+        return [], False
+
+    key = (tuple(sorted(workspace_ids)), prefix, size)
+    local_cache = get_local_cache()
+    suggestions = local_cache.get(key)
+    if suggestions is not None:
+        return suggestions, True
+
+    response = build_title_suggest(prefix, workspace_ids, size).execute()
+    suggestions = []
+    for option in response.suggest.titles[0].options:
+        source = option.to_dict()["_source"]
+        suggestions.append(
+            {
+                "id": source["id"],
+                "title": source["title"],
+                "workspace": (source.get("workspace") or {}).get("id"),
+                "status": (source.get("status") or {}).get("name"),
+                "is_closed": source.get("is_closed", False),
+            }
+        )
+    local_cache.set(key, suggestions)
+    return suggestions, False
+
+
+def register_request(user_id, client, request_id):
+    """
+    Запоминает последний request_id клиента. False — пришёл более новый запрос,
+    и этот можно не выполнять: его ответ клиент всё равно отбросит.
+    """
+    key = LATEST_REQUEST_KEY.format(user_id=user_id, client=client)
+    latest = shared_cache.get(key)
+    if latest is not None and request_id < latest:
+        return False
+    shared_cache.set(key, request_id, suggest_setting("REQUEST_ID_TIMEOUT"))
+    return True
+
+
+def is_superseded(user_id, client, request_id):
+    latest = shared_cache.get(LATEST_REQUEST_KEY.format(user_id=user_id, client=client))
+    return latest is not None and request_id < latest
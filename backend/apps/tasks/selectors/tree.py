@@ -0,0 +1,141 @@
+from collections import defaultdict
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Count, Q
+
+from apps.tasks.models import Task, TaskChecklistItem
+
+TABLE = Task._meta.db_table
+
+# Путь от корня защищает от циклов parent_task: в PostgreSQL — массив id, в SQLite — строка ",1,5,"
+DESCENDANTS_SQL = {
+    "postgresql": f"""
+        WITH RECURSIVE tree (id, parent_id, depth, path) AS (
+            SELECT id, parent_task_id, 0, ARRAY[id] FROM {TABLE} WHERE id = %(root)s
+            UNION ALL
+            SELECT t.id, t.parent_task_id, tree.depth + 1, tree.path || t.id
+            FROM {TABLE} t JOIN tree ON t.parent_task_id = tree.id
+            WHERE tree.depth < %(max_depth)s AND t.workspace_id = %(workspace)s AND NOT t.id = ANY(tree.path)
+        )
+        SELECT id, parent_id, depth FROM tree ORDER BY depth, id LIMIT %(limit)s
+    """,
+    "sqlite": f"""
+        WITH RECURSIVE tree (id, parent_id, depth, path) AS (
+            SELECT id, parent_task_id, 0, ',' || id || ',' FROM {TABLE} WHERE id = %(root)s
+            UNION ALL
+            SELECT t.id, t.parent_task_id, tree.depth + 1, tree.path || t.id || ','
+            FROM {TABLE} t JOIN tree ON t.parent_task_id = tree.id
+            WHERE tree.depth < %(max_depth)s AND t.workspace_id = %(workspace)s
+                AND instr(tree.path, ',' || t.id || ',') = 0
+        )
+        SELECT id, parent_id, depth FROM tree ORDER BY depth, id LIMIT %(limit)s
+    """,
+}
+ANCESTORS_SQL = {
+    "postgresql": f"""
+        WITH RECURSIVE chain (id, parent_id, depth, path) AS (
+            SELECT id, parent_task_id, 0, ARRAY[id] FROM {TABLE} WHERE id = %(root)s
+            UNION ALL
+            SELECT t.id, t.parent_task_id, chain.depth + 1, chain.path || t.id
+            FROM {TABLE} t JOIN chain ON t.id = chain.parent_id
+            WHERE chain.depth < %(max_depth)s AND t.workspace_id = %(workspace)s AND NOT t.id = ANY(chain.path)
+        )
+        SELECT id, parent_id, depth FROM chain ORDER BY depth DESC
+    """,
+    "sqlite": f"""
+        WITH RECURSIVE chain (id, parent_id, depth, path) AS (
+            SELECT id, parent_task_id, 0, ',' || id || ',' FROM {TABLE} WHERE id = %(root)s
+            UNION ALL
+            SELECT t.id, t.parent_task_id, chain.depth + 1, chain.path || t.id || ','
+            FROM {TABLE} t JOIN chain ON t.id = chain.parent_id
+            WHERE chain.depth < %(max_depth)s AND t.workspace_id = %(workspace)s
+                AND instr(chain.path, ',' || t.id || ',') = 0
+        )
+        SELECT id, parent_id, depth FROM chain ORDER BY depth DESC
+    """,
+}
+NODE_FIELDS = ("id", "title", "status", "priority", "assignee", "estimated_time", "actual_time")
+
+
+def tree_setting(name):
+    return settings.TASK_TREE[name]
+
+
+def _fetch(queries, **params):
+    with connection.cursor() as cursor:
+        cursor.execute(queries[connection.vendor], params)
+        return cursor.fetchall()
+
+
+def _nodes(task_ids):
+    """Поля и чек-листы узлов двумя запросами на всё дерево."""
+    nodes = {row["id"]: row for row in Task.objects.filter(pk__in=task_ids).values(*NODE_FIELDS)}
+    checklists = (
+        TaskChecklistItem.objects.filter(task_id__in=task_ids)
+        .order_by()
+        .values("task_id")
+        .annotate(total=Count("id"), completed=Count("id", filter=Q(is_completed=True)))
+        .values_list("task_id", "total", "completed")
+    )
+    checklist = {task_id: (total, completed) for task_id, total, completed in checklists}
+    for task_id, node in nodes.items():
+        total, completed = checklist.get(task_id, (0, 0))
+        node["checklist"] = {"total": total, "completed": completed}
+    return nodes
+
+
+def _progress(total, completed):
+    return round(completed / total, 3) if total else None
+
+
+def task_subtree(task, max_depth=None, limit=None):
+    """
+    Поддерево задачи одним рекурсивным CTE, вложенными словарями. У каждого узла rollup —
+    суммы оценок, факта и пунктов чек-листа по нему и всем потомкам. Дерево обрезается
+    по глубине max_depth и числу узлов limit (в порядке обхода в ширину), truncated это отмечает.
+    """
+    max_depth = min(max_depth or tree_setting("MAX_DEPTH"), tree_setting("MAX_DEPTH"))
+    limit = min(limit or tree_setting("MAX_NODES"), tree_setting("MAX_NODES"))
+    rows = _fetch(DESCENDANTS_SQL, root=task.pk, workspace=task.workspace_id, max_depth=max_depth, limit=limit + 1)
+    truncated = len(rows) > limit
+    rows = rows[:limit]
+
+    nodes = _nodes([task_id for task_id, _, _ in rows])
+    children = defaultdict(list)
+    for task_id, parent_id, depth in rows:
+        nodes[task_id]["depth"] = depth
+        if depth:
+            children[parent_id].append(task_id)
+    # Узлы на предельной глубине могут иметь потомков — проверяем одним запросом
+    deepest = [task_id for task_id, _, depth in rows if depth == max_depth]
+    if deepest and Task.objects.filter(parent_task_id__in=deepest).exists():
+        truncated = True
+
+    # Снизу вверх: строки CTE упорядочены по глубине, поэтому дети считаются раньше родителей
+    for task_id, _, _ in reversed(rows):
+        node = nodes[task_id]
+        node["children"] = [nodes[child] for child in children[task_id]]
+        rollup = {
+            "estimated_time": node["estimated_time"] or 0,
+            "actual_time": node["actual_time"] or 0,
+            "checklist_total": node["checklist"]["total"],
+            "checklist_completed": node["checklist"]["completed"],
+        }
+        for child in node["children"]:
+            for key in rollup:
+                rollup[key] += child["rollup"][key]
+        rollup["checklist_progress"] = _progress(rollup["checklist_total"], rollup["checklist_completed"])
+        node["rollup"] = rollup
+        node["subtasks_count"] = len(node["children"]) + sum(child["subtasks_count"] for child in node["children"])
+
+    return {"root": nodes[task.pk], "count": len(rows), "truncated": truncated}
+
+
+def task_ancestors(task, max_depth=None):
+    """Цепочка родителей от корня иерархии до непосредственного родителя задачи."""
+    max_depth = min(max_depth or tree_setting("MAX_DEPTH"), tree_setting("MAX_DEPTH"))
+    rows = _fetch(ANCESTORS_SQL, root=task.pk, workspace=task.workspace_id, max_depth=max_depth)
+    ancestor_ids = [task_id for task_id, _, depth in rows if depth]
+    nodes = {row["id"]: row for row in Task.objects.filter(pk__in=ancestor_ids).values(*NODE_FIELDS)}
+    return [nodes[task_id] for task_id in ancestor_ids]
@@ -0,0 +1,44 @@
+from rest_framework import serializers
+
+from apps.tasks.models import Task
+
+MAX_BULK_ITEMS = 500
+
+
+class TaskBulkCreateSerializer(serializers.Serializer):
+    """
+    Элемент пакетного создания. Связи передаются id и проверяются пачкой в TaskBulkService,
+    поэтому здесь только валидация формата — без запросов к БД.
+    """
+
+    title = serializers.CharField(max_length=255)
+    description = serializers.CharField(required=False, allow_blank=True)
+    due_date = serializers.DateTimeField(required=False, allow_null=True)
+    priority = serializers.ChoiceField(choices=Task.PRIORITY_CHOICES, required=False)
+    estimated_time = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+    actual_time = serializers.IntegerField(min_value=0, required=False, allow_null=True)
+
+    workspace = serializers.IntegerField()
+    status = serializers.IntegerField(required=False, allow_null=True)
+    task_type = serializers.IntegerField(required=False, allow_null=True)
+    assignee = serializers.IntegerField(required=False, allow_null=True)
+    parent_task = serializers.IntegerField(required=False, allow_null=True)
+    labels = serializers.ListField(child=serializers.IntegerField(), required=False)
+    watchers = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class TaskBulkUpdateSerializer(TaskBulkCreateSerializer):
+    id = serializers.IntegerField()
+    title = serializers.CharField(max_length=255, required=False)
+    workspace = None
+    # labels заменяет набор меток целиком, add_labels / remove_labels меняют его точечно
+    add_labels = serializers.ListField(child=serializers.IntegerField(), required=False)
+    remove_labels = serializers.ListField(child=serializers.IntegerField(), required=False)
+
+
+class TaskBulkRequestSerializer(serializers.Serializer):
+    items = serializers.ListField(child=serializers.DictField(), allow_empty=False, max_length=MAX_BULK_ITEMS)
+
+
+class TaskBulkDeleteSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), allow_empty=False, max_length=MAX_BULK_ITEMS)
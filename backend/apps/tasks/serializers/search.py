@@ -0,0 +1,27 @@
+from rest_framework import serializers
+
+
+class TaskIndexSerializer(serializers.Serializer):
+    """Задача в том виде, в каком она лежит в индексе tasks (см. TaskDocument)."""
+
+    id = serializers.IntegerField(read_only=True)
+    title = serializers.CharField(read_only=True)
+    description = serializers.CharField(read_only=True)
+    created_at = serializers.CharField(read_only=True)
+    updated_at = serializers.CharField(read_only=True)
+    due_date = serializers.CharField(read_only=True, default=None)
+    priority = serializers.CharField(read_only=True)
+    estimated_time = serializers.IntegerField(read_only=True, default=None)
+    actual_time = serializers.IntegerField(read_only=True, default=None)
+    is_closed = serializers.BooleanField(read_only=True)
+
+    workspace = serializers.DictField(read_only=True, default=None)
+    status = serializers.DictField(read_only=True, default=None)
+    task_type = serializers.DictField(read_only=True, default=None)
+    creator = serializers.DictField(read_only=True, default=None)
+    assignee = serializers.DictField(read_only=True, default=None)
+    parent_task = serializers.DictField(read_only=True, default=None)
+    labels = serializers.ListField(child=serializers.DictField(), read_only=True, default=list)
+    watchers = serializers.ListField(child=serializers.DictField(), read_only=True, default=list)
+
+    index_version = serializers.IntegerField(read_only=True)
@@ -10,6 +10,7 @@ from apps.tasks.models import (
     TaskChecklistItem,
     TaskLog,
 )
+from apps.tasks.graph import blocking_edge, get_dependency_graph
 from apps.users.serializers.manage import UserSerializer
 from apps.workspaces.serializers.workspace import WorkspaceSerializer
 
@@ -55,6 +56,7 @@ class TaskSerializer(serializers.ModelSerializer):
             "watchers": {"write_only": True},
             "parent_task": {"write_only": True},
         }
+        eager_loading_hints = ("parent_task__status",)
 
     def get_parent_task_details(self, obj):
         if obj.parent_task:
@@ -92,6 +94,15 @@ class TaskDependencySerializer(serializers.ModelSerializer):
         # Проверка, что задачи в одном workspace
         if data["from_task"].workspace != data["to_task"].workspace:
             raise serializers.ValidationError("Tasks must be in the same workspace")
+        if data["from_task"] == data["to_task"]:
+            raise serializers.ValidationError("A task cannot depend on itself")
+        edge = blocking_edge(data["from_task"].pk, data["to_task"].pk, data["dependency_type"])
+        if edge is not None:
+            current = self.instance and blocking_edge(
+                self.instance.from_task_id, self.instance.to_task_id, self.instance.dependency_type
+            )
+            if get_dependency_graph(data["from_task"].workspace_id).creates_cycle(*edge, ignore=current):
+                raise serializers.ValidationError("This dependency would create a cycle")
         return data
 
 
@@ -0,0 +1,183 @@
+from collections import defaultdict
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from apps.indexing.queue import make_key
+from apps.indexing.tasks import enqueue_index
+from apps.live.events import publish_tasks
+from apps.tasks.audit import log_created, log_updated
+from apps.tasks.counters import count_created, recount
+from apps.tasks.models import Label, Task, TaskStatus, TaskType
+from apps.tasks.selectors.users import filter_by_user_workspaces, get_user_workspace_ids
+from apps.tasks.serializers.bulk import TaskBulkCreateSerializer, TaskBulkUpdateSerializer
+from apps.users.models import User
+
+SCALAR_FIELDS = ("title", "description", "due_date", "priority", "estimated_time", "actual_time")
+FOREIGN_KEYS = {"status": TaskStatus, "task_type": TaskType, "assignee": User, "parent_task": Task}
+MANY_TO_MANY = {"labels": Label, "add_labels": Label, "remove_labels": Label, "watchers": User}
+
+NO_ACCESS = "You do not have access to this workspace."
+
+
+class _References:
+    """Объекты, на которые ссылается пачка: по одному запросу на модель, а не на элемент."""
+
+    def __init__(self, items):
+        ids = defaultdict(set)
+        for data in items:
+            for field, model in FOREIGN_KEYS.items():
+                if data.get(field) is not None:
+                    ids[model].add(data[field])
+            for field, model in MANY_TO_MANY.items():
+                ids[model].update(data.get(field, ()))
+        self.objects = {model: model.objects.in_bulk(pks) for model, pks in ids.items()}
+
+    def check(self, data, workspace_id):
+        errors = {}
+        for field, model in FOREIGN_KEYS.items():
+            pk = data.get(field)
+            if pk is not None:
+                error = self._check_one(model, pk, workspace_id)
+                if error:
+                    errors[field] = [error]
+        for field, model in MANY_TO_MANY.items():
+            field_errors = [error for pk in data.get(field, ()) if (error := self._check_one(model, pk, workspace_id))]
+            if field_errors:
+                errors[field] = field_errors
+        return errors
+
+    def _check_one(self, model, pk, workspace_id):
+        obj = self.objects[model].get(pk)
+        if obj is None:
+            return f"Invalid pk \"{pk}\" - object does not exist."
+        # Типы задач и пользователи общие, статусы, метки и родительские задачи — только из того же пространства
+        if getattr(obj, "workspace_id", workspace_id) != workspace_id:
+            return f"Object \"{pk}\" belongs to another workspace."
+        return None
+
+
+def _validate(items, serializer_class):
+    valid, errors = [], []
+    for index, item in enumerate(items):
+        serializer = serializer_class(data=item)
+        if serializer.is_valid():
+            valid.append((index, serializer.validated_data))
+        else:
+            errors.append({"index": index, "errors": serializer.errors})
+    return valid, errors
+
+
+def _through_rows(field, tasks_values):
+    through = getattr(Task, field).through
+    target = "label_id" if field == "labels" else "user_id"
+    return [through(task_id=task.pk, **{target: pk}) for task, pks in tasks_values for pk in pks]
+
+
+class TaskBulkService:
+    @staticmethod
+    def create(items, user):
+        valid, errors = _validate(items, TaskBulkCreateSerializer)
+        workspace_ids = get_user_workspace_ids(user)
+        references = _References([data for _, data in valid])
+
+        tasks, relations = [], defaultdict(list)
+        for index, data in valid:
+            workspace_id = data["workspace"]
+            item_errors = {"workspace": [NO_ACCESS]} if workspace_id not in workspace_ids else {}
+            item_errors = item_errors or references.check(data, workspace_id)
+            if item_errors:
+                errors.append({"index": index, "errors": item_errors})
+                continue
+
+            task = Task(
+                workspace_id=workspace_id,
+                creator=user,
+                **{field: data[field] for field in SCALAR_FIELDS if field in data},
+                **{f"{field}_id": data[field] for field in FOREIGN_KEYS if field in data},
+            )
+            tasks.append(task)
+            for field in ("labels", "watchers"):
+                if data.get(field):
+                    relations[field].append((task, data[field]))
+
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            for field, tasks_values in relations.items():
+                getattr(Task, field).through.objects.bulk_create(_through_rows(field, tasks_values))
+            # bulk_create не шлёт сигналы — журнал, счётчики, индексацию и ленту пишем сами, одной пачкой
+            log_created(tasks, user)
+            count_created(tasks)
+            enqueue_index(make_key(task) for task in tasks)
+            publish_tasks(tasks, "created")
+
+        return tasks, sorted(errors, key=lambda error: error["index"])
+
+    @staticmethod
+    def update(items, user):
+        valid, errors = _validate(items, TaskBulkUpdateSerializer)
+        tasks_by_id = filter_by_user_workspaces(Task, user).in_bulk([data["id"] for _, data in valid])
+        references = _References([data for _, data in valid])
+
+        updated, fields, seen = [], {"updated_at"}, set()
+        replaced, added, removed, relabeled = defaultdict(list), [], [], set()
+        now = timezone.now()
+        for index, data in valid:
+            task = tasks_by_id.get(data["id"])
+            if task is None or task.pk in seen:
+                message = "Not found." if task is None else "Duplicate task in batch."
+                errors.append({"index": index, "errors": {"id": [message]}})
+                continue
+            item_errors = references.check(data, task.workspace_id)
+            if item_errors:
+                errors.append({"index": index, "errors": item_errors})
+                continue
+
+            seen.add(task.pk)
+            for field in SCALAR_FIELDS:
+                if field in data:
+                    setattr(task, field, data[field])
+                    fields.add(field)
+            for field in FOREIGN_KEYS:
+                if field in data:
+                    setattr(task, f"{field}_id", data[field])
+                    fields.add(field)
+            task.updated_at = now
+            updated.append(task)
+
+            for field in ("labels", "watchers"):
+                if field in data:
+                    replaced[field].append((task, data[field]))
+            added.append((task, data.get("add_labels", ())))
+            if data.get("remove_labels"):
+                removed.append(Q(task_id=task.pk, label_id__in=data["remove_labels"]))
+            if "labels" in data or data.get("add_labels") or data.get("remove_labels"):
+                relabeled.add(task.pk)
+
+        with transaction.atomic(), recount(task.pk for task in updated):
+            Task.objects.bulk_update(updated, sorted(fields), batch_size=500)
+            log_updated(updated, user)
+            for field, tasks_values in replaced.items():
+                through = getattr(Task, field).through
+                through.objects.filter(task_id__in=[task.pk for task, _ in tasks_values]).delete()
+                through.objects.bulk_create(_through_rows(field, tasks_values))
+            Task.labels.through.objects.bulk_create(_through_rows("labels", added), ignore_conflicts=True)
+            if removed:
+                Task.labels.through.objects.filter(reduce(or_, removed)).delete()
+            enqueue_index(make_key(task) for task in updated)
+            publish_tasks(updated, "updated", fields, relabeled)
+
+        return updated, sorted(errors, key=lambda error: error["index"])
+
+    @staticmethod
+    def delete(ids, user):
+        tasks = filter_by_user_workspaces(Task, user).filter(pk__in=ids)
+        found = set(tasks.values_list("pk", flat=True))
+        errors = [{"index": index, "errors": {"id": ["Not found."]}} for index, pk in enumerate(ids) if pk not in found]
+        # Удаление идёт через Collector: сигналы post_delete сами положат ключи в очередь индексации
+        with transaction.atomic(), recount(found):
+            tasks.delete()
+        return sorted(found), errors
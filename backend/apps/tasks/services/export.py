@@ -0,0 +1,180 @@
+import csv
+import io
+import json
+import zlib
+from collections import defaultdict
+from itertools import islice
+
+from django.core.serializers.json import DjangoJSONEncoder
+
+from apps.tasks.models import Label, Task, TaskStatus, TaskType
+from apps.users.models import User
+
+EXPORT_FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+CHUNK_SIZE = 2000
+
+TASK_FIELDS = (
+    "id",
+    "workspace_id",
+    "title",
+    "description",
+    "priority",
+    "status_id",
+    "task_type_id",
+    "assignee_id",
+    "creator_id",
+    "parent_task_id",
+    "due_date",
+    "estimated_time",
+    "actual_time",
+    "created_at",
+    "updated_at",
+)
+COLUMNS = (
+    "id",
+    "workspace",
+    "title",
+    "description",
+    "priority",
+    "status",
+    "is_closed",
+    "task_type",
+    "assignee",
+    "creator",
+    "parent_task",
+    "labels",
+    "watchers",
+    "due_date",
+    "estimated_time",
+    "actual_time",
+    "created_at",
+    "updated_at",
+)
+
+
+class _Lookup:
+    """
+    Имена связанных объектов, подгружаемые пачкой по отсутствующим id. Растёт с числом разных
+    статусов/меток/пользователей пространства, а не с числом выгружаемых задач.
+    """
+
+    def __init__(self, queryset, *fields):
+        self.queryset = queryset
+        self.fields = fields
+        self.values = {}
+
+    def load(self, ids):
+        missing = {pk for pk in ids if pk is not None and pk not in self.values}
+        if missing:
+            for pk, *values in self.queryset.filter(pk__in=missing).values_list("pk", *self.fields):
+                self.values[pk] = values[0] if len(values) == 1 else tuple(values)
+
+    def get(self, pk, default=None):
+        return self.values.get(pk, default)
+
+
+def _many_to_many(through, field, task_ids):
+    related = defaultdict(list)
+    rows = through.objects.filter(task_id__in=task_ids).order_by(field).values_list("task_id", field)
+    for task_id, related_id in rows:
+        related[task_id].append(related_id)
+    return related
+
+
+def iter_task_records(queryset, chunk_size=CHUNK_SIZE):
+    """
+    Задачи queryset в виде словарей COLUMNS. Строки идут серверным курсором (iterator), связи
+    разрешаются пачкой на chunk_size задач: два запроса по M2M и догрузка ещё не встреченных имён.
+    """
+    statuses = _Lookup(TaskStatus.objects.all(), "name", "is_closed")
+    task_types = _Lookup(TaskType.objects.all(), "name")
+    labels = _Lookup(Label.objects.all(), "name")
+    users = _Lookup(User.objects.all(), "email")
+
+    rows = queryset.order_by("pk").values_list(*TASK_FIELDS).iterator(chunk_size=chunk_size)
+    while chunk := [dict(zip(TASK_FIELDS, row, strict=True)) for row in islice(rows, chunk_size)]:
+        task_ids = [row["id"] for row in chunk]
+        task_labels = _many_to_many(Task.labels.through, "label_id", task_ids)
+        task_watchers = _many_to_many(Task.watchers.through, "user_id", task_ids)
+
+        statuses.load(row["status_id"] for row in chunk)
+        task_types.load(row["task_type_id"] for row in chunk)
+        labels.load(pk for ids in task_labels.values() for pk in ids)
+        users.load(
+            [row["assignee_id"] for row in chunk]
+            + [row["creator_id"] for row in chunk]
+            + [pk for ids in task_watchers.values() for pk in ids]
+        )
+
+        for row in chunk:
+            status_name, is_closed = statuses.get(row["status_id"], (None, False))
+            yield {
+                "id": row["id"],
+                "workspace": row["workspace_id"],
+                "title": row["title"],
+                "description": row["description"],
+                "priority": row["priority"],
+                "status": status_name,
+                "is_closed": is_closed,
+                "task_type": task_types.get(row["task_type_id"]),
+                "assignee": users.get(row["assignee_id"]),
+                "creator": users.get(row["creator_id"]),
+                "parent_task": row["parent_task_id"],
+                "labels": [labels.get(pk) for pk in task_labels[row["id"]]],
+                "watchers": [users.get(pk) for pk in task_watchers[row["id"]]],
+                "due_date": row["due_date"],
+                "estimated_time": row["estimated_time"],
+                "actual_time": row["actual_time"],
+                "created_at": row["created_at"],
+                "updated_at": row["updated_at"],
+            }
+
+
+def _batched(records, size):
+    records = iter(records)
+    while batch := list(islice(records, size)):
+        yield batch
+
+
+def render_csv(records, batch_size=500):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(COLUMNS)
+    for batch in _batched(records, batch_size):
+        for record in batch:
+            record = {
+                **record,
+                "labels": "|".join(filter(None, record["labels"])),
+                "watchers": "|".join(filter(None, record["watchers"])),
+            }
+            writer.writerow(
+                value.isoformat() if hasattr(value, "isoformat") else value
+                for value in (record[column] for column in COLUMNS)
+            )
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def render_ndjson(records, batch_size=500):
+    for batch in _batched(records, batch_size):
+        yield "".join(json.dumps(record, cls=DjangoJSONEncoder, ensure_ascii=False) + "\n" for record in batch)
+
+
+def render(records, export_format):
+    return {"csv": render_csv, "ndjson": render_ndjson}[export_format](records)
+
+
+def encode(chunks, compress=False):
+    """UTF-8, при compress — gzip на лету: в памяти только текущий кусок и окно компрессора."""
+    compressor = zlib.compressobj(wbits=zlib.MAX_WBITS | 16) if compress else None
+    for chunk in chunks:
+        data = chunk.encode("utf-8")
+        if compressor is not None:
+            data = compressor.compress(data)
+        if data:
+            yield data
+    if compressor is not None:
+        yield compressor.flush()
@@ -0,0 +1,22 @@
+import logging
+
+from celery import shared_task
+
+from apps.workspaces.models import Workspace
+
+from .counters import reconcile_counters
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def reconcile_task_counters(workspace_ids=None):
+    """Периодическая сверка счётчиков задач (CELERY_BEAT_SCHEDULE): по транзакции на пространство."""
+    if workspace_ids is None:
+        workspace_ids = Workspace.objects.order_by("pk").values_list("pk", flat=True).iterator()
+    drifted = 0
+    for workspace_id in workspace_ids:
+        drifted += bool(reconcile_counters(workspace_id))
+    if drifted:
+        logger.warning("Task counters reconciled: %s workspaces had drift", drifted)
+    return drifted
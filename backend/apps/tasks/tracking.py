@@ -0,0 +1,53 @@
+from datetime import date, datetime
+from functools import cache
+
+UNCHANGED = object()
+
+
+@cache
+def tracked_fields(model):
+    """Поля, изменения которых попадают в журнал: всё конкретное, кроме pk и автоматических дат."""
+    return tuple(
+        field
+        for field in model._meta.concrete_fields
+        if not field.primary_key and not getattr(field, "auto_now", False) and not getattr(field, "auto_now_add", False)
+    )
+
+
+def to_json(value):
+    if isinstance(value, datetime | date):
+        return value.isoformat()
+    if hasattr(value, "name") and hasattr(value, "url"):  # FieldFile
+        return value.name
+    return value
+
+
+class TrackedFieldsMixin:
+    """
+    Запоминает значения полей в момент загрузки из БД, чтобы посчитать diff при сохранении
+    без дополнительного SELECT. Запоминаются только загруженные поля (deferred пропускаются).
+    """
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_values = dict(zip(field_names, values, strict=True))
+        return instance
+
+    def snapshot_tracked_fields(self):
+        self._loaded_values = {field.attname: getattr(self, field.attname) for field in tracked_fields(type(self))}
+
+    def get_tracked_changes(self):
+        """{поле: [было, стало]} относительно снимка; None, если снимка нет (объект не из БД)."""
+        loaded = getattr(self, "_loaded_values", None)
+        if loaded is None:
+            return None
+        changes = {}
+        for field in tracked_fields(type(self)):
+            old = loaded.get(field.attname, UNCHANGED)
+            if old is UNCHANGED:
+                continue
+            new = getattr(self, field.attname)
+            if old != new:
+                changes[field.name] = [to_json(old), to_json(new)]
+        return changes
@@ -1,4 +1,8 @@
-from rest_framework import viewsets, permissions
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.utils.cache import patch_vary_headers
+from rest_framework import viewsets, permissions, status
+from rest_framework.exceptions import ValidationError
 from rest_framework.response import Response
 from rest_framework.decorators import action
 from django_filters.rest_framework import DjangoFilterBackend
@@ -13,11 +17,27 @@ from .models import (
     TaskChecklistItem,
     TaskLog,
 )
+from .pagination import (
+    TaskCursorPagination,
+    TaskCommentCursorPagination,
+    TaskAttachmentCursorPagination,
+    TaskChecklistItemCursorPagination,
+    TaskLogCursorPagination,
+    TaskDependencyCursorPagination,
+    TaskSearchPagination,
+)
+from .graph import get_dependency_graph
+from .selectors.eager_loading import eager_load
 from .selectors.search import task_search
+from .selectors.suggest import is_superseded, register_request, title_suggestions
+from .selectors.tree import task_ancestors, task_subtree
 from .selectors.users import (
+    get_user_workspace_ids,
     filter_by_user_workspaces,
     filter_by_user_workspace_and_related_field,
 )
+from .serializers.bulk import TaskBulkDeleteSerializer, TaskBulkRequestSerializer
+from .serializers.search import TaskIndexSerializer
 from .serializers.tasks import (
     TaskTypeSerializer,
     TaskStatusSerializer,
@@ -29,6 +49,8 @@ from .serializers.tasks import (
     TaskChecklistItemSerializer,
     TaskLogSerializer,
 )
+from .services.bulk import TaskBulkService
+from .services.export import EXPORT_FORMATS, encode, iter_task_records, render
 from .services.label import LabelService
 from .services.task_status import TaskStatusService
 
@@ -71,11 +93,16 @@ class LabelViewSet(viewsets.ModelViewSet):
 class TaskViewSet(viewsets.ModelViewSet):
     serializer_class = TaskSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskCursorPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["workspace", "status", "task_type", "assignee", "creator", "priority"]
+    eager_loading_actions = ("list", "retrieve", "search")
 
     def get_queryset(self):
-        return filter_by_user_workspaces(Task, self.request.user)
+        qs = filter_by_user_workspaces(Task, self.request.user)
+        if self.action in self.eager_loading_actions:
+            qs = eager_load(qs, self.get_serializer_class())
+        return qs
 
     @action(detail=True, methods=["post"])
     def add_watcher(self, request, pk=None):
@@ -89,9 +116,136 @@ class TaskViewSet(viewsets.ModelViewSet):
         task.watchers.remove(request.user)
         return Response({"status": "watcher removed"})
 
+    def task_briefs(self, task_ids):
+        """Краткие карточки задач в порядке task_ids одним запросом."""
+        rows = Task.objects.filter(pk__in=task_ids).values("id", "title", "status", "assignee", "estimated_time")
+        rows = {row["id"]: row for row in rows}
+        return [rows[task_id] for task_id in task_ids if task_id in rows]
+
+    @action(detail=True, methods=["get"])
+    def blockers(self, request, pk=None):
+        """Все задачи, от которых транзитивно зависит эта (блокирует/блокируется, без relates_to)."""
+        task = self.get_object()
+        blockers = get_dependency_graph(task.workspace_id).blockers(task.pk)
+        return Response({"task": task.pk, "blockers": self.task_briefs(sorted(blockers))})
+
+    @action(detail=True, methods=["get"])
+    def blocked(self, request, pk=None):
+        """Все задачи, транзитивно ждущие эту."""
+        task = self.get_object()
+        blocked = get_dependency_graph(task.workspace_id).blocked(task.pk)
+        return Response({"task": task.pk, "blocked": self.task_briefs(sorted(blocked))})
+
+    @action(detail=True, methods=["get"])
+    def critical_path(self, request, pk=None):
+        """Самая длинная по estimated_time цепочка блокирующих задач, которая заканчивается этой."""
+        task = self.get_object()
+        graph = get_dependency_graph(task.workspace_id)
+        candidates = [task.pk, *graph.blockers(task.pk)]
+        weights = dict(Task.objects.filter(pk__in=candidates).values_list("pk", "estimated_time"))
+        path, total = graph.critical_path(weights, task.pk)
+        return Response({"task": task.pk, "estimated_time": total, "path": self.task_briefs(path)})
+
+    @action(detail=False, methods=["get"])
+    def dependency_order(self, request):
+        """
+        Порядок выполнения задач пространства (?workspace=) по блокировкам и его критический путь.
+        cyclic — задачи в циклах или за ними, если такие остались от данных до проверки циклов.
+        """
+        try:
+            workspace_id = int(request.query_params.get("workspace", ""))
+        except ValueError:
+            raise ValidationError({"workspace": ["This query parameter is required."]}) from None
+        if workspace_id not in get_user_workspace_ids(request.user):
+            raise Http404
+        graph = get_dependency_graph(workspace_id)
+        order, cyclic = graph.topological_order()
+        weights = dict(Task.objects.filter(pk__in=order).values_list("pk", "estimated_time"))
+        path, total = graph.critical_path(weights)
+        return Response(
+            {
+                "workspace": workspace_id,
+                "order": order,
+                "cyclic": cyclic,
+                "critical_path": {"estimated_time": total, "path": self.task_briefs(path)},
+            }
+        )
+
+    @action(detail=True, methods=["get"])
+    def tree(self, request, pk=None):
+        """
+        Поддерево подзадач (?direction=ancestors — цепочка родителей) одним рекурсивным запросом.
+        ?max_depth= и ?limit= ограничены TASK_TREE; у узлов rollup по оценкам, факту и чек-листам.
+        """
+        task = self.get_object()
+        params = {}
+        for name in ("max_depth", "limit"):
+            value = request.query_params.get(name)
+            if value is not None:
+                if not value.isdigit() or int(value) < 1:
+                    raise ValidationError({name: ["A positive integer is required."]})
+                params[name] = int(value)
+        if request.query_params.get("direction") == "ancestors":
+            ancestors = task_ancestors(task, max_depth=params.get("max_depth"))
+            return Response({"task": task.pk, "ancestors": ancestors})
+        return Response(task_subtree(task, **params))
+
+    def bulk_response(self, tasks, errors, success_status=status.HTTP_200_OK):
+        queryset = eager_load(Task.objects.filter(pk__in=[task.pk for task in tasks]), self.get_serializer_class())
+        data = {"results": self.get_serializer(queryset.order_by("pk"), many=True).data, "errors": errors}
+        return Response(data, status=success_status if tasks or not errors else status.HTTP_400_BAD_REQUEST)
+
+    @action(detail=False, methods=["post"])
+    def bulk_create(self, request):
+        payload = TaskBulkRequestSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        tasks, errors = TaskBulkService.create(payload.validated_data["items"], request.user)
+        return self.bulk_response(tasks, errors, success_status=status.HTTP_201_CREATED)
+
+    @action(detail=False, methods=["patch"])
+    def bulk_update(self, request):
+        payload = TaskBulkRequestSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        tasks, errors = TaskBulkService.update(payload.validated_data["items"], request.user)
+        return self.bulk_response(tasks, errors)
+
+    @action(detail=False, methods=["post"])
+    def bulk_delete(self, request):
+        payload = TaskBulkDeleteSerializer(data=request.data)
+        payload.is_valid(raise_exception=True)
+        deleted, errors = TaskBulkService.delete(payload.validated_data["ids"], request.user)
+        return Response(
+            {"deleted": deleted, "errors": errors},
+            status=status.HTTP_200_OK if deleted or not errors else status.HTTP_400_BAD_REQUEST,
+        )
+
+    @action(detail=False, methods=["get"])
+    def export(self, request):
+        """
+        Потоковая выгрузка задач в CSV или NDJSON (?file_format=) с теми же фильтрами, что и список.
+        Память не зависит от числа строк; gzip на лету, если клиент его принимает.
+        """
+        export_format = request.query_params.get("file_format", "csv")
+        if export_format not in EXPORT_FORMATS:
+            raise ValidationError({"file_format": [f"Choose one of: {', '.join(EXPORT_FORMATS)}."]})
+        compress = "gzip" in request.headers.get("Accept-Encoding", "")
+
+        records = iter_task_records(self.filter_queryset(self.get_queryset()))
+        response = StreamingHttpResponse(
+            encode(render(records, export_format), compress=compress),
+            content_type=f"{EXPORT_FORMATS[export_format]}; charset=utf-8",
+        )
+        filename = f"tasks-{timezone.now():%Y%m%d-%H%M%S}.{export_format}"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        if compress:
+            response["Content-Encoding"] = "gzip"
+        patch_vary_headers(response, ["Accept-Encoding"])
+        return response
+
     @action(detail=False, methods=["get"])
     def search(self, request):
         base_queryset = self.get_queryset()
+        from_index = request.GET.get("source") == "index"
 
         search_query = request.GET.get("q", "")
         filters = {
@@ -99,6 +253,7 @@ class TaskViewSet(viewsets.ModelViewSet):
             "status": request.GET.get("status"),
             "priority": request.GET.getlist("priority"),
             "assignee": request.GET.get("assignee"),
+            "task_type": request.GET.get("task_type"),
             "creator": request.GET.get("creator"),
             "is_closed": request.GET.get("is_closed"),
             "labels": request.GET.getlist("labels"),
@@ -106,20 +261,65 @@ class TaskViewSet(viewsets.ModelViewSet):
             "due_date_after": request.GET.get("due_date_after"),
         }
 
-        result_queryset = task_search(base_queryset, search_query, filters)
-
-        page = self.paginate_queryset(result_queryset)
-        if page is not None:
+        # ?facets=true — счётчики по статусам, приоритетам, исполнителям и т.д. тем же запросом, что и страница
+        facets = request.GET.get("facets") in ("1", "true")
+
+        workspace_ids = get_user_workspace_ids(request.user)
+        results = task_search(
+            base_queryset, search_query, filters, workspace_ids=workspace_ids, from_index=from_index, facets=facets
+        )
+
+        paginator = TaskSearchPagination()
+        page = paginator.paginate_queryset(results, request, view=self)
+        if from_index:
+            # Документы индекса обновляются асинхронно и могут отставать от БД
+            response = paginator.get_paginated_response(TaskIndexSerializer(page, many=True).data)
+            response.data["source"] = "index"
+            response.data["consistency"] = "eventual"
+        else:
             serializer = self.get_serializer(page, many=True)
-            return self.get_paginated_response(serializer.data)
+            response = paginator.get_paginated_response(serializer.data)
+        if facets:
+            response.data["facets"] = results.facets()
+        return response
 
-        serializer = self.get_serializer(result_queryset, many=True)
-        return Response(serializer.data)
+    @action(detail=False, methods=["get"])
+    def suggest(self, request):
+        """
+        Подсказки для быстрого поиска по началу названия (?q=, ?size=, ?workspace=) без обращения к БД.
+        ?request_id= — возрастающий номер запроса клиента (?client= различает вкладки): устаревший
+        запрос не выполняется и возвращается со stale=true, клиент может его отбросить.
+        """
+        params = {}
+        for name in ("size", "workspace", "request_id"):
+            value = request.query_params.get(name)
+            if value is not None:
+                if not value.isdigit():
+                    raise ValidationError({name: ["A non-negative integer is required."]})
+                params[name] = int(value)
+
+        request_id = params.get("request_id")
+        client = request.query_params.get("client", "")[:64]
+        data = {"request_id": request_id, "stale": False, "cached": False, "results": []}
+        if request_id is not None and not register_request(request.user.pk, client, request_id):
+            data["stale"] = True
+            return Response(data)
+
+        workspace_ids = get_user_workspace_ids(request.user)
+        if "workspace" in params:
+            workspace_ids = workspace_ids & {params["workspace"]}
+        data["results"], data["cached"] = title_suggestions(
+            request.query_params.get("q", ""), workspace_ids, size=params.get("size")
+        )
+        if request_id is not None:
+            data["stale"] = is_superseded(request.user.pk, client, request_id)
+        return Response(data)
 
 
 class TaskDependencyViewSet(viewsets.ModelViewSet):
     serializer_class = TaskDependencySerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskDependencyCursorPagination
 
     def get_queryset(self):
         user_tasks = filter_by_user_workspaces(Task, self.request.user)
@@ -129,6 +329,7 @@ class TaskDependencyViewSet(viewsets.ModelViewSet):
 class TaskCommentViewSet(viewsets.ModelViewSet):
     serializer_class = TaskCommentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskCommentCursorPagination
 
     def get_queryset(self):
         qs = filter_by_user_workspace_and_related_field(TaskComment, self.request.user, "task__workspace")
@@ -144,6 +345,7 @@ class TaskCommentViewSet(viewsets.ModelViewSet):
 class TaskAttachmentViewSet(viewsets.ModelViewSet):
     serializer_class = TaskAttachmentSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskAttachmentCursorPagination
 
     def get_queryset(self):
         qs = filter_by_user_workspace_and_related_field(TaskAttachment, self.request.user, "task__workspace")
@@ -159,6 +361,7 @@ class TaskAttachmentViewSet(viewsets.ModelViewSet):
 class TaskChecklistItemViewSet(viewsets.ModelViewSet):
     serializer_class = TaskChecklistItemSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskChecklistItemCursorPagination
 
     def get_queryset(self):
         qs = filter_by_user_workspace_and_related_field(TaskChecklistItem, self.request.user, "task__workspace")
@@ -171,11 +374,13 @@ class TaskChecklistItemViewSet(viewsets.ModelViewSet):
 class TaskLogViewSet(viewsets.ReadOnlyModelViewSet):
     serializer_class = TaskLogSerializer
     permission_classes = [permissions.IsAuthenticated]
+    pagination_class = TaskLogCursorPagination
     filter_backends = [DjangoFilterBackend]
     filterset_fields = ["task", "user", "action"]
 
     def get_queryset(self):
-        qs = filter_by_user_workspace_and_related_field(TaskLog, self.request.user, "task__workspace")
+        # workspace денормализован в TaskLog — без JOIN через Task
+        qs = filter_by_user_workspaces(TaskLog, self.request.user)
         task_id = self.kwargs.get("task_pk")
         if task_id:
             qs = qs.filter(task_id=task_id)
@@ -4,4 +4,7 @@ urlpatterns = [
     path('auth/', include('apps.users.urls')),
     path('workspaces/', include('apps.workspaces.urls')),
     path('tasks/', include('apps.tasks.urls')),
+    path('reports/', include('reports.urls')),
+    path('integration/', include('integration.urls')),
+    path('notifications/', include('notifications.urls')),
 ]
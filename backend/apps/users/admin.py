@@ -1,5 +1,6 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
+from django.db.models import Count
 from .models import User, Role, Permission, RolePermission
 
 
@@ -19,17 +20,27 @@ class RoleAdmin(admin.ModelAdmin):
     ordering = ["name"]
 
     def permissions_count(self, obj):
-        return obj.role_permissions.count()
+        return obj.permissions_total
 
     permissions_count.short_description = "Разрешений"
+    permissions_count.admin_order_field = "permissions_total"
 
     def users_count(self, obj):
-        return User.objects.filter(workspace_roles__role=obj).distinct().count()
+        return obj.users_total
 
     users_count.short_description = "Пользователей"
+    users_count.admin_order_field = "users_total"
 
     def get_queryset(self, request):
-        return super().get_queryset(request).prefetch_related("role_permissions")
+        # Оба числа считаются в запросе списка, а не COUNT на каждую строку
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                permissions_total=Count("role_permissions", distinct=True),
+                users_total=Count("user_workspace_roles__user", distinct=True),
+            )
+        )
 
 
 @admin.register(Permission)
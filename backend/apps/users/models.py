@@ -52,11 +52,9 @@ class User(AbstractUser, PermissionsMixin):
         ordering = ["email"]
 
     def has_perm_in_workspace(self, perm_code: str, workspace) -> bool:
-        roles = self.workspace_roles.filter(workspace=workspace).select_related("role")
-        for user_role in roles:
-            if user_role.role.role_permissions.filter(permission__code=perm_code).exists():
-                return True
-        return False
+        from .permission_matrix import get_workspace_permissions
+
+        return perm_code in get_workspace_permissions(self, workspace)
 
 
 class Role(models.Model):
@@ -0,0 +1,100 @@
+from collections import defaultdict
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+
+from apps.workspaces.membership import LocalLRUCache
+
+VERSION_KEY = "users:permissions:version"
+USER_VERSION_KEY = "users:permissions:version:{user_id}"
+MATRIX_KEY = "users:permissions:{version}:{user_version}:{user_id}"
+# Только в локальном кеше: пара версий пользователя
+LOCAL_VERSIONS_KEY = "users:permissions:versions:{user_id}"
+
+
+def matrix_setting(name):
+    return settings.PERMISSION_MATRIX_CACHE[name]
+
+
+@cache
+def get_local_cache():
+    return LocalLRUCache(matrix_setting("LOCAL_MAXSIZE"), matrix_setting("LOCAL_TTL"))
+
+
+@cache
+def get_version_cache():
+    return LocalLRUCache(matrix_setting("LOCAL_MAXSIZE"), matrix_setting("VERSION_TTL"))
+
+
+def build_permission_matrix(user_id) -> dict:
+    """{workspace_id: frozenset(кодов прав)} одним запросом по ролям пользователя."""
+    from apps.workspaces.models import UserWorkspaceRole
+
+    rows = UserWorkspaceRole.objects.filter(user_id=user_id).values_list(
+        "workspace_id", "role__role_permissions__permission__code"
+    )
+    matrix = defaultdict(set)
+    for workspace_id, code in rows:
+        if code is not None:
+            matrix[workspace_id].add(code)
+    return {workspace_id: frozenset(codes) for workspace_id, codes in matrix.items()}
+
+
+def get_versions(user_id) -> tuple:
+    """
+    (общая версия, версия пользователя). Держатся локально VERSION_TTL секунд, общий кеш читается
+    только при промахе — инвалидация из другого процесса доходит сюда с задержкой не больше VERSION_TTL.
+    """
+    local_key = LOCAL_VERSIONS_KEY.format(user_id=user_id)
+    version_cache = get_version_cache()
+    versions = version_cache.get(local_key)
+    if versions is None:
+        user_version_key = USER_VERSION_KEY.format(user_id=user_id)
+        shared = shared_cache.get_many([VERSION_KEY, user_version_key])
+        versions = (shared.get(VERSION_KEY, 0), shared.get(user_version_key, 0))
+        version_cache.set(local_key, versions)
+    return versions
+
+
+def get_permission_matrix(user) -> dict:
+    if not user.is_authenticated:
+        return {}
+
+    # Версии в ключе: после инвалидации старые записи просто перестают читаться, в том числе в других процессах
+    version, user_version = get_versions(user.pk)
+    key = MATRIX_KEY.format(version=version, user_version=user_version, user_id=user.pk)
+
+    local_cache = get_local_cache()
+    matrix = local_cache.get(key)
+    if matrix is None:
+        matrix = shared_cache.get(key)
+        if matrix is None:
+            matrix = build_permission_matrix(user.pk)
+            shared_cache.set(key, matrix, matrix_setting("TIMEOUT"))
+        local_cache.set(key, matrix)
+    return matrix
+
+
+def get_workspace_permissions(user, workspace) -> frozenset:
+    workspace_id = getattr(workspace, "pk", workspace)
+    return get_permission_matrix(user).get(workspace_id, frozenset())
+
+
+def _bump(key):
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        shared_cache.set(key, 1, None)
+
+
+def invalidate_permissions():
+    """Изменились роли или права — устаревают матрицы всех пользователей."""
+    _bump(VERSION_KEY)
+    get_version_cache().clear()
+
+
+def invalidate_user_permissions(*user_ids):
+    for user_id in user_ids:
+        _bump(USER_VERSION_KEY.format(user_id=user_id))
+        get_version_cache().delete(LOCAL_VERSIONS_KEY.format(user_id=user_id))
@@ -1,6 +1,9 @@
 from rest_framework import status
+from rest_framework.permissions import BasePermission
 from rest_framework.response import Response
 
+from .permission_matrix import get_workspace_permissions
+
 
 def permission_required(perm_code: str):
     def decorator(view_func):
@@ -19,3 +22,46 @@ def permission_required(perm_code: str):
         return _wrapped_view
 
     return decorator
+
+
+def get_object_workspace_id(obj):
+    if hasattr(obj, "workspace_id"):
+        return obj.workspace_id
+    task = getattr(obj, "task", None)
+    return task.workspace_id if task is not None else None
+
+
+class HasWorkspacePermission(BasePermission):
+    """
+    Проверка прав роли по матрице пользователя, без запросов к БД на прогретом кеше.
+    Вьюсет задаёт workspace_permissions = {action: код права}; действия вне словаря не проверяются.
+    Для объектов пространство берётся из obj, для остальных действий — из поля/параметра workspace.
+    """
+
+    message = "Нет прав для доступа"
+
+    def get_perm_code(self, view):
+        return getattr(view, "workspace_permissions", {}).get(view.action)
+
+    def has_permission(self, request, view):
+        perm_code = self.get_perm_code(view)
+        if perm_code is None:
+            return True
+        if not request.user.is_authenticated:
+            return False
+        if view.detail:
+            return True
+
+        data = request.data if isinstance(request.data, dict) else {}
+        workspace_id = data.get("workspace") or request.query_params.get("workspace")
+        try:
+            workspace_id = int(workspace_id)
+        except (TypeError, ValueError):
+            return False
+        return perm_code in get_workspace_permissions(request.user, workspace_id)
+
+    def has_object_permission(self, request, view, obj):
+        perm_code = self.get_perm_code(view)
+        if perm_code is None:
+            return True
+        return perm_code in get_workspace_permissions(request.user, get_object_workspace_id(obj))
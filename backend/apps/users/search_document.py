@@ -53,6 +53,14 @@ class UserDocument(Document):
         return [{"id": wid, "name": wname} for wid, wname in qs if wid and wname]
 
     def get_instances_from_related(self, related_instance):
-        if isinstance(related_instance, Role | Permission | RolePermission | Workspace):
+        if isinstance(related_instance, Role):
             return User.objects.filter(workspace_roles__role=related_instance).distinct()
+        if isinstance(related_instance, Permission):
+            return User.objects.filter(
+                workspace_roles__role__role_permissions__permission=related_instance
+            ).distinct()
+        if isinstance(related_instance, RolePermission):
+            return User.objects.filter(workspace_roles__role_id=related_instance.role_id).distinct()
+        if isinstance(related_instance, Workspace):
+            return User.objects.filter(workspace_roles__workspace=related_instance).distinct()
         return []
@@ -1,5 +1,7 @@
 from django.core.exceptions import ValidationError
 from ..models import User
+from apps.workspaces.membership import invalidate_user_workspaces
+from ..permission_matrix import invalidate_user_permissions
 from apps.workspaces.models import UserWorkspaceRole
 
 
@@ -21,5 +23,8 @@ def update_user_permissions(user: User, data: dict) -> User:
             UserWorkspaceRole(user=user, workspace_id=workspace_id, role_id=role_id)
             for role_id in data["role_ids"]
         ])
+        # bulk_create не шлёт post_save, сбрасываем кеш членства явно
+        invalidate_user_workspaces(user.pk)
+        invalidate_user_permissions(user.pk)
 
     return user
\ No newline at end of file
@@ -1,6 +1,16 @@
 from django.contrib import admin
+from django.db.models import Count, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+
 from .models import Workspace, UserWorkspaceRole
 from apps.tasks.admin import TaskStatusInline, LabelInline
+from apps.tasks.counters import tasks_count_subquery
+from apps.tasks.models import Label, TaskStatus
+
+
+def related_count(model):
+    rows = model.objects.filter(workspace=OuterRef("pk")).order_by().values("workspace").annotate(n=Count("pk"))
+    return Coalesce(Subquery(rows.values("n")), Value(0))
 
 
 class UserWorkspaceRoleInline(admin.TabularInline):
@@ -19,20 +29,35 @@ class WorkspaceAdmin(admin.ModelAdmin):
     inlines = [TaskStatusInline, LabelInline, UserWorkspaceRoleInline]  # Добавлен инлайн
     list_display = ("name", "statuses_count", "labels_count", "tasks_count")
 
+    def get_queryset(self, request):
+        # Подзапросы в самом списке вместо трёх COUNT на строку; задачи — из счётчиков
+        return (
+            super()
+            .get_queryset(request)
+            .annotate(
+                statuses_total=related_count(TaskStatus),
+                labels_total=related_count(Label),
+                tasks_total=tasks_count_subquery("total", outer_field="workspace"),
+            )
+        )
+
     def statuses_count(self, obj):
-        return obj.statuses.count()
+        return obj.statuses_total
 
     statuses_count.short_description = "Статусов"
+    statuses_count.admin_order_field = "statuses_total"
 
     def labels_count(self, obj):
-        return obj.labels.count()
+        return obj.labels_total
 
     labels_count.short_description = "Меток"
+    labels_count.admin_order_field = "labels_total"
 
     def tasks_count(self, obj):
-        return obj.tasks.count()
+        return obj.tasks_total
 
     tasks_count.short_description = "Задач"
+    tasks_count.admin_order_field = "tasks_total"
 
 
 @admin.register(UserWorkspaceRole)
@@ -5,3 +5,6 @@ class WorkspacesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "apps.workspaces"
     label = "workspaces"
+
+    def ready(self):
+        from . import signals  # noqa: F401
@@ -0,0 +1,94 @@
+import threading
+import time
+from collections import OrderedDict
+from functools import cache
+
+from django.conf import settings
+from django.core.cache import cache as shared_cache
+from django.db import transaction
+
+from .models import UserWorkspaceRole
+
+CACHE_KEY = "workspaces:membership:{user_id}"
+
+
+def membership_setting(name):
+    return settings.WORKSPACE_MEMBERSHIP_CACHE[name]
+
+
+class LocalLRUCache:
+    """
+    LRU в памяти процесса поверх общего кеша. Записи живут не дольше ttl секунд,
+    поэтому инвалидация из другого процесса доходит сюда с задержкой не больше ttl.
+    """
+
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires_at = item
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+
+@cache
+def get_local_cache():
+    return LocalLRUCache(membership_setting("LOCAL_MAXSIZE"), membership_setting("LOCAL_TTL"))
+
+
+def get_user_workspace_ids(user) -> frozenset:
+    """id пространств, в которых у пользователя есть хотя бы одна роль."""
+    if not user.is_authenticated:
+        return frozenset()
+
+    key = CACHE_KEY.format(user_id=user.pk)
+    local_cache = get_local_cache()
+    workspace_ids = local_cache.get(key)
+    if workspace_ids is None:
+        workspace_ids = shared_cache.get(key)
+        if workspace_ids is None:
+            workspace_ids = frozenset(
+                UserWorkspaceRole.objects.filter(user_id=user.pk).values_list("workspace_id", flat=True)
+            )
+            shared_cache.set(key, workspace_ids, membership_setting("TIMEOUT"))
+        local_cache.set(key, workspace_ids)
+    return workspace_ids
+
+
+def _drop(keys):
+    shared_cache.delete_many(keys)
+    local_cache = get_local_cache()
+    for key in keys:
+        local_cache.delete(key)
+
+
+def invalidate_user_workspaces(*user_ids):
+    keys = [CACHE_KEY.format(user_id=user_id) for user_id in user_ids]
+    _drop(keys)
+    # Параллельный запрос мог успеть закешировать состояние до коммита — сбрасываем ещё раз после него
+    transaction.on_commit(lambda: _drop(keys))
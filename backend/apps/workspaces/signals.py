@@ -0,0 +1,26 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from apps.users.permission_matrix import invalidate_user_permissions
+
+from .membership import invalidate_user_workspaces
+from .models import UserWorkspaceRole
+
+
+@receiver(pre_save, sender=UserWorkspaceRole)
+def invalidate_previous_member(sender, instance, **kwargs):
+    # Роль могли переназначить другому пользователю — прежний тоже теряет доступ
+    if instance.pk:
+        previous_user_id = (
+            UserWorkspaceRole.objects.filter(pk=instance.pk).values_list("user_id", flat=True).first()
+        )
+        if previous_user_id and previous_user_id != instance.user_id:
+            invalidate_user_workspaces(previous_user_id)
+            invalidate_user_permissions(previous_user_id)
+
+
+@receiver(post_save, sender=UserWorkspaceRole)
+@receiver(post_delete, sender=UserWorkspaceRole)
+def invalidate_member(sender, instance, **kwargs):
+    invalidate_user_workspaces(instance.user_id)
+    invalidate_user_permissions(instance.user_id)
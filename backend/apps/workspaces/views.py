@@ -1,5 +1,12 @@
+from django.http import Http404
 from rest_framework import viewsets
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+
+from apps.tasks.counters import get_workspace_stats
+
+from .membership import get_user_workspace_ids
 from .models import Workspace, UserWorkspaceRole
 from .serializers.workspace import WorkspaceSerializer, UserWorkspaceRoleSerializer
 
@@ -12,6 +19,14 @@ class WorkspaceViewSet(viewsets.ModelViewSet):
     def perform_create(self, serializer):
         serializer.save(created_by=self.request.user)
 
+    @action(detail=True, methods=["get"])
+    def stats(self, request, pk=None):
+        # Числа задач берутся из материализованных счётчиков, без COUNT по таблице задач
+        workspace = self.get_object()
+        if workspace.pk not in get_user_workspace_ids(request.user):
+            raise Http404
+        return Response(get_workspace_stats(workspace.pk))
+
 
 class UserWorkspaceRoleViewSet(viewsets.ModelViewSet):
     serializer_class = UserWorkspaceRoleSerializer
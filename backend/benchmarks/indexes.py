@@ -0,0 +1,86 @@
+"""
+Составные индексы под фильтры задач: планы EXPLAIN и задержка запросов без них и с ними.
+
+    cd backend && python -m benchmarks.indexes --workspaces 10 --tasks 2000
+"""
+
+import argparse
+import statistics
+import time
+from datetime import timedelta
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--workspaces", type=int, default=10)
+    parser.add_argument("--tasks", type=int, default=2000, help="Задач на пространство")
+    parser.add_argument("--repeat", type=int, default=30, help="Повторов запроса в раунде")
+    parser.add_argument("--rounds", type=int, default=3, help="Раундов без индексов / с индексами вперемешку")
+    args = parser.parse_args()
+
+    from benchmarks.utils import isolated_database, seed_workspace
+
+    from django.db import connection
+    from django.utils import timezone
+
+    from apps.tasks.models import Task, TaskChecklistItem, TaskComment
+    from apps.workspaces.models import UserWorkspaceRole
+
+    indexed_models = (Task, TaskComment, TaskChecklistItem)
+
+    def set_indexes(enabled):
+        with connection.schema_editor() as schema_editor:
+            for model in indexed_models:
+                for index in model._meta.indexes:
+                    if enabled:
+                        schema_editor.add_index(model, index)
+                    else:
+                        schema_editor.remove_index(model, index)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def timings(queryset):
+        result = []
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            list(queryset.all())
+            result.append((time.perf_counter() - started) * 1000)
+        return result
+
+    with isolated_database():
+        workspaces = [seed_workspace(args.tasks, seed=seed) for seed in range(args.workspaces)]
+        workspace = workspaces[0]
+        task = Task.objects.filter(workspace=workspace).first()
+        now = timezone.now()
+
+        queries = {
+            "task page in workspace": Task.objects.filter(workspace=workspace).order_by("-updated_at", "-id")[:50],
+            "tasks by workspace+status": Task.objects.filter(workspace=workspace, status=task.status_id),
+            "assignee due this week": Task.objects.filter(
+                assignee=task.assignee_id, due_date__gte=now, due_date__lt=now + timedelta(days=7)
+            ),
+            "checklist of task": TaskChecklistItem.objects.filter(task=task).order_by("order", "id"),
+            "comments of task": TaskComment.objects.filter(task=task).order_by("created_at", "id"),
+            "user memberships": UserWorkspaceRole.objects.filter(user=task.assignee_id).values_list("workspace_id"),
+        }
+
+        # Раунды чередуются, чтобы прогрев и шум машины не доставались только одной стороне
+        timings_by_state = {False: {}, True: {}}
+        plans = {False: {}, True: {}}
+        for _ in range(args.rounds):
+            for enabled in (False, True):
+                set_indexes(enabled)
+                for name, queryset in queries.items():
+                    plans[enabled][name] = " | ".join(line.strip() for line in queryset.explain().splitlines())
+                    timings_by_state[enabled].setdefault(name, []).extend(timings(queryset))
+
+    for name in queries:
+        before_ms = statistics.median(timings_by_state[False][name])
+        after_ms = statistics.median(timings_by_state[True][name])
+        print(f"{name}: {before_ms:.3f} ms -> {after_ms:.3f} ms ({before_ms / after_ms:.1f}x)")
+        print(f"    before: {plans[False][name]}")
+        print(f"    after:  {plans[True][name]}")
+
+
+if __name__ == "__main__":
+    main()
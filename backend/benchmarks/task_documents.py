@@ -0,0 +1,37 @@
+"""
+Сборка документов TaskDocument: наивный Task.objects.all() против get_indexing_queryset().
+
+    cd backend && python -m benchmarks.task_documents --tasks 5000
+"""
+
+import argparse
+
+from benchmarks.utils import isolated_database, measure, seed_workspace
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=2000)
+    args = parser.parse_args()
+
+    from apps.tasks.models import Task
+    from apps.tasks.search_document import TaskDocument
+
+    with isolated_database():
+        seed_workspace(args.tasks)
+        document = TaskDocument()
+        variants = {
+            "naive": lambda: [document.prepare(task) for task in Task.objects.all()],
+            "prefetched": lambda: [document.prepare(task) for task in document.get_indexing_queryset()],
+        }
+        for name, build in variants.items():
+            documents, queries, elapsed = measure(build)
+            print(
+                f"{name:>10}: {len(documents)} docs, {queries} queries "
+                f"({queries * 1000 / len(documents):.1f} per 1000 docs), "
+                f"{elapsed:.2f} s ({len(documents) / elapsed:.0f} docs/sec)"
+            )
+
+
+if __name__ == "__main__":
+    main()
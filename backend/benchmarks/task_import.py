@@ -0,0 +1,82 @@
+"""
+Пропускная способность импорта задач (integration.services.importer) без индексации в ES.
+
+    cd backend && python -m benchmarks.task_import --tasks 20000 --batch-size 1000 --min-rate 2000
+"""
+
+import argparse
+import json
+import random
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+
+def write_source(path, tasks_count, emails, seed=0):
+    """NDJSON с метками, наблюдателями, комментариями и ссылками вперёд: родитель и зависимости ещё не загружены."""
+    rnd = random.Random(seed)
+    with open(path, "w") as output:
+        for i in range(tasks_count):
+            record = {
+                "id": f"SRC-{i}",
+                "title": f"Imported task {i}",
+                "description": "Lorem ipsum " * 5,
+                "status": rnd.choice(["Open", "In progress", "Done"]),
+                "priority": rnd.choice(["low", "medium", "high", "critical"]),
+                "task_type": "Imported",
+                "assignee": rnd.choice(emails),
+                "creator": rnd.choice(emails),
+                "labels": rnd.sample([f"label-{n}" for n in range(10)], 2),
+                "watchers": rnd.sample(emails, 2),
+                "created_at": "2024-01-01T10:00:00+00:00",
+                "comments": [{"author": rnd.choice(emails), "content": "Imported comment"}],
+                "checklist": [{"text": f"Step {n}", "is_completed": n == 0} for n in range(2)],
+            }
+            if i + 1 < tasks_count and rnd.random() < 0.3:
+                record["parent"] = f"SRC-{rnd.randrange(i + 1, tasks_count)}"
+            if i + 1 < tasks_count and rnd.random() < 0.2:
+                record["dependencies"] = [{"type": "blocks", "to": f"SRC-{rnd.randrange(i + 1, tasks_count)}"}]
+            output.write(json.dumps(record) + "\n")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=20000)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--min-rate", type=float, default=0, help="Порог rows/sec, ниже — код выхода 1")
+    args = parser.parse_args()
+
+    from benchmarks.utils import isolated_database, measure, seed_workspace
+
+    from apps.tasks.models import Task, TaskDependency
+    from apps.users.models import User
+    from integration.models import ImportJob
+    from integration.services.importer import TaskImporter
+    from integration.services.readers import read_records
+
+    with isolated_database(), tempfile.TemporaryDirectory() as tmp:
+        workspace = seed_workspace(0)
+        emails = list(User.objects.values_list("email", flat=True))
+        source = Path(tmp) / "tasks.ndjson"
+        write_source(source, args.tasks, emails)
+
+        job = ImportJob.objects.create(workspace=workspace, source_format="ndjson")
+        importer = TaskImporter(job, checkpoint=Path(tmp) / "checkpoint.json", batch_size=args.batch_size, index=False)
+        started = time.perf_counter()
+        processed, queries, elapsed = measure(lambda: importer.run(read_records(source, "ndjson")))
+        rate = processed / elapsed
+
+        tasks = Task.objects.filter(workspace=workspace)
+        print(f"{processed} records in {elapsed:.2f} s ({time.perf_counter() - started:.2f} s wall), {queries} queries")
+        print(f"tasks: {tasks.count()}, with parent: {tasks.filter(parent_task__isnull=False).count()}, "
+              f"dependencies: {TaskDependency.objects.filter(from_task__workspace=workspace).count()}")
+        print(f"rate: {rate:.0f} rows/sec")
+
+    if rate < args.min_rate:
+        print(f"rate below --min-rate {args.min_rate:.0f}", file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+Накладные расходы журнала изменений TaskLog на запись задач.
+
+    cd backend && python -m benchmarks.task_log_capture --tasks 2000 --max-overhead 0.5
+
+Сохраняет каждую задачу в одной транзакции с журналом и без него; завершается с кодом 1,
+если относительная надбавка ко времени записи больше --max-overhead или журнал добавляет
+больше --max-queries запросов на 1000 сохранений. На in-memory sqlite сама запись дешёвая,
+поэтому относительная надбавка здесь заметно выше, чем на PostgreSQL.
+"""
+
+import argparse
+import sys
+
+from benchmarks.utils import isolated_database, measure, seed_workspace
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--tasks", type=int, default=2000)
+    parser.add_argument("--max-overhead", type=float, default=1.0, help="Допустимая доля, 1.0 = +100%%")
+    parser.add_argument("--max-queries", type=int, default=10, help="Допустимо лишних запросов на 1000 сохранений")
+    args = parser.parse_args()
+
+    from django.db import transaction
+
+    from apps.tasks.audit import connect_signals, disconnect_signals, task_log_batch
+    from apps.tasks.models import Task, TaskLog
+
+    def save_all(priority):
+        tasks = list(Task.objects.all())
+        with task_log_batch(), transaction.atomic():
+            for task in tasks:
+                task.priority = priority
+                task.save()
+        return len(tasks)
+
+    with isolated_database():
+        seed_workspace(args.tasks)
+
+        disconnect_signals()
+        save_all("low")  # прогрев
+        _, plain_queries, plain_elapsed = measure(lambda: save_all("high"))
+
+        connect_signals()
+        _, logged_queries, logged_elapsed = measure(lambda: save_all("low"))
+        logs = TaskLog.objects.count()
+
+    overhead = logged_elapsed / plain_elapsed - 1
+    extra_queries = (logged_queries - plain_queries) * 1000 / args.tasks
+    print(f"without log: {plain_queries} queries, {plain_elapsed * 1e6 / args.tasks:.0f} us/save")
+    print(f"   with log: {logged_queries} queries, {logged_elapsed * 1e6 / args.tasks:.0f} us/save, {logs} rows")
+    print(
+        f"   overhead: {overhead:+.1%} (limit {args.max_overhead:+.0%}), "
+        f"{extra_queries:.1f} extra queries per 1000 saves (limit {args.max_queries})"
+    )
+    if overhead > args.max_overhead or extra_queries > args.max_queries:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import contextlib
+import os
+import random
+import time
+from datetime import timedelta
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "config.settings.local")
+django.setup()
+
+from django.apps import apps  # noqa: E402
+from django.db import connection  # noqa: E402
+from django.test.utils import setup_test_environment, teardown_test_environment  # noqa: E402
+
+
+@contextlib.contextmanager
+def isolated_database():
+    """Отдельная тестовая БД на время замера, рабочая база не трогается. Синхронизация с ES отключена."""
+    signal_processor = apps.get_app_config("django_elasticsearch_dsl").signal_processor
+    signal_processor.teardown()
+    setup_test_environment()
+    old_name = connection.settings_dict["NAME"]
+    connection.creation.create_test_db(verbosity=0)
+    try:
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        signal_processor.setup()
+
+
+def measure(func):
+    """Возвращает (результат, число SQL-запросов, секунды)."""
+    queries = 0
+
+    def count_queries(execute, sql, params, many, context):
+        nonlocal queries
+        queries += 1
+        return execute(sql, params, many, context)
+
+    with connection.execute_wrapper(count_queries):
+        started = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - started
+    return result, queries, elapsed
+
+
+def seed_workspace(tasks_count, users_count=20, labels_count=10, statuses_count=5, seed=0):
+    """Пространство с задачами, метками, наблюдателями, комментариями и чек-листами."""
+    from apps.tasks.models import Label, Task, TaskChecklistItem, TaskComment, TaskStatus, TaskType
+    from apps.users.models import Role, User
+    from apps.workspaces.models import UserWorkspaceRole, Workspace
+
+    from django.utils import timezone
+
+    rnd = random.Random(seed)
+    now = timezone.now()
+    suffix = rnd.randrange(10**9)
+    users = User.objects.bulk_create(
+        [User(email=f"bench_{suffix}_{i}@example.com", fio=f"Bench User {i}") for i in range(users_count)]
+    )
+    workspace = Workspace.objects.create(name=f"Bench {suffix}", created_by=users[0])
+    role, _ = Role.objects.get_or_create(name="Bench member")
+    UserWorkspaceRole.objects.bulk_create(
+        [UserWorkspaceRole(user=user, workspace=workspace, role=role) for user in users]
+    )
+    statuses = TaskStatus.objects.bulk_create(
+        [
+            TaskStatus(name=f"Status {i}", workspace=workspace, order=i, is_closed=i == statuses_count - 1)
+            for i in range(statuses_count)
+        ]
+    )
+    labels = Label.objects.bulk_create([Label(name=f"Label {i}", workspace=workspace) for i in range(labels_count)])
+    task_type, _ = TaskType.objects.get_or_create(name="Bench")
+
+    tasks = Task.objects.bulk_create(
+        [
+            Task(
+                title=f"Bench task {i}",
+                description="Lorem ipsum " * 5,
+                workspace=workspace,
+                status=rnd.choice(statuses),
+                task_type=task_type,
+                creator=rnd.choice(users),
+                assignee=rnd.choice(users),
+                priority=rnd.choice(["low", "medium", "high", "critical"]),
+                estimated_time=rnd.randint(1, 40),
+                due_date=now + timedelta(days=rnd.randint(-30, 60)) if rnd.random() < 0.5 else None,
+            )
+            for i in range(tasks_count)
+        ],
+        batch_size=1000,
+    )
+    Task.labels.through.objects.bulk_create(
+        [
+            Task.labels.through(task_id=task.id, label_id=label.id)
+            for task in tasks
+            for label in rnd.sample(labels, 2)
+        ],
+        batch_size=1000,
+    )
+    Task.watchers.through.objects.bulk_create(
+        [Task.watchers.through(task_id=task.id, user_id=user.id) for task in tasks for user in rnd.sample(users, 2)],
+        batch_size=1000,
+    )
+    TaskComment.objects.bulk_create(
+        [TaskComment(task=task, author=rnd.choice(users), content="Bench comment") for task in tasks],
+        batch_size=1000,
+    )
+    TaskChecklistItem.objects.bulk_create(
+        [TaskChecklistItem(task=task, text=f"Step {n}", order=n) for task in tasks for n in range(2)],
+        batch_size=1000,
+    )
+    return workspace
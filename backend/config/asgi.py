@@ -13,4 +13,8 @@ from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
-application = get_asgi_application()
+django_application = get_asgi_application()
+
+from apps.live.asgi import LiveFeedRouter  # noqa: E402
+
+application = LiveFeedRouter(django_application)
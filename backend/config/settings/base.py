@@ -42,6 +42,11 @@ INSTALLED_APPS = [
     'apps.users.apps.UsersConfig',
     'apps.workspaces.apps.WorkspacesConfig',
     'apps.tasks.apps.TasksConfig',
+    'apps.indexing.apps.IndexingConfig',
+    'apps.live.apps.LiveConfig',
+    'reports.apps.ReportsConfig',
+    'integration.apps.IntegrationConfig',
+    'notifications.apps.NotificationsConfig',
 ]
 
 MIDDLEWARE = [
@@ -52,6 +57,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'apps.tasks.audit.TaskLogMiddleware',
 ]
 
 ROOT_URLCONF = 'config.urls'
@@ -143,19 +149,150 @@ REST_FRAMEWORK = {
 
 }
 
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": env("CACHE_URL", default="redis://:1337@localhost:6379/2"),
+    },
+}
+
+# Графы блокировок пространств (apps.tasks.graph): LRU процесса, актуальность — по версии в общем кеше
+TASK_DEPENDENCY_GRAPH = {
+    "LOCAL_MAXSIZE": 256,
+    "LOCAL_TTL": 10 * 60,
+}
+
+# Дерево подзадач (TaskViewSet.tree): предельная глубина и число узлов в одном ответе
+TASK_TREE = {
+    "MAX_DEPTH": 20,
+    "MAX_NODES": 1000,
+}
+
+# Подсказки по началу названия (TaskViewSet.suggest): кеш префиксов в процессе на CACHE_TTL секунд
+TASK_SUGGEST = {
+    "SIZE": 8,
+    "MAX_SIZE": 20,
+    "MIN_PREFIX_LENGTH": 1,
+    "MAX_PREFIX_LENGTH": 100,
+    "CACHE_MAXSIZE": 2048,
+    "CACHE_TTL": 30,
+    "REQUEST_ID_TIMEOUT": 60,
+}
+
+# Членство в пространствах: LRU процесса (LOCAL_TTL секунд) поверх общего кеша (TIMEOUT секунд)
+WORKSPACE_MEMBERSHIP_CACHE = {
+    "TIMEOUT": 300,
+    "LOCAL_MAXSIZE": 2048,
+    "LOCAL_TTL": 5,
+}
+
+# Матрица прав (workspace_id -> коды прав) на пользователя; ключ версионируется при изменении ролей.
+# Версии держатся в памяти процесса VERSION_TTL секунд — столько ждёт инвалидация из другого процесса
+PERMISSION_MATRIX_CACHE = {
+    "TIMEOUT": 600,
+    "LOCAL_MAXSIZE": 2048,
+    "LOCAL_TTL": 60,
+    "VERSION_TTL": 5,
+}
+
+# Индекс задач: шарды общего индекса (при SHARDS > 1 задачи маршрутизируются на шард по workspace_id)
+# и отдельные индексы на DEDICATED_SHARDS шардов для пространств от DEDICATED_THRESHOLD задач (split_task_index).
+# Реплики по умолчанию выключены, как у индекса пользователей: на одном узле ES реплика не размещается
+# и индекс остаётся yellow; в кластере задаётся через ELASTIC_TASK_REPLICAS
+TASK_SEARCH_INDEX = {
+    "SHARDS": env.int("ELASTIC_TASK_SHARDS", default=6),
+    "REPLICAS": env.int("ELASTIC_TASK_REPLICAS", default=0),
+    "DEDICATED_THRESHOLD": 200_000,
+    "DEDICATED_SHARDS": 3,
+    "LOCAL_TTL": 30,
+}
+
 ELASTICSEARCH_DSL = {
     "default": {
         "hosts": env("ELASTIC_HOST", default="http://localhost:9200"),
     },
 }
 
-# CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://:1337@localhost:6379/0')
-# CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default='redis://:1337@localhost:6379/0')
-# CELERY_ACCEPT_CONTENT = ['pickle']
-# CELERY_TASK_SERIALIZER = 'pickle'
-# CELERY_RESULT_SERIALIZER = 'pickle'
-#
-# ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = "django_elasticsearch_dsl.signals.CelerySignalProcessor"
+CELERY_BROKER_URL = env('CELERY_BROKER_URL', default='redis://:1337@localhost:6379/0')
+CELERY_RESULT_BACKEND = env('CELERY_RESULT_BACKEND', default='redis://:1337@localhost:6379/0')
+CELERY_ACCEPT_CONTENT = ['json']
+CELERY_TASK_SERIALIZER = 'json'
+CELERY_RESULT_SERIALIZER = 'json'
+CELERY_BEAT_SCHEDULE = {
+    # Счётчики задач ведутся приращениями; сверка ловит потерянные и записи в обход сигналов
+    "reconcile-task-counters": {
+        "task": "apps.tasks.tasks.reconcile_task_counters",
+        "schedule": 60 * 60,
+    },
+    "refresh-reports": {
+        "task": "reports.tasks.refresh_reports",
+        "schedule": 5 * 60,
+    },
+    "dispatch-notifications": {
+        "task": "notifications.tasks.dispatch_notifications",
+        "schedule": 60,
+    },
+}
+
+# Отчёты: задачи с updated_at позже отметки минус LAG переносятся в факты пачками по CHUNK_SIZE.
+# Запас LAG ловит транзакции, закоммиченные позже, чем они выставили updated_at
+REPORTS = {
+    "LAG": 5 * 60,
+    "CHUNK_SIZE": 2000,
+    "MAX_RANGE_DAYS": 366,
+}
+
+# Живая лента пространства (apps.live): события задач, комментариев и чек-листов раздаются
+# подключённым по SSE/WebSocket. Частые правки одного объекта склеиваются за COALESCE_WINDOW секунд,
+# соединение, отставшее больше чем на MAX_PENDING объектов, получает resync вместо очереди событий
+LIVE_FEED_BROKER = {
+    "BACKEND": "apps.live.broker.RedisBroker",
+    "LOCATION": env("LIVE_FEED_URL", default="redis://:1337@localhost:6379/3"),
+}
+LIVE_FEED = {
+    "MAX_PENDING": 500,
+    "COALESCE_WINDOW": 0.25,
+    "HEARTBEAT": 20,
+}
+
+# Уведомления наблюдателям строятся по журналу задач (строки старше LAG секунд, пачками по FAN_OUT_CHUNK_SIZE),
+# копятся во входящих и уходят одним дайджестом на пользователя, когда самому старому неотправленному
+# больше DIGEST_WINDOW секунд (окно можно задать на пользователя). TRANSPORTS — канал -> класс доставки
+NOTIFICATIONS = {
+    "LAG": 5,
+    "FAN_OUT_CHUNK_SIZE": 2000,
+    "DIGEST_WINDOW": 5 * 60,
+    "BATCH_SIZE": 200,
+    "TRANSPORTS": {
+        "email": "notifications.transports.EmailTransport",
+        "webhook": "notifications.transports.WebhookTransport",
+    },
+    "WEBHOOK_TIMEOUT": 5,
+    # Только https и только публичные адреса; непустой список дополнительно ограничивает хосты вебхуков
+    "WEBHOOK_ALLOWED_HOSTS": env.list("NOTIFICATIONS_WEBHOOK_HOSTS", default=[]),
+    "FILE_PATH": str(BASE_DIR / "var" / "notifications.ndjson"),
+}
+
+# Импорт задач из других трекеров: пачки по BATCH_SIZE, прогресс задания — в CHECKPOINT_DIR,
+# чтобы перезапущенный воркер продолжил с последней закоммиченной пачки
+INTEGRATION_IMPORT = {
+    "BATCH_SIZE": 1000,
+    "CHECKPOINT_DIR": env("IMPORT_CHECKPOINT_DIR", default=str(BASE_DIR / "var" / "import_checkpoints")),
+}
+
+# Индексация в Elasticsearch вынесена из запроса: сигналы пишут (модель, pk) в очередь,
+# Celery раз в FLUSH_WINDOW секунд отправляет накопленное одним bulk-запросом
+ELASTICSEARCH_DSL_SIGNAL_PROCESSOR = "apps.indexing.signals.QueuedSignalProcessor"
+ELASTICSEARCH_INDEX_QUEUE = {
+    "BACKEND": "apps.indexing.queue.RedisIndexQueue",
+    "LOCATION": env("ELASTIC_QUEUE_URL", default="redis://:1337@localhost:6379/1"),
+}
+ELASTICSEARCH_INDEX_PIPELINE = {
+    "FLUSH_WINDOW": 2,
+    "BATCH_SIZE": 500,
+    "MAX_RETRIES": 5,
+    "RETRY_BACKOFF": 2,
+}
 
 # STATICFILES_STORAGE = "config.storages.StaticStorage"
 # DEFAULT_FILE_STORAGE = "config.storages.MediaStorage"
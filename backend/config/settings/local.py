@@ -11,4 +11,21 @@ DATABASES = {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
     }
-}
\ No newline at end of file
+}
+
+CELERY_BROKER_URL = 'memory://'
+CELERY_RESULT_BACKEND = 'cache+memory://'
+CELERY_TASK_ALWAYS_EAGER = True
+
+ELASTICSEARCH_INDEX_QUEUE = {"BACKEND": "apps.indexing.queue.InMemoryIndexQueue"}
+TASK_SEARCH_INDEX = {**TASK_SEARCH_INDEX, "SHARDS": 1, "REPLICAS": 0}
+LIVE_FEED_BROKER = {"BACKEND": "apps.live.broker.InMemoryBroker"}
+NOTIFICATIONS = {
+    **NOTIFICATIONS,
+    "TRANSPORTS": {
+        "email": "notifications.transports.ConsoleTransport",
+        "webhook": "notifications.transports.ConsoleTransport",
+    },
+}
+
+CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
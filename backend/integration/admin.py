@@ -1,2 +1,15 @@
+from django.contrib import admin
 
-# Register your models here.
+from .models import ImportJob
+
+
+@admin.register(ImportJob)
+class ImportJobAdmin(admin.ModelAdmin):
+    list_display = ("id", "workspace", "source_format", "status", "processed", "imported", "created_at", "finished_at")
+    list_filter = ("status", "source_format", "created_at")
+    search_fields = ("workspace__name", "created_by__email")
+    readonly_fields = ["status", "processed", "imported", "error", "created_at", "finished_at"]
+    date_hierarchy = "created_at"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("workspace")
@@ -0,0 +1,69 @@
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+
+from apps.users.models import User
+from apps.workspaces.models import Workspace
+from integration.models import ImportJob
+from integration.services.importer import TaskImporter
+from integration.services.readers import READERS, read_records
+
+
+def detect_format(path):
+    suffixes = [suffix.lstrip(".") for suffix in Path(path).suffixes if suffix != ".gz"]
+    if suffixes and suffixes[-1] in ("ndjson", "jsonl"):
+        return "ndjson"
+    if suffixes and suffixes[-1] == "csv":
+        return "csv"
+    return None
+
+
+class Command(BaseCommand):
+    help = (
+        "Импорт задач из выгрузки другого трекера (CSV или NDJSON, можно .gz). "
+        "С --checkpoint прерванный импорт продолжается запуском с --resume"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("path")
+        parser.add_argument("--workspace", type=int, required=True)
+        parser.add_argument("--format", dest="source_format", choices=list(READERS), help="По умолчанию по расширению")
+        parser.add_argument("--user", help="Email автора задач, у которых в источнике не указан создатель")
+        parser.add_argument("--checkpoint", help="Файл прогресса импорта")
+        parser.add_argument("--resume", type=int, metavar="JOB_ID", help="Продолжить прерванный импорт")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--skip-index", action="store_true", help="Не индексировать в Elasticsearch")
+
+    def handle(self, *args, **options):
+        source_format = options["source_format"] or detect_format(options["path"])
+        if source_format is None:
+            raise CommandError("Cannot detect file format, pass --format")
+        if not Workspace.objects.filter(pk=options["workspace"]).exists():
+            raise CommandError(f"Workspace {options['workspace']} not found")
+
+        if options["resume"]:
+            job = ImportJob.objects.filter(pk=options["resume"], workspace_id=options["workspace"]).first()
+            if job is None:
+                raise CommandError(f"Import job {options['resume']} not found")
+        else:
+            user = None
+            if options["user"]:
+                user = User.objects.filter(email=options["user"]).first()
+                if user is None:
+                    raise CommandError(f"User {options['user']} not found")
+            job = ImportJob.objects.create(
+                workspace_id=options["workspace"], created_by=user, source_format=source_format
+            )
+
+        importer = TaskImporter(
+            job,
+            checkpoint=options["checkpoint"],
+            batch_size=options["batch_size"],
+            index=not options["skip_index"],
+            progress=lambda message: self.stderr.write(message),
+        )
+        processed = importer.run(read_records(options["path"], source_format))
+        job.refresh_from_db()
+        self.stdout.write(
+            self.style.SUCCESS(f"Import job {job.pk}: {processed} records processed, {job.imported} tasks imported")
+        )
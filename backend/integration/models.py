@@ -1,2 +1,54 @@
+from django.db import models
 
-# Create your models here.
+from apps.tasks.models import Task
+from apps.users.models import User
+from apps.workspaces.models import Workspace
+
+
+class ImportJob(models.Model):
+    """Импорт задач из другого трекера в пространство (см. integration.services.importer)."""
+
+    FORMAT_CHOICES = (
+        ("csv", "CSV"),
+        ("ndjson", "NDJSON"),
+    )
+    STATUS_CHOICES = (
+        ("pending", "Ожидает"),
+        ("running", "Выполняется"),
+        ("done", "Завершён"),
+        ("failed", "Ошибка"),
+    )
+
+    workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, related_name="import_jobs")
+    created_by = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True)
+    source = models.FileField(upload_to="imports/%Y/%m/%d/", blank=True)
+    source_format = models.CharField(max_length=10, choices=FORMAT_CHOICES)
+    status = models.CharField(max_length=10, choices=STATUS_CHOICES, default="pending")
+    processed = models.PositiveIntegerField(default=0)
+    imported = models.PositiveIntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Импорт #{self.pk} в {self.workspace_id} ({self.get_status_display()})"
+
+
+class ImportRecord(models.Model):
+    """
+    Соответствие id задачи в исходной системе и созданной задачи. Пишется в одной транзакции с задачами:
+    по нему продолжение импорта пропускает уже загруженное и переназначает parent_task и зависимости.
+    """
+
+    job = models.ForeignKey(ImportJob, on_delete=models.CASCADE, related_name="records")
+    source_id = models.CharField(max_length=255)
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="+")
+    # Ссылки на другие задачи источника, разрешаются после загрузки всех задач
+    parent_source_id = models.CharField(max_length=255, blank=True)
+    dependencies = models.JSONField(default=list, blank=True)
+
+    class Meta:
+        unique_together = ("job", "source_id")
+
+    def __str__(self):
+        return f"{self.source_id} -> {self.task_id}"
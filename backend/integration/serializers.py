@@ -0,0 +1,30 @@
+from rest_framework import serializers
+
+from apps.tasks.selectors.users import user_has_access_to_workspace
+
+from .models import ImportJob
+
+
+class ImportJobSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = ImportJob
+        fields = [
+            "id",
+            "workspace",
+            "created_by",
+            "source",
+            "source_format",
+            "status",
+            "processed",
+            "imported",
+            "error",
+            "created_at",
+            "finished_at",
+        ]
+        read_only_fields = ["created_by", "status", "processed", "imported", "error", "created_at", "finished_at"]
+        extra_kwargs = {"source": {"write_only": True, "required": True, "allow_empty_file": False}}
+
+    def validate_workspace(self, workspace):
+        if not user_has_access_to_workspace(self.context["request"].user, workspace):
+            raise serializers.ValidationError("You do not have access to this workspace.")
+        return workspace
@@ -0,0 +1,408 @@
+import json
+import logging
+import time
+from itertools import islice
+from pathlib import Path
+
+from django.db import transaction
+from django.db.models import Max
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from apps.indexing.queue import make_key
+from apps.indexing.services.bulk_index import bulk_index
+from apps.indexing.tasks import dead_letter
+from apps.tasks.counters import count_created
+from apps.tasks.graph import invalidate_dependency_graph
+from apps.tasks.models import Label, Task, TaskChecklistItem, TaskComment, TaskDependency, TaskStatus, TaskType
+from apps.users.models import User
+from integration.models import ImportJob, ImportRecord
+
+logger = logging.getLogger(__name__)
+
+PHASES = ("tasks", "links", "index", "done")
+PRIORITIES = {value for value, _ in Task.PRIORITY_CHOICES}
+DEPENDENCY_TYPES = {value for value, _ in TaskDependency.DEPENDENCY_TYPES}
+NAME_LENGTH = {
+    "status": TaskStatus._meta.get_field("name").max_length,
+    "task_type": TaskType._meta.get_field("name").max_length,
+    "labels": Label._meta.get_field("name").max_length,
+}
+SOURCE_ID_LENGTH = ImportRecord._meta.get_field("source_id").max_length
+INDEX_BATCH_SIZE = 500
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _text(value):
+    return str(value).strip() if value not in (None, "") else None
+
+
+def _name(value, field):
+    # Имена статусов, типов и меток ограничены max_length — длинные обрезаем, как и title
+    text = _text(value)
+    return text[: NAME_LENGTH[field]] if text else None
+
+
+def _integer(value):
+    return int(value) if value not in (None, "") else None
+
+
+def _hours(value):
+    hours = _integer(value)
+    if hours is not None and hours < 0:
+        raise ValueError(f"negative hours {hours}")
+    return hours
+
+
+def _datetime(value):
+    if value in (None, ""):
+        return None
+    parsed = parse_datetime(str(value))
+    if parsed is not None and timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def check_record(record):
+    """
+    Разбирает все значения записи, которые может отвергнуть БД или парсер. ValueError/TypeError/
+    AttributeError — запись пропускается целиком, а не роняет всю пачку.
+    """
+    parent_id = _text(record.get("parent") or record.get("parent_task")) or ""
+    if max(len(_text(record.get("id"))), len(parent_id)) > SOURCE_ID_LENGTH:
+        raise ValueError("source id is too long")
+    _datetime(record.get("due_date"))
+    _datetime(record.get("created_at"))
+    _hours(record.get("estimated_time"))
+    _hours(record.get("actual_time"))
+    for dependency in record.get("dependencies") or ():
+        dependency.get("to")
+    for comment in record.get("comments") or ():
+        _text(comment.get("content"))
+        _datetime(comment.get("created_at"))
+    for item in record.get("checklist") or ():
+        _text(item.get("text"))
+        _datetime(item.get("completed_at"))
+        _integer(item.get("order"))
+    if not isinstance(record.get("labels") or [], list) or not isinstance(record.get("watchers") or [], list):
+        raise TypeError("labels and watchers must be lists")
+
+
+def _boolean(value):
+    return str(value).strip().lower() in ("1", "true", "yes") if value is not None else False
+
+
+class _NameLookup:
+    """Имя -> pk в памяти; недостающие создаются одним bulk_create на пачку импорта."""
+
+    def __init__(self, queryset, field, build):
+        self.values = dict(queryset.values_list(field, "pk"))
+        self.build = build
+
+    def resolve(self, names):
+        missing = {name for name in names if name and name not in self.values}
+        if missing:
+            created = self.build(sorted(missing))
+            self.values.update({name: obj.pk for name, obj in created.items()})
+        return self.values
+
+
+class TaskImporter:
+    """
+    Импорт задач в пространство job.workspace потоком записей (integration.services.readers).
+    Задачи пишутся пачками bulk_create вместе с ImportRecord; ссылки parent_task и зависимости
+    разрешаются вторым проходом по ImportRecord, индексация в ES — третьим, одним bulk на пачку.
+    Прогресс сохраняется в checkpoint-файл после каждой пачки, а повторно встреченные source_id
+    пропускаются по ImportRecord, поэтому прерванный импорт можно просто запустить снова.
+    """
+
+    def __init__(self, job, checkpoint=None, batch_size=1000, index=True, progress=None):
+        self.job = job
+        self.workspace_id = job.workspace_id
+        self.checkpoint = Path(checkpoint) if checkpoint else None
+        self.batch_size = batch_size
+        self.index = index
+        self.progress = progress or (lambda message: None)
+        self.state = self.load_checkpoint()
+
+    def load_checkpoint(self):
+        if self.checkpoint and self.checkpoint.exists():
+            state = json.loads(self.checkpoint.read_text())
+            if state.get("job") == self.job.pk:
+                return state
+        return {"job": self.job.pk, "phase": "tasks", "processed": 0, "after": 0}
+
+    def save_checkpoint(self, **changes):
+        self.state.update(changes)
+        if self.checkpoint:
+            # Запись через временный файл: оборванная запись не портит прежний прогресс
+            tmp = self.checkpoint.with_suffix(".tmp")
+            tmp.write_text(json.dumps(self.state))
+            tmp.replace(self.checkpoint)
+
+    def run(self, records):
+        ImportJob.objects.filter(pk=self.job.pk).update(status="running", error="")
+        started = time.monotonic()
+        try:
+            if self.state["phase"] == "tasks":
+                self.import_tasks(records, started)
+                self.save_checkpoint(phase="links", after=0)
+            if self.state["phase"] == "links":
+                self.link_tasks()
+                # Зависимости созданы bulk_create в обход сигналов
+                invalidate_dependency_graph(self.workspace_id)
+                self.save_checkpoint(phase="index", after=0)
+            if self.state["phase"] == "index":
+                if self.index:
+                    self.index_tasks()
+                self.save_checkpoint(phase="done")
+        except Exception as exc:
+            ImportJob.objects.filter(pk=self.job.pk).update(status="failed", error=str(exc))
+            raise
+        ImportJob.objects.filter(pk=self.job.pk).update(status="done", finished_at=timezone.now())
+        return self.state["processed"]
+
+    # Задачи
+
+    def import_tasks(self, records, started):
+        self.statuses = _NameLookup(
+            TaskStatus.objects.filter(workspace_id=self.workspace_id), "name", self.create_statuses
+        )
+        self.task_types = _NameLookup(TaskType.objects.all(), "name", self.create_task_types)
+        self.labels = _NameLookup(Label.objects.filter(workspace_id=self.workspace_id), "name", self.create_labels)
+        self.users = {}
+
+        skip = self.state["processed"]
+        for batch in _batched(islice(records, skip, None), self.batch_size):
+            with transaction.atomic():
+                imported = self.import_batch(batch)
+            processed = self.state["processed"] + len(batch)
+            self.job.imported += imported
+            ImportJob.objects.filter(pk=self.job.pk).update(processed=processed, imported=self.job.imported)
+            self.save_checkpoint(processed=processed)
+            elapsed = time.monotonic() - started
+            self.progress(f"{processed} записей, {(processed - skip) / elapsed if elapsed else 0:.0f} rows/sec")
+
+    def import_batch(self, batch):
+        records, seen = [], set()
+        for record in batch:
+            source_id = _text(record.get("id"))
+            if not source_id or not _text(record.get("title")) or source_id in seen:
+                logger.warning("Import %s: skipped record without id/title or duplicate %r", self.job.pk, source_id)
+                continue
+            try:
+                check_record(record)
+            except (AttributeError, TypeError, ValueError) as exc:
+                logger.warning("Import %s: skipped malformed record %r: %s", self.job.pk, source_id, exc)
+                continue
+            seen.add(source_id)
+            records.append((source_id, record))
+        # Уже загруженные при прошлом запуске: пачка могла закоммититься без записи checkpoint
+        done = set(
+            ImportRecord.objects.filter(job=self.job, source_id__in=seen).values_list("source_id", flat=True)
+        )
+        records = [(source_id, record) for source_id, record in records if source_id not in done]
+        if not records:
+            return 0
+
+        self.resolve_references([record for _, record in records])
+        tasks = [self.build_task(record) for _, record in records]
+        Task.objects.bulk_create(tasks, batch_size=self.batch_size)
+        # auto_now_add перезаписывает created_at при вставке — возвращаем исходные даты отдельным UPDATE
+        self.restore_created_at(Task, tasks, [record.get("created_at") for _, record in records])
+
+        ImportRecord.objects.bulk_create(
+            [
+                ImportRecord(
+                    job=self.job,
+                    source_id=source_id,
+                    task=task,
+                    parent_source_id=_text(record.get("parent") or record.get("parent_task")) or "",
+                    dependencies=[
+                        [dependency.get("type", "blocks"), str(dependency["to"])]
+                        for dependency in record.get("dependencies") or ()
+                        if dependency.get("to") not in (None, "")
+                    ],
+                )
+                for (source_id, record), task in zip(records, tasks, strict=True)
+            ],
+            batch_size=self.batch_size,
+        )
+        self.create_relations(records, tasks)
+        count_created(tasks)
+        return len(tasks)
+
+    def resolve_references(self, records):
+        # Закрытость новых статусов берём из записей, где статус встретился с is_closed
+        self.pending_closed = {
+            _name(record["status"], "status")
+            for record in records
+            if record.get("status") and _boolean(record.get("is_closed"))
+        }
+        self.statuses.resolve(_name(record.get("status"), "status") for record in records)
+        self.task_types.resolve(_name(record.get("task_type"), "task_type") for record in records)
+        self.labels.resolve(_name(name, "labels") for record in records for name in record.get("labels") or ())
+        emails = set()
+        for record in records:
+            emails.update(_text(record.get(field)) for field in ("assignee", "creator"))
+            emails.update(_text(email) for email in record.get("watchers") or ())
+            emails.update(_text(comment.get("author")) for comment in record.get("comments") or ())
+        self.resolve_users(emails)
+
+    def resolve_users(self, emails):
+        """
+        Почта -> pk только для участников job.workspace. Учётки импорт не создаёт: незнакомый
+        исполнитель или наблюдатель пропускается, автор задачи заменяется на job.created_by.
+        """
+        missing = {email for email in emails if email and email not in self.users}
+        if not missing:
+            return
+        members = User.objects.filter(
+            email__in=missing, is_active=True, workspace_roles__workspace_id=self.workspace_id
+        ).values_list("email", "pk")
+        self.users.update(dict.fromkeys(missing))
+        self.users.update(members)
+
+    def create_statuses(self, names):
+        last = TaskStatus.objects.filter(workspace_id=self.workspace_id).aggregate(Max("order"))["order__max"]
+        order = (last or 0) + 1
+        statuses = [
+            TaskStatus(
+                name=name, workspace_id=self.workspace_id, order=order + offset, is_closed=name in self.pending_closed
+            )
+            for offset, name in enumerate(names)
+        ]
+        TaskStatus.objects.bulk_create(statuses)
+        return {status.name: status for status in statuses}
+
+    def create_task_types(self, names):
+        task_types = TaskType.objects.bulk_create([TaskType(name=name) for name in names])
+        return {task_type.name: task_type for task_type in task_types}
+
+    def create_labels(self, names):
+        labels = Label.objects.bulk_create([Label(name=name, workspace_id=self.workspace_id) for name in names])
+        return {label.name: label for label in labels}
+
+    def build_task(self, record):
+        priority = _text(record.get("priority"))
+        return Task(
+            workspace_id=self.workspace_id,
+            title=_text(record["title"])[:255],
+            description=record.get("description") or "",
+            priority=priority if priority in PRIORITIES else "medium",
+            status_id=self.statuses.values.get(_name(record.get("status"), "status")),
+            task_type_id=self.task_types.values.get(_name(record.get("task_type"), "task_type")),
+            assignee_id=self.users.get(_text(record.get("assignee"))),
+            creator_id=self.users.get(_text(record.get("creator"))) or self.job.created_by_id,
+            due_date=_datetime(record.get("due_date")),
+            estimated_time=_hours(record.get("estimated_time")),
+            actual_time=_hours(record.get("actual_time")),
+        )
+
+    def restore_created_at(self, model, objs, values):
+        restored = []
+        for obj, value in zip(objs, values, strict=True):
+            created_at = _datetime(value)
+            if created_at is not None:
+                obj.created_at = created_at
+                restored.append(obj)
+        if restored:
+            model.objects.bulk_update(restored, ["created_at"], batch_size=self.batch_size)
+
+    def create_relations(self, records, tasks):
+        label_rows, watcher_rows, comments, comment_dates, checklist = [], [], [], [], []
+        for (_, record), task in zip(records, tasks, strict=True):
+            label_names = {_name(name, "labels") for name in record.get("labels") or ()} - {None}
+            label_ids = {self.labels.values[name] for name in label_names}
+            label_rows += [Task.labels.through(task_id=task.pk, label_id=label_id) for label_id in label_ids]
+            watcher_ids = {self.users.get(_text(email)) for email in record.get("watchers") or ()} - {None}
+            watcher_rows += [Task.watchers.through(task_id=task.pk, user_id=user_id) for user_id in watcher_ids]
+            for comment in record.get("comments") or ():
+                if _text(comment.get("content")):
+                    comments.append(
+                        TaskComment(
+                            task_id=task.pk,
+                            author_id=self.users.get(_text(comment.get("author"))),
+                            content=comment["content"],
+                            is_pinned=_boolean(comment.get("is_pinned")),
+                        )
+                    )
+                    comment_dates.append(comment.get("created_at"))
+            for order, item in enumerate(record.get("checklist") or ()):
+                if _text(item.get("text")):
+                    completed = _boolean(item.get("is_completed"))
+                    checklist.append(
+                        TaskChecklistItem(
+                            task_id=task.pk,
+                            text=_text(item["text"])[:255],
+                            is_completed=completed,
+                            completed_at=(_datetime(item.get("completed_at")) or timezone.now()) if completed else None,
+                            order=_integer(item.get("order")) or order,
+                        )
+                    )
+
+        Task.labels.through.objects.bulk_create(label_rows, batch_size=self.batch_size)
+        Task.watchers.through.objects.bulk_create(watcher_rows, batch_size=self.batch_size)
+        TaskComment.objects.bulk_create(comments, batch_size=self.batch_size)
+        self.restore_created_at(TaskComment, comments, comment_dates)
+        TaskChecklistItem.objects.bulk_create(checklist, batch_size=self.batch_size)
+
+    # Ссылки между задачами
+
+    def link_tasks(self):
+        """parent_task и TaskDependency по ImportRecord: повторный проход ничего не дублирует."""
+        records = ImportRecord.objects.filter(job=self.job).exclude(parent_source_id="", dependencies=[])
+        unresolved = 0
+        while batch := list(
+            records.filter(pk__gt=self.state["after"])
+            .order_by("pk")
+            .values_list("pk", "task_id", "parent_source_id", "dependencies")[: self.batch_size]
+        ):
+            targets = {parent for _, _, parent, _ in batch if parent}
+            targets.update(target for _, _, _, dependencies in batch for _, target in dependencies)
+            task_ids = dict(
+                ImportRecord.objects.filter(job=self.job, source_id__in=targets).values_list("source_id", "task_id")
+            )
+
+            parents, dependencies = [], []
+            for _, task_id, parent, task_dependencies in batch:
+                if parent:
+                    if parent in task_ids and task_ids[parent] != task_id:
+                        parents.append(Task(pk=task_id, parent_task_id=task_ids[parent]))
+                    else:
+                        unresolved += 1
+                for dependency_type, target in task_dependencies:
+                    if target in task_ids and dependency_type in DEPENDENCY_TYPES and task_ids[target] != task_id:
+                        dependencies.append(
+                            TaskDependency(
+                                from_task_id=task_id, to_task_id=task_ids[target], dependency_type=dependency_type
+                            )
+                        )
+                    else:
+                        unresolved += 1
+
+            with transaction.atomic():
+                Task.objects.bulk_update(parents, ["parent_task"], batch_size=self.batch_size)
+                TaskDependency.objects.bulk_create(dependencies, ignore_conflicts=True, batch_size=self.batch_size)
+            self.save_checkpoint(after=batch[-1][0])
+        if unresolved:
+            logger.warning("Import %s: %s task references could not be resolved", self.job.pk, unresolved)
+
+    # Индексация
+
+    def index_tasks(self):
+        """Отложенная индексация: сигналов при bulk_create нет, задачи уходят в ES пачками в конце."""
+        records = ImportRecord.objects.filter(job=self.job)
+        while batch := list(
+            records.filter(pk__gt=self.state["after"]).order_by("pk").values_list("pk", "task_id")[:INDEX_BATCH_SIZE]
+        ):
+            failed = bulk_index([make_key(Task(pk=task_id)) for _, task_id in batch])
+            if failed:
+                dead_letter(failed, attempts=1)
+            self.save_checkpoint(after=batch[-1][0])
+            self.progress(f"Проиндексировано до записи {batch[-1][0]}")
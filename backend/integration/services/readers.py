@@ -0,0 +1,62 @@
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+LIST_SEPARATOR = "|"
+LIST_COLUMNS = ("labels", "watchers")
+
+
+def open_text(source):
+    """Текстовый поток из пути или бинарного файла; .gz распознаётся по сигнатуре и распаковывается на лету."""
+    stream = open(source, "rb") if isinstance(source, str | os.PathLike) else source
+    signature = stream.read(2)
+    stream.seek(0)
+    if signature == b"\x1f\x8b":
+        stream = gzip.GzipFile(fileobj=stream)
+    return io.TextIOWrapper(stream, encoding="utf-8-sig", newline="")
+
+
+def read_ndjson(stream):
+    for number, line in enumerate(stream, 1):
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            record = json.loads(line)
+        except json.JSONDecodeError as exc:
+            logger.warning("NDJSON line %s is not valid JSON: %s", number, exc)
+            record = None
+        # Пустая запись вместо битой: импорт её пропустит, а счёт записей для checkpoint не съедет
+        yield record if isinstance(record, dict) else {}
+
+
+def read_csv(stream):
+    """
+    Плоские строки, совместимые с выгрузкой export_tasks: списки через «|», зависимости —
+    «тип:id» через «|». Комментарии и чек-листы в CSV не переносятся, для них нужен NDJSON.
+    """
+    for row in csv.DictReader(stream):
+        record = {key: value for key, value in row.items() if key and value not in ("", None)}
+        for column in LIST_COLUMNS:
+            if column in record:
+                record[column] = record[column].split(LIST_SEPARATOR)
+        if "dependencies" in record:
+            record["dependencies"] = [
+                dict(zip(("type", "to"), item.split(":", 1), strict=True))
+                for item in record["dependencies"].split(LIST_SEPARATOR)
+                if ":" in item
+            ]
+        yield record
+
+
+READERS = {"csv": read_csv, "ndjson": read_ndjson}
+
+
+def read_records(source, source_format):
+    with open_text(source) as stream:
+        yield from READERS[source_format](stream)
@@ -0,0 +1,27 @@
+from pathlib import Path
+
+from celery import shared_task
+from django.conf import settings
+
+from .models import ImportJob
+from .services.importer import TaskImporter
+from .services.readers import read_records
+
+
+def checkpoint_path(job):
+    directory = Path(settings.INTEGRATION_IMPORT["CHECKPOINT_DIR"])
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory / f"job-{job.pk}.json"
+
+
+@shared_task(acks_late=True)
+def run_import(job_id):
+    # acks_late: задание, прерванное вместе с воркером, будет выдано снова и продолжится по checkpoint
+    job = ImportJob.objects.select_related("workspace").get(pk=job_id)
+    if job.status == "done":
+        return job.processed
+    importer = TaskImporter(
+        job, checkpoint=checkpoint_path(job), batch_size=settings.INTEGRATION_IMPORT["BATCH_SIZE"]
+    )
+    with job.source.open("rb") as source:
+        return importer.run(read_records(source, job.source_format))
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework import routers
+
+from .views import ImportJobViewSet
+
+router = routers.DefaultRouter()
+router.register(r"imports", ImportJobViewSet, basename="import-jobs")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
@@ -1,2 +1,31 @@
+from django.db import transaction
+from rest_framework import mixins, permissions, viewsets
+from rest_framework.parsers import FormParser, MultiPartParser
 
-# Create your views here.
+from apps.tasks.selectors.users import filter_by_user_workspaces
+
+from .models import ImportJob
+from .serializers import ImportJobSerializer
+from .tasks import run_import
+
+
+class ImportJobViewSet(
+    mixins.CreateModelMixin, mixins.ListModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
+    """Загрузка файла выгрузки и статус импорта; сам импорт идёт в Celery (integration.tasks.run_import)."""
+
+    serializer_class = ImportJobSerializer
+    permission_classes = [permissions.IsAuthenticated]
+    parser_classes = [MultiPartParser, FormParser]
+
+    def get_queryset(self):
+        return filter_by_user_workspaces(ImportJob, self.request.user).order_by("-created_at")
+
+    def perform_create(self, serializer):
+        job = serializer.save(created_by=self.request.user)
+        transaction.on_commit(lambda: run_import.delay(job.pk))
+
+    def create(self, request, *args, **kwargs):
+        response = super().create(request, *args, **kwargs)
+        response.status_code = 202
+        return response
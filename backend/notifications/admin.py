@@ -1,2 +1,23 @@
+from django.contrib import admin
 
-# Register your models here.
+from .models import Notification, NotificationSettings
+
+
+@admin.register(Notification)
+class NotificationAdmin(admin.ModelAdmin):
+    list_display = ("id", "recipient", "task", "action", "created_at", "read_at", "dispatched_at")
+    list_filter = ("action", "created_at")
+    search_fields = ("recipient__email", "task__title")
+    raw_id_fields = ("recipient", "task", "actor")
+    date_hierarchy = "created_at"
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related("recipient", "task")
+
+
+@admin.register(NotificationSettings)
+class NotificationSettingsAdmin(admin.ModelAdmin):
+    list_display = ("user", "channel", "digest_window")
+    list_filter = ("channel",)
+    search_fields = ("user__email",)
+    raw_id_fields = ("user",)
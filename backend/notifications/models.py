@@ -1,2 +1,62 @@
+from django.db import models
+from django.db.models import Q
 
-# Create your models here.
+from apps.tasks.models import Task
+from apps.users.models import User
+
+
+class NotificationWatermark(models.Model):
+    """До какой строки TaskLog уведомления уже построены (см. notifications.services.inbox)."""
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.BigIntegerField(default=0)
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class Notification(models.Model):
+    """
+    Входящее уведомление пользователя об изменении задачи. Строится по строке TaskLog, но хранит
+    только имена изменённых полей: текст изменений остаётся в журнале задачи.
+    """
+
+    recipient = models.ForeignKey(User, on_delete=models.CASCADE, related_name="notifications")
+    task = models.ForeignKey(Task, on_delete=models.CASCADE, related_name="+")
+    actor = models.ForeignKey(User, on_delete=models.SET_NULL, null=True, blank=True, related_name="+")
+    action = models.CharField(max_length=20)
+    fields = models.JSONField(default=list, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    read_at = models.DateTimeField(null=True, blank=True)
+    # Когда ушло в дайджесте; NULL — ждёт отправки
+    dispatched_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["recipient", "-id"], name="notification_recipient_idx"),
+            models.Index(
+                fields=["recipient", "created_at"],
+                name="notification_pending_idx",
+                condition=Q(dispatched_at__isnull=True),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.recipient_id}: {self.action} {self.task_id}"
+
+
+class NotificationSettings(models.Model):
+    CHANNEL_CHOICES = (
+        ("email", "Email"),
+        ("webhook", "Webhook"),
+        ("none", "Только во входящих"),
+    )
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, related_name="notification_settings")
+    channel = models.CharField(max_length=10, choices=CHANNEL_CHOICES, default="email")
+    webhook_url = models.URLField(blank=True)
+    # Окно дайджеста в секундах; NULL — NOTIFICATIONS["DIGEST_WINDOW"]
+    digest_window = models.PositiveIntegerField(null=True, blank=True)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.channel}"
@@ -0,0 +1,40 @@
+from rest_framework import serializers
+
+from .models import Notification, NotificationSettings
+from .services.webhooks import UnsafeWebhookURL, check_webhook_url
+
+
+class NotificationSerializer(serializers.ModelSerializer):
+    task_title = serializers.CharField(source="task.title", read_only=True)
+    actor_email = serializers.EmailField(source="actor.email", read_only=True, default=None)
+
+    class Meta:
+        model = Notification
+        fields = ["id", "task", "task_title", "actor", "actor_email", "action", "fields", "created_at", "read_at"]
+        read_only_fields = fields
+
+
+class NotificationSettingsSerializer(serializers.ModelSerializer):
+    class Meta:
+        model = NotificationSettings
+        fields = ["channel", "webhook_url", "digest_window"]
+
+    def validate_webhook_url(self, value):
+        # Запрос уходит из внутренней сети — внутренние адреса закрыты (ещё раз проверяются при отправке)
+        if value:
+            try:
+                check_webhook_url(value)
+            except UnsafeWebhookURL as exc:
+                raise serializers.ValidationError(str(exc)) from exc
+        return value
+
+    def validate(self, attrs):
+        channel = attrs.get("channel", getattr(self.instance, "channel", None))
+        webhook_url = attrs.get("webhook_url", getattr(self.instance, "webhook_url", ""))
+        if channel == "webhook" and not webhook_url:
+            raise serializers.ValidationError({"webhook_url": ["Required for the webhook channel."]})
+        return attrs
+
+
+class MarkReadSerializer(serializers.Serializer):
+    ids = serializers.ListField(child=serializers.IntegerField(), required=False, help_text="Без ids — все входящие")
@@ -0,0 +1,152 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from functools import cache
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Min
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from apps.users.models import User
+from notifications.models import Notification, NotificationSettings
+
+logger = logging.getLogger(__name__)
+
+ACTION_LABELS = {
+    "create": "создана",
+    "update": "изменена",
+    "delete": "удалён элемент",
+    "comment": "новый комментарий",
+    "attachment": "новое вложение",
+}
+
+
+def notifications_setting(name):
+    return settings.NOTIFICATIONS[name]
+
+
+@cache
+def get_transport(channel):
+    return import_string(notifications_setting("TRANSPORTS")[channel])()
+
+
+def render_digest(digest):
+    """(тема, текст) дайджеста: по строке на задачу со всеми её изменениями за окно."""
+    by_task = defaultdict(list)
+    for item in digest["notifications"]:
+        by_task[(item["task"], item["title"])].append(item)
+    lines = []
+    for (task_id, title), items in by_task.items():
+        fields = sorted({field for item in items for field in item["fields"]})
+        actions = sorted({ACTION_LABELS.get(item["action"], item["action"]) for item in items})
+        actors = sorted({item["actor"] for item in items if item["actor"]})
+        line = f"#{task_id} {title}: {', '.join(actions)}"
+        if fields:
+            line += f" ({', '.join(fields)})"
+        if actors:
+            line += f" — {', '.join(actors)}"
+        lines.append(line)
+    subject = f"{len(digest['notifications'])} изменений в {len(by_task)} задачах"
+    return subject, "\n".join(lines)
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def due_recipients(now):
+    """Получатели, у которых самое старое неотправленное уведомление старше их окна дайджеста."""
+    oldest = dict(
+        Notification.objects.filter(dispatched_at__isnull=True)
+        .order_by()
+        .values("recipient_id")
+        .annotate(oldest=Min("created_at"))
+        .values_list("recipient_id", "oldest")
+    )
+    windows = dict(
+        NotificationSettings.objects.filter(user_id__in=oldest, digest_window__isnull=False).values_list(
+            "user_id", "digest_window"
+        )
+    )
+    default_window = notifications_setting("DIGEST_WINDOW")
+    return sorted(
+        user_id
+        for user_id, created_at in oldest.items()
+        if created_at <= now - timedelta(seconds=windows.get(user_id, default_window))
+    )
+
+
+def _build_digests(user_ids, now):
+    users = User.objects.filter(pk__in=user_ids).values_list("pk", "email", "fio")
+    users = {pk: (email, fio) for pk, email, fio in users}
+    preferences = {
+        user_id: (channel, webhook_url)
+        for user_id, channel, webhook_url in NotificationSettings.objects.filter(user_id__in=user_ids).values_list(
+            "user_id", "channel", "webhook_url"
+        )
+    }
+    rows = (
+        Notification.objects.filter(recipient_id__in=user_ids, dispatched_at__isnull=True, created_at__lte=now)
+        .order_by("recipient_id", "id")
+        .values_list("pk", "recipient_id", "task_id", "task__title", "action", "fields", "actor__email", "created_at")
+    )
+    digests = {}
+    for pk, user_id, task_id, title, action, fields, actor, created_at in rows:
+        if user_id not in digests:
+            channel, webhook_url = preferences.get(user_id, ("email", ""))
+            email, fio = users[user_id]
+            digests[user_id] = {
+                "user": user_id,
+                "email": email,
+                "fio": fio,
+                "channel": channel,
+                "webhook_url": webhook_url,
+                "ids": [],
+                "notifications": [],
+            }
+        digests[user_id]["ids"].append(pk)
+        digests[user_id]["notifications"].append(
+            {
+                "task": task_id,
+                "title": title,
+                "action": action,
+                "fields": fields,
+                "actor": actor,
+                "created_at": created_at.isoformat(),
+            }
+        )
+    return digests.values()
+
+
+def dispatch_notifications(now=None):
+    """
+    Отправляет дайджесты созревшим получателям пачками по BATCH_SIZE: одна выборка уведомлений
+    и один вызов транспорта на канал в пачке. Отмечаются только доставленные — остальные уйдут
+    следующим прогоном. Возвращает число отправленных дайджестов.
+    """
+    now = now or timezone.now()
+    sent = 0
+    for user_ids in _batched(due_recipients(now), notifications_setting("BATCH_SIZE")):
+        by_channel = defaultdict(list)
+        for digest in _build_digests(user_ids, now):
+            by_channel[digest["channel"]].append(digest)
+
+        dispatched = []
+        for channel, digests in by_channel.items():
+            if channel == "none":
+                # Только во входящих: отмечаем, чтобы не попадали в выборку созревших
+                delivered = {digest["user"] for digest in digests}
+            else:
+                try:
+                    delivered = get_transport(channel).send(digests)
+                except Exception:
+                    logger.exception("Notification transport %s failed for %s digests", channel, len(digests))
+                    continue
+                sent += len(delivered)
+            dispatched += [pk for digest in digests if digest["user"] in delivered for pk in digest["ids"]]
+        Notification.objects.filter(pk__in=dispatched).update(dispatched_at=now)
+    return sent
@@ -0,0 +1,93 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction
+from django.db.models import Exists, OuterRef
+from django.utils import timezone
+
+from apps.tasks.models import Task, TaskLog
+from apps.workspaces.models import UserWorkspaceRole
+from notifications.models import Notification, NotificationWatermark
+
+from .digests import notifications_setting
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = "task_logs"
+LOG_FIELDS = ("pk", "task_id", "user_id", "action", "changes")
+
+
+def task_recipients(task_ids):
+    """
+    {task_id: {user_id}} — наблюдатели, исполнитель и автор задач одним UNION-запросом.
+    Неактивные пользователи (например, созданные импортом) и те, у кого больше нет роли
+    в пространстве задачи, уведомлений не получают.
+    """
+
+    def member(user_ref, workspace_ref):
+        return Exists(
+            UserWorkspaceRole.objects.filter(user_id=OuterRef(user_ref), workspace_id=OuterRef(workspace_ref))
+        )
+
+    watchers = Task.watchers.through.objects.filter(
+        member("user_id", "task__workspace_id"), task_id__in=task_ids, user__is_active=True
+    ).values_list("task_id", "user_id")
+    assignees = Task.objects.filter(
+        member("assignee_id", "workspace_id"), pk__in=task_ids, assignee__is_active=True
+    ).values_list("pk", "assignee_id")
+    creators = Task.objects.filter(
+        member("creator_id", "workspace_id"), pk__in=task_ids, creator__is_active=True
+    ).values_list("pk", "creator_id")
+    recipients = defaultdict(set)
+    for task_id, user_id in watchers.union(assignees, creators):
+        recipients[task_id].add(user_id)
+    return recipients
+
+
+def create_notifications(rows):
+    """Уведомления по пачке строк журнала: всем получателям задачи, кроме автора изменения."""
+    recipients = task_recipients({row["task_id"] for row in rows})
+    notifications = [
+        Notification(
+            recipient_id=user_id,
+            task_id=row["task_id"],
+            actor_id=row["user_id"],
+            action=row["action"],
+            fields=sorted(row["changes"]) if row["action"] == "update" and isinstance(row["changes"], dict) else [],
+        )
+        for row in rows
+        for user_id in recipients[row["task_id"]]
+        if user_id != row["user_id"]
+    ]
+    return Notification.objects.bulk_create(notifications)
+
+
+def fan_out(now=None):
+    """
+    Строит уведомления по строкам TaskLog после отметки, пачками по FAN_OUT_CHUNK_SIZE. Журнал служит
+    очередью событий: запрос, изменивший задачу, ничего не делает для уведомлений. Строки моложе LAG
+    секунд ждут следующего прогона — параллельная транзакция могла ещё не закоммитить меньший id.
+    Возвращает число просмотренных строк.
+    """
+    now = now or timezone.now()
+    chunk_size = notifications_setting("FAN_OUT_CHUNK_SIZE")
+    watermark, _ = NotificationWatermark.objects.get_or_create(name=WATERMARK)
+    rows = (
+        TaskLog.objects.filter(
+            pk__gt=watermark.value, timestamp__lte=now - timedelta(seconds=notifications_setting("LAG"))
+        )
+        .order_by("pk")
+        .values(*LOG_FIELDS)
+        .iterator(chunk_size=chunk_size)
+    )
+    processed = 0
+    while chunk := list(islice(rows, chunk_size)):
+        with transaction.atomic():
+            create_notifications(chunk)
+            NotificationWatermark.objects.filter(pk=watermark.pk).update(value=chunk[-1]["pk"])
+        processed += len(chunk)
+    if processed:
+        logger.info("Notifications fan-out: %s task log rows processed", processed)
+    return processed
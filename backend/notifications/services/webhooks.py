@@ -0,0 +1,68 @@
+import ipaddress
+import socket
+from urllib.parse import urlsplit
+
+from .digests import notifications_setting
+
+BLOCKED_HOSTNAMES = {"localhost", "localhost.localdomain"}
+
+
+class UnsafeWebhookURL(ValueError):
+    pass
+
+
+def _is_ip(host):
+    try:
+        ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return True
+
+
+def _check_address(address):
+    ip = ipaddress.ip_address(address)
+    # is_global отсекает loopback, частные сети, link-local (169.254.x.x — метаданные облака) и служебные диапазоны
+    if not ip.is_global or ip.is_multicast:
+        raise UnsafeWebhookURL(f"Address {address} is not public.")
+
+
+def check_webhook_url(url):
+    """
+    Проверка адреса вебхука без сетевых запросов: только https, хост из WEBHOOK_ALLOWED_HOSTS
+    (если список задан), не localhost и не IP из внутренних сетей. Возвращает (хост, порт).
+    """
+    parts = urlsplit(url)
+    if parts.scheme != "https":
+        raise UnsafeWebhookURL("Only https webhooks are allowed.")
+    host = (parts.hostname or "").rstrip(".").lower()
+    if not host:
+        raise UnsafeWebhookURL("Webhook URL has no host.")
+    allowed = notifications_setting("WEBHOOK_ALLOWED_HOSTS")
+    if allowed and host not in allowed:
+        raise UnsafeWebhookURL(f"Host {host} is not in the webhook allowlist.")
+    if host in BLOCKED_HOSTNAMES or host.endswith(".localhost"):
+        raise UnsafeWebhookURL(f"Host {host} is not public.")
+    if _is_ip(host):
+        _check_address(host)
+    try:
+        port = parts.port or 443
+    except ValueError as exc:
+        raise UnsafeWebhookURL("Invalid port.") from exc
+    return host, port
+
+
+def resolve_webhook_url(url):
+    """
+    (хост, порт, адрес) для отправки: имя разрешается заново при каждой отправке и все его адреса
+    проверяются — иначе внутренний адрес можно подставить через DNS уже после сохранения настроек.
+    Соединение затем открывается именно с проверенным адресом.
+    """
+    host, port = check_webhook_url(url)
+    try:
+        infos = socket.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    except OSError as exc:
+        raise UnsafeWebhookURL(f"Cannot resolve {host}: {exc}") from exc
+    addresses = [info[4][0] for info in infos]
+    for address in addresses:
+        _check_address(address)
+    return host, port, addresses[0]
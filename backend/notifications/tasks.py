@@ -0,0 +1,20 @@
+from celery import shared_task
+from django.core.cache import cache
+
+from .services.digests import dispatch_notifications as dispatch
+from .services.inbox import fan_out
+
+LOCK_KEY = "notifications:dispatch"
+LOCK_TIMEOUT = 10 * 60
+
+
+@shared_task
+def dispatch_notifications():
+    # Пересекающиеся прогоны отправили бы одни и те же дайджесты дважды
+    if not cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        return None
+    try:
+        fan_out()
+        return dispatch()
+    finally:
+        cache.delete(LOCK_KEY)
@@ -0,0 +1,104 @@
+import http.client
+import json
+import logging
+import socket
+import sys
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+
+from .services.digests import render_digest
+from .services.webhooks import UnsafeWebhookURL, resolve_webhook_url
+
+logger = logging.getLogger(__name__)
+
+
+class EmailTransport:
+    """Письма пачки уходят через одно соединение EMAIL_BACKEND."""
+
+    def send(self, digests):
+        messages = []
+        for digest in digests:
+            subject, body = render_digest(digest)
+            messages.append(EmailMessage(subject, body, to=[digest["email"]]))
+        with get_connection() as connection:
+            connection.send_messages(messages)
+        return {digest["user"] for digest in digests}
+
+
+class PinnedHTTPSConnection(http.client.HTTPSConnection):
+    """HTTPS к заранее проверенному адресу: сертификат и Host — по имени, TCP — на address."""
+
+    def __init__(self, host, port, address, **kwargs):
+        super().__init__(host, port, **kwargs)
+        self.address = address
+
+    def connect(self):
+        sock = socket.create_connection((self.address, self.port), self.timeout)
+        self.sock = self._context.wrap_socket(sock, server_hostname=self.host)
+
+
+class WebhookTransport:
+    def send(self, digests):
+        delivered = set()
+        for digest in digests:
+            if not digest["webhook_url"]:
+                continue
+            payload = {"user": digest["user"], "notifications": digest["notifications"]}
+            try:
+                if self.post(digest["webhook_url"], payload):
+                    delivered.add(digest["user"])
+            except UnsafeWebhookURL as exc:
+                logger.warning("Webhook %s for user %s rejected: %s", digest["webhook_url"], digest["user"], exc)
+            except (OSError, http.client.HTTPException) as exc:
+                logger.warning("Webhook %s for user %s failed: %s", digest["webhook_url"], digest["user"], exc)
+        return delivered
+
+    def post(self, url, payload):
+        # Адрес проверяется при каждой отправке: DNS мог смениться после сохранения настроек.
+        # Редиректы не выполняются — иначе через них можно увести запрос во внутреннюю сеть
+        host, port, address = resolve_webhook_url(url)
+        parts = urlsplit(url)
+        path = parts.path or "/"
+        if parts.query:
+            path = f"{path}?{parts.query}"
+        connection = PinnedHTTPSConnection(host, port, address, timeout=settings.NOTIFICATIONS["WEBHOOK_TIMEOUT"])
+        try:
+            connection.request(
+                "POST", path, body=json.dumps(payload).encode(), headers={"Content-Type": "application/json"}
+            )
+            return 200 <= connection.getresponse().status < 300
+        finally:
+            connection.close()
+
+
+class ConsoleTransport:
+    """Для локального запуска: дайджест печатается в stdout."""
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, digests):
+        for digest in digests:
+            subject, body = render_digest(digest)
+            self.stream.write(f"To: {digest['email']} [{digest['channel']}]\nSubject: {subject}\n\n{body}\n\n")
+        self.stream.flush()
+        return {digest["user"] for digest in digests}
+
+
+class FileTransport:
+    """Для тестов и отладки: дайджесты дописываются в NDJSON-файл NOTIFICATIONS["FILE_PATH"]."""
+
+    def __init__(self, path=None):
+        self.path = Path(path or settings.NOTIFICATIONS["FILE_PATH"])
+
+    def send(self, digests):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self.path.open("a") as output:
+            for digest in digests:
+                subject, body = render_digest(digest)
+                record = {key: digest[key] for key in ("user", "email", "channel", "notifications")}
+                output.write(json.dumps({**record, "subject": subject, "body": body}, ensure_ascii=False) + "\n")
+        return {digest["user"] for digest in digests}
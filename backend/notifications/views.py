@@ -1,2 +1,52 @@
+from django.utils import timezone
+from rest_framework import mixins, viewsets
+from rest_framework.decorators import action
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
+from apps.tasks.pagination import BoundedCursorPagination
+
+from .models import Notification, NotificationSettings
+from .serializers import MarkReadSerializer, NotificationSerializer, NotificationSettingsSerializer
+
+
+class NotificationCursorPagination(BoundedCursorPagination):
+    ordering = ("-id",)
+
+
+class NotificationViewSet(mixins.ListModelMixin, viewsets.GenericViewSet):
+    """Входящие уведомления текущего пользователя; ?unread=1 — только непрочитанные."""
+
+    serializer_class = NotificationSerializer
+    permission_classes = [IsAuthenticated]
+    pagination_class = NotificationCursorPagination
+
+    def get_queryset(self):
+        qs = Notification.objects.filter(recipient=self.request.user).select_related("task", "actor")
+        if self.request.query_params.get("unread") in ("1", "true"):
+            qs = qs.filter(read_at__isnull=True)
+        return qs
+
+    @action(detail=False, methods=["post"])
+    def read(self, request):
+        serializer = MarkReadSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        qs = Notification.objects.filter(recipient=request.user, read_at__isnull=True)
+        if "ids" in serializer.validated_data:
+            qs = qs.filter(pk__in=serializer.validated_data["ids"])
+        return Response({"updated": qs.update(read_at=timezone.now())})
+
+    @action(detail=False, methods=["get"])
+    def unread_count(self, request):
+        count = Notification.objects.filter(recipient=request.user, read_at__isnull=True).count()
+        return Response({"count": count})
+
+    @action(detail=False, methods=["get", "patch"], url_path="settings")
+    def preferences(self, request):
+        preferences, _ = NotificationSettings.objects.get_or_create(user=request.user)
+        if request.method == "GET":
+            return Response(NotificationSettingsSerializer(preferences).data)
+        serializer = NotificationSettingsSerializer(preferences, data=request.data, partial=True)
+        serializer.is_valid(raise_exception=True)
+        serializer.save()
+        return Response(serializer.data)
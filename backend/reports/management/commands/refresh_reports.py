@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from reports.services.rollups import refresh_reports
+
+
+class Command(BaseCommand):
+    help = "Переносит изменённые задачи в факты отчётов и пересчитывает дневные итоги"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--full", action="store_true", help="Пройти все задачи и пересобрать все итоги")
+
+    def handle(self, *args, **options):
+        processed = refresh_reports(full=options["full"])
+        self.stdout.write(self.style.SUCCESS(f"Просмотрено задач: {processed}"))
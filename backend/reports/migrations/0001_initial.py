@@ -0,0 +1,59 @@
+# Generated by Django 5.2.18 on 2026-10-18 06:24
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('workspaces', '0003_alter_userworkspacerole_unique_together'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ReportWatermark',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=50, unique=True)),
+                ('value', models.DateTimeField()),
+            ],
+        ),
+        migrations.CreateModel(
+            name='DailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('assignee_id', models.BigIntegerField(default=0)),
+                ('day', models.DateField()),
+                ('created_count', models.PositiveIntegerField(default=0)),
+                ('closed_count', models.PositiveIntegerField(default=0)),
+                ('cycle_hours', models.FloatField(default=0)),
+                ('estimated_hours', models.PositiveIntegerField(default=0)),
+                ('actual_hours', models.PositiveIntegerField(default=0)),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='daily_rollups', to='workspaces.workspace')),
+            ],
+            options={
+                'unique_together': {('workspace', 'day', 'assignee_id')},
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskFact',
+            fields=[
+                ('task_id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('assignee_id', models.BigIntegerField(default=0)),
+                ('created_at', models.DateTimeField()),
+                ('created_day', models.DateField()),
+                ('closed_at', models.DateTimeField(blank=True, null=True)),
+                ('closed_day', models.DateField(blank=True, null=True)),
+                ('due_date', models.DateTimeField(blank=True, null=True)),
+                ('estimated_time', models.PositiveIntegerField(blank=True, null=True)),
+                ('actual_time', models.PositiveIntegerField(blank=True, null=True)),
+                ('workspace', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='task_facts', to='workspaces.workspace')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['workspace', 'created_day'], name='taskfact_workspace_created_idx'), models.Index(fields=['workspace', 'closed_day'], name='taskfact_workspace_closed_idx'), models.Index(fields=['workspace', 'due_date'], name='taskfact_workspace_due_idx')],
+            },
+        ),
+    ]
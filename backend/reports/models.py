@@ -1,2 +1,59 @@
+from django.db import models
 
-# Create your models here.
+from apps.workspaces.models import Workspace
+
+
+class ReportWatermark(models.Model):
+    """До какого updated_at задачи уже перенесены в факты (см. reports.services.rollups)."""
+
+    name = models.CharField(max_length=50, unique=True)
+    value = models.DateTimeField()
+
+    def __str__(self):
+        return f"{self.name}: {self.value}"
+
+
+class TaskFact(models.Model):
+    """Сжатая копия задачи для отчётов: только то, что нужно метрикам."""
+
+    # Без FK: факт удалённой задачи убирает обновление отчётов, заодно пересчитывая её дни
+    task_id = models.BigIntegerField(primary_key=True)
+    workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, related_name="task_facts")
+    assignee_id = models.BigIntegerField(default=0)  # 0 — без исполнителя
+    created_at = models.DateTimeField()
+    created_day = models.DateField()
+    closed_at = models.DateTimeField(null=True, blank=True)
+    closed_day = models.DateField(null=True, blank=True)
+    due_date = models.DateTimeField(null=True, blank=True)
+    estimated_time = models.PositiveIntegerField(null=True, blank=True)
+    actual_time = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["workspace", "created_day"], name="taskfact_workspace_created_idx"),
+            models.Index(fields=["workspace", "closed_day"], name="taskfact_workspace_closed_idx"),
+            models.Index(fields=["workspace", "due_date"], name="taskfact_workspace_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"Task {self.task_id} ({self.workspace_id})"
+
+
+class DailyRollup(models.Model):
+    """Итоги дня по исполнителю; по пространству — сумма строк его исполнителей."""
+
+    workspace = models.ForeignKey(Workspace, on_delete=models.CASCADE, related_name="daily_rollups")
+    assignee_id = models.BigIntegerField(default=0)
+    day = models.DateField()
+    created_count = models.PositiveIntegerField(default=0)
+    closed_count = models.PositiveIntegerField(default=0)
+    # По задачам, закрытым в этот день
+    cycle_hours = models.FloatField(default=0)
+    estimated_hours = models.PositiveIntegerField(default=0)
+    actual_hours = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ("workspace", "day", "assignee_id")
+
+    def __str__(self):
+        return f"{self.workspace_id} {self.day} [{self.assignee_id}]: +{self.created_count} -{self.closed_count}"
@@ -0,0 +1,127 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from reports.models import DailyRollup, TaskFact
+
+PERCENTILES = (50, 85, 95)
+
+
+def _day_start(day):
+    return datetime.combine(day, time.min, tzinfo=timezone.get_current_timezone())
+
+
+def _percentiles(values):
+    if not values.size:
+        return {f"p{q}": None for q in PERCENTILES}
+    values = np.percentile(values, PERCENTILES)
+    return {f"p{q}": round(float(value), 2) for q, value in zip(PERCENTILES, values, strict=True)}
+
+
+def _timestamps(values):
+    return np.array([value.timestamp() if value is not None else np.inf for value in values], dtype=np.float64)
+
+
+def _daily_series(rollups, date_from, days):
+    created = np.zeros(len(days), dtype=np.int64)
+    closed = np.zeros(len(days), dtype=np.int64)
+    rows = (
+        rollups.filter(day__range=(days[0], days[-1]))
+        .order_by()
+        .values_list("day")
+        .annotate(created=Sum("created_count"), closed=Sum("closed_count"))
+    )
+    for day, created_count, closed_count in rows:
+        created[(day - date_from).days] = created_count
+        closed[(day - date_from).days] = closed_count
+    before = rollups.filter(day__lt=date_from).aggregate(created=Sum("created_count"), closed=Sum("closed_count"))
+    # Остаток на конец дня: всё созданное до него минус всё закрытое до него
+    remaining = (before["created"] or 0) - (before["closed"] or 0) + np.cumsum(created - closed)
+    return created, closed, remaining
+
+
+def _overdue_series(facts, days):
+    """
+    Просроченные на конец каждого дня: задача уже создана, срок прошёл, а закрыта она не раньше конца дня.
+    Для конца дня e это #(max(due, created) < e) - #(max(due, created, closed) < e), оба члена — searchsorted.
+    """
+    ends = _timestamps([_day_start(day + timedelta(days=1)) for day in days])
+    rows = facts.filter(
+        Q(closed_at__isnull=True) | Q(closed_at__gte=_day_start(days[0])),
+        due_date__lt=_day_start(days[-1] + timedelta(days=1)),
+    ).values_list("due_date", "created_at", "closed_at")
+    if not rows:
+        return np.zeros(len(days), dtype=np.int64)
+    due, created, closed = (_timestamps(column) for column in zip(*rows, strict=True))
+    became_overdue = np.maximum(due, created)
+    resolved = np.maximum(became_overdue, closed)
+    became_overdue.sort()
+    resolved.sort()
+    return np.searchsorted(became_overdue, ends) - np.searchsorted(resolved, ends)
+
+
+def _closed_task_metrics(facts, days):
+    rows = facts.filter(closed_day__range=(days[0], days[-1])).values_list(
+        "created_at", "closed_at", "estimated_time", "actual_time"
+    )
+    if rows:
+        created, closed, estimated, actual = zip(*rows, strict=True)
+    else:
+        created = closed = estimated = actual = ()
+    cycle = (_timestamps(closed) - _timestamps(created)) / 3600
+    estimated = np.array(estimated, dtype=np.float64)
+    actual = np.array(actual, dtype=np.float64)
+    # None превращается в nan — сравниваем только задачи, где есть и оценка, и факт
+    both = ~(np.isnan(estimated) | np.isnan(actual))
+    estimated, actual = estimated[both], actual[both]
+
+    return {
+        "cycle_time_hours": {
+            "count": int(cycle.size),
+            "mean": round(float(cycle.mean()), 2) if cycle.size else None,
+            **_percentiles(cycle),
+        },
+        "estimate_variance_hours": {
+            "count": int(actual.size),
+            "estimated": int(estimated.sum()),
+            "actual": int(actual.sum()),
+            "ratio": round(float(actual.sum() / estimated.sum()), 3) if estimated.sum() else None,
+            **_percentiles(actual - estimated),
+        },
+    }
+
+
+def workspace_report(workspace_id, date_from, date_to, assignee=None):
+    """
+    Отчёт по пространству (или исполнителю, 0 — без исполнителя) за [date_from, date_to].
+    Дневные ряды берутся из DailyRollup, перцентили — из TaskFact; таблица задач не читается.
+    """
+    days = [date_from + timedelta(days=offset) for offset in range((date_to - date_from).days + 1)]
+    rollups = DailyRollup.objects.filter(workspace_id=workspace_id)
+    facts = TaskFact.objects.filter(workspace_id=workspace_id)
+    if assignee is not None:
+        rollups = rollups.filter(assignee_id=assignee)
+        facts = facts.filter(assignee_id=assignee)
+
+    created, closed, remaining = _daily_series(rollups, date_from, days)
+    overdue = _overdue_series(facts, days)
+    return {
+        "workspace": workspace_id,
+        "assignee": assignee,
+        "date_from": date_from,
+        "date_to": date_to,
+        "throughput": {"closed": int(closed.sum()), "per_day": round(float(closed.mean()), 2)},
+        **_closed_task_metrics(facts, days),
+        "days": [
+            {
+                "day": day,
+                "created": int(created[index]),
+                "closed": int(closed[index]),
+                "remaining": int(remaining[index]),
+                "overdue": int(overdue[index]),
+            }
+            for index, day in enumerate(days)
+        ],
+    }
@@ -0,0 +1,23 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.utils import timezone
+from rest_framework import serializers
+
+DEFAULT_RANGE_DAYS = 30
+
+
+class ReportQuerySerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    assignee = serializers.IntegerField(min_value=0, required=False, help_text="0 — задачи без исполнителя")
+
+    def validate(self, attrs):
+        attrs.setdefault("date_to", timezone.localdate())
+        attrs.setdefault("date_from", attrs["date_to"] - timedelta(days=DEFAULT_RANGE_DAYS - 1))
+        if attrs["date_from"] > attrs["date_to"]:
+            raise serializers.ValidationError({"date_from": ["Must not be later than date_to."]})
+        max_days = settings.REPORTS["MAX_RANGE_DAYS"]
+        if (attrs["date_to"] - attrs["date_from"]).days >= max_days:
+            raise serializers.ValidationError({"date_from": [f"Range must not exceed {max_days} days."]})
+        return attrs
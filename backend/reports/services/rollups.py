@@ -0,0 +1,190 @@
+import logging
+from collections import defaultdict
+from datetime import timedelta
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Exists, Max, OuterRef, Q
+from django.utils import timezone
+
+from apps.tasks.models import Task, TaskLog
+from reports.models import DailyRollup, ReportWatermark, TaskFact
+
+logger = logging.getLogger(__name__)
+
+WATERMARK = "task_facts"
+TASK_FIELDS = (
+    "pk",
+    "workspace_id",
+    "assignee_id",
+    "created_at",
+    "updated_at",
+    "due_date",
+    "estimated_time",
+    "actual_time",
+    "status__is_closed",
+)
+FACT_FIELDS = (
+    "workspace_id",
+    "assignee_id",
+    "created_at",
+    "created_day",
+    "closed_at",
+    "closed_day",
+    "due_date",
+    "estimated_time",
+    "actual_time",
+)
+DAYS_PER_QUERY = 500
+
+
+def reports_setting(name):
+    return settings.REPORTS[name]
+
+
+def _fact_days(fact):
+    return {(fact.workspace_id, day) for day in (fact.created_day, fact.closed_day) if day is not None}
+
+
+def _close_times(task_ids):
+    """Время последней смены статуса по журналу: updated_at сдвигают и правки уже закрытой задачи."""
+    rows = (
+        TaskLog.objects.filter(task_id__in=task_ids, action="update", changes__has_key="status")
+        .order_by()
+        .values("task_id")
+        .annotate(last=Max("timestamp"))
+        .values_list("task_id", "last")
+    )
+    return dict(rows)
+
+
+def _apply_chunk(rows):
+    """Переносит пачку задач в факты. Возвращает (workspace_id, день), чьи итоги надо пересчитать."""
+    existing = TaskFact.objects.in_bulk([row["pk"] for row in rows])
+    newly_closed = [
+        row["pk"]
+        for row in rows
+        if row["status__is_closed"] and not (row["pk"] in existing and existing[row["pk"]].closed_at)
+    ]
+    close_times = _close_times(newly_closed) if newly_closed else {}
+
+    facts, affected = [], set()
+    for row in rows:
+        old = existing.get(row["pk"])
+        closed_at = None
+        if row["status__is_closed"]:
+            closed_at = old.closed_at if old and old.closed_at else close_times.get(row["pk"], row["updated_at"])
+        fact = TaskFact(
+            task_id=row["pk"],
+            workspace_id=row["workspace_id"],
+            assignee_id=row["assignee_id"] or 0,
+            created_at=row["created_at"],
+            created_day=timezone.localdate(row["created_at"]),
+            closed_at=closed_at,
+            closed_day=timezone.localdate(closed_at) if closed_at else None,
+            due_date=row["due_date"],
+            estimated_time=row["estimated_time"],
+            actual_time=row["actual_time"],
+        )
+        if old is not None:
+            if all(getattr(old, field) == getattr(fact, field) for field in FACT_FIELDS):
+                continue
+            affected |= _fact_days(old)
+        affected |= _fact_days(fact)
+        facts.append(fact)
+
+    TaskFact.objects.bulk_create(
+        facts, update_conflicts=True, unique_fields=["task_id"], update_fields=list(FACT_FIELDS)
+    )
+    return affected
+
+
+def _drop_deleted_facts():
+    # Удаление задачи не оставляет следа в updated_at — ищем факты без задачи, это anti-join по pk
+    gone = list(TaskFact.objects.filter(~Exists(Task.objects.filter(pk=OuterRef("task_id")))))
+    affected = set()
+    for fact in gone:
+        affected |= _fact_days(fact)
+    TaskFact.objects.filter(pk__in=[fact.pk for fact in gone]).delete()
+    return affected
+
+
+def _rebuild_days(workspace_id, days):
+    days_set = set(days)
+    facts = (
+        TaskFact.objects.filter(workspace_id=workspace_id)
+        .filter(Q(created_day__in=days) | Q(closed_day__in=days))
+        .values_list(
+            "assignee_id", "created_at", "created_day", "closed_at", "closed_day", "estimated_time", "actual_time"
+        )
+    )
+    rollups = {}
+
+    def rollup(assignee_id, day):
+        key = (assignee_id, day)
+        if key not in rollups:
+            rollups[key] = DailyRollup(workspace_id=workspace_id, assignee_id=assignee_id, day=day)
+        return rollups[key]
+
+    for assignee_id, created_at, created_day, closed_at, closed_day, estimated, actual in facts:
+        if created_day in days_set:
+            rollup(assignee_id, created_day).created_count += 1
+        if closed_day in days_set:
+            item = rollup(assignee_id, closed_day)
+            item.closed_count += 1
+            item.cycle_hours += (closed_at - created_at).total_seconds() / 3600
+            if estimated is not None and actual is not None:
+                item.estimated_hours += estimated
+                item.actual_hours += actual
+
+    DailyRollup.objects.filter(workspace_id=workspace_id, day__in=days).delete()
+    DailyRollup.objects.bulk_create(rollups.values())
+
+
+def rebuild_rollups(affected):
+    """Пересчитывает итоги затронутых дней целиком по фактам: дешевле и надёжнее, чем приращения."""
+    days_by_workspace = defaultdict(set)
+    for workspace_id, day in affected:
+        days_by_workspace[workspace_id].add(day)
+    for workspace_id, days in days_by_workspace.items():
+        days = sorted(days)
+        for start in range(0, len(days), DAYS_PER_QUERY):
+            _rebuild_days(workspace_id, days[start : start + DAYS_PER_QUERY])
+
+
+def refresh_reports(full=False):
+    """
+    Переносит в факты задачи, изменённые после отметки, и пересчитывает итоги затронутых дней.
+    Каждая пачка коммитится вместе со сдвигом отметки, так что прерванный прогон продолжится с места.
+    full — пройти все задачи и пересобрать все итоги (после правок в обход updated_at, например is_closed статуса).
+    Возвращает число просмотренных задач.
+    """
+    watermark = ReportWatermark.objects.filter(name=WATERMARK).first()
+    tasks = Task.objects.order_by("updated_at", "pk").values(*TASK_FIELDS)
+    if watermark is not None and not full:
+        tasks = tasks.filter(updated_at__gt=watermark.value - timedelta(seconds=reports_setting("LAG")))
+    high = watermark.value if watermark is not None else None
+
+    chunk_size = reports_setting("CHUNK_SIZE")
+    rows = tasks.iterator(chunk_size=chunk_size)
+    processed = 0
+    while chunk := list(islice(rows, chunk_size)):
+        with transaction.atomic():
+            rebuild_rollups(_apply_chunk(chunk))
+            high = max(high, chunk[-1]["updated_at"]) if high else chunk[-1]["updated_at"]
+            ReportWatermark.objects.update_or_create(name=WATERMARK, defaults={"value": high})
+        processed += len(chunk)
+
+    with transaction.atomic():
+        affected = _drop_deleted_facts()
+        if full:
+            DailyRollup.objects.all().delete()
+            for field in ("created_day", "closed_day"):
+                affected |= set(
+                    TaskFact.objects.exclude(**{f"{field}__isnull": True}).values_list("workspace_id", field).distinct()
+                )
+        rebuild_rollups(affected)
+
+    logger.info("Reports refreshed: %s tasks scanned, watermark %s", processed, high)
+    return processed
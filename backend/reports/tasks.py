@@ -0,0 +1,18 @@
+from celery import shared_task
+from django.core.cache import cache
+
+from .services.rollups import refresh_reports as refresh
+
+LOCK_KEY = "reports:refresh"
+LOCK_TIMEOUT = 60 * 60
+
+
+@shared_task
+def refresh_reports(full=False):
+    # Прогоны по расписанию не должны накладываться: второй просто пропускается
+    if not cache.add(LOCK_KEY, 1, LOCK_TIMEOUT):
+        return None
+    try:
+        return refresh(full=full)
+    finally:
+        cache.delete(LOCK_KEY)
@@ -0,0 +1,11 @@
+from django.urls import path, include
+from rest_framework import routers
+
+from .views import WorkspaceReportViewSet
+
+router = routers.DefaultRouter()
+router.register(r"workspaces", WorkspaceReportViewSet, basename="workspace-reports")
+
+urlpatterns = [
+    path("", include(router.urls)),
+]
@@ -1,2 +1,24 @@
+from django.http import Http404
+from rest_framework import viewsets
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
 
-# Create your views here.
+from apps.workspaces.membership import get_user_workspace_ids
+
+from .selectors.metrics import workspace_report
+from .serializers import ReportQuerySerializer
+
+
+class WorkspaceReportViewSet(viewsets.ViewSet):
+    """Аналитика пространства из предрасчитанных итогов (см. reports.services.rollups)."""
+
+    permission_classes = [IsAuthenticated]
+    lookup_value_regex = r"\d+"
+
+    def retrieve(self, request, pk=None):
+        workspace_id = int(pk)
+        if workspace_id not in get_user_workspace_ids(request.user):
+            raise Http404
+        query = ReportQuerySerializer(data=request.query_params)
+        query.is_valid(raise_exception=True)
+        return Response(workspace_report(workspace_id, **query.validated_data))
@@ -32,6 +32,14 @@ def enable_db_access_for_all_tests(db):
 def disable_es_signals():
     registry.signal_processor = BaseSignalProcessor(registry)
 
+@pytest.fixture(scope="session", autouse=True)
+def media_root(tmp_path_factory):
+    # MEDIA_ROOT не задан — без этого вложения из тестов пишутся в task_attachments/ исходников
+    from django.test import override_settings
+
+    with override_settings(MEDIA_ROOT=str(tmp_path_factory.mktemp("media"))):
+        yield
+
 @pytest.fixture
 def admin_user(create_user):
     return create_user(is_staff=True, is_superuser=True)
@@ -119,6 +127,23 @@ def create_task(create_workspace, create_user):
 
 @pytest.fixture(autouse=True)
 def disable_signals():
-    signals.post_save.receivers = []
-    signals.pre_save.receivers = []
-    signals.post_delete.receivers = []
+    for signal in (signals.post_save, signals.pre_save, signals.post_delete):
+        signal.receivers = []
+        # Иначе Signal отдаёт закешированных по sender получателей, снятых выше
+        signal.sender_receivers_cache.clear()
+
+@pytest.fixture(autouse=True)
+def clear_caches():
+    # pk переиспользуются между тестами, а post_save выключен — кеши членства и прав чистим вручную
+    from django.core.cache import cache
+    from apps.tasks import search_routing
+    from apps.tasks.selectors import suggest
+    from apps.users import permission_matrix
+    from apps.workspaces import membership
+
+    cache.clear()
+    membership.get_local_cache().clear()
+    permission_matrix.get_local_cache().clear()
+    permission_matrix.get_version_cache().clear()
+    suggest.get_local_cache().clear()
+    search_routing.get_local_cache().clear()
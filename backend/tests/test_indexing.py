@@ -0,0 +1,379 @@
+from unittest.mock import MagicMock, call, patch
+
+import pytest
+from elasticsearch import ConnectionError as ESConnectionError
+
+from apps.indexing.models import IndexingDeadLetter
+from apps.indexing.queue import get_index_queue, make_key
+from apps.indexing.signals import QueuedSignalProcessor
+from apps.indexing.tasks import flush_index_queue
+from apps.tasks.models import Task
+
+
+@pytest.fixture
+def index_queue():
+    queue = get_index_queue()
+    queue.clear()
+    yield queue
+    queue.clear()
+
+
+@pytest.fixture
+def processor():
+    # setup() не вызываем: сигналы в тестах отключены, обработчики дёргаем напрямую
+    return QueuedSignalProcessor.__new__(QueuedSignalProcessor)
+
+
+@pytest.mark.django_db
+def test_save_is_queued_after_commit_without_es_call(
+    processor, index_queue, create_task, django_capture_on_commit_callbacks
+):
+    task = create_task()
+
+    with patch("apps.indexing.tasks.flush_index_queue.apply_async") as apply_async:
+        with patch("apps.indexing.services.bulk_index.helpers.bulk") as bulk:
+            with django_capture_on_commit_callbacks(execute=True):
+                processor.handle_save(task.__class__, task)
+                processor.handle_save(task.__class__, task)
+
+    bulk.assert_not_called()
+    apply_async.assert_called_once()
+    assert index_queue.pop(10) == [make_key(task)]
+
+
+@pytest.mark.django_db
+def test_flush_coalesces_queue_into_one_bulk_request(index_queue, create_task):
+    task = create_task()
+    deleted = create_task()
+    deleted_key = make_key(deleted)
+    deleted.delete()
+    index_queue.push([make_key(task), deleted_key, make_key(task)])
+
+    with patch("apps.indexing.services.bulk_index.helpers.bulk", return_value=(2, [])) as bulk:
+        flush_index_queue.apply()
+
+    bulk.assert_called_once()
+    actions = {(action["_op_type"], action["_id"]) for action in bulk.call_args.args[1]}
+    assert ("index", task.pk) in actions
+    assert ("delete", int(deleted_key.rsplit(":", 1)[1])) in actions
+    assert len(index_queue) == 0
+
+
+@pytest.mark.django_db
+def test_rejected_documents_go_to_dead_letter(index_queue, create_task):
+    task = create_task()
+    index_queue.push([make_key(task)])
+    error = {"index": {"_index": "tasks", "_id": str(task.pk), "status": 400, "error": "mapper_parsing_exception"}}
+
+    with patch("apps.indexing.services.bulk_index.helpers.bulk", return_value=(0, [error])):
+        flush_index_queue.apply()
+
+    entry = IndexingDeadLetter.objects.get()
+    assert entry.queue_key == make_key(task)
+    assert "mapper_parsing_exception" in entry.error
+
+
+@pytest.mark.django_db
+def test_transport_errors_are_retried_then_dead_lettered(index_queue, create_task, settings):
+    settings.ELASTICSEARCH_INDEX_PIPELINE = {**settings.ELASTICSEARCH_INDEX_PIPELINE, "MAX_RETRIES": 2}
+    task = create_task()
+
+    with patch(
+        "apps.indexing.services.bulk_index.helpers.bulk", side_effect=ESConnectionError("es is down")
+    ) as bulk:
+        flush_index_queue.apply(kwargs={"keys": [make_key(task)]})
+
+    assert bulk.call_count == 3
+    entry = IndexingDeadLetter.objects.get()
+    assert entry.attempts == 3
+
+
+@pytest.fixture
+def es_client():
+    client = MagicMock()
+    client.update_by_query.return_value = {"updated": 3, "took": 5}
+    client.delete_by_query.return_value = {"deleted": 3, "took": 5}
+    with patch("apps.indexing.services.related_updates.connections.get_connection", return_value=client):
+        yield client
+
+
+@pytest.mark.django_db
+def test_workspace_rename_patches_tasks_in_place(index_queue, create_task, es_client):
+    task = create_task()
+    workspace = task.workspace
+    workspace.name = "Renamed"
+    workspace.save()
+    index_queue.push([make_key(workspace)])
+
+    with patch("apps.indexing.services.bulk_index.helpers.bulk", return_value=(0, [])) as bulk:
+        flush_index_queue.apply()
+
+    bulk.assert_not_called()
+    kwargs = es_client.update_by_query.call_args.kwargs
+    assert kwargs["index"] == "tasks"
+    assert kwargs["query"] == {"term": {"workspace.id": workspace.id}}
+    assert kwargs["script"]["params"] == {"name": "Renamed"}
+
+
+@pytest.mark.django_db
+def test_label_delete_removes_label_from_documents(
+    processor, create_task, create_label, es_client, django_capture_on_commit_callbacks
+):
+    task = create_task()
+    label = create_label(task.workspace)
+    task.labels.add(label)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        processor.handle_pre_delete(label.__class__, label)
+
+    kwargs = es_client.update_by_query.call_args.kwargs
+    assert kwargs["script"]["params"] == {"id": label.id}
+    assert "removeIf" in kwargs["script"]["source"]
+
+
+@pytest.mark.django_db
+def test_reverse_m2m_change_reindexes_tasks(processor, index_queue, create_task, create_label):
+    task = create_task()
+    label = create_label(task.workspace)
+
+    with patch.object(processor, "enqueue") as enqueue:
+        processor.handle_m2m_changed(
+            Task.labels.through, label, "post_add", model=Task, pk_set={task.pk}, reverse=True
+        )
+
+    assert enqueue.call_args.args[0] == [make_key(task)]
+
+
+@pytest.fixture
+def reindex_client():
+    client = MagicMock()
+    client.indices.get_alias.return_value = {"tasks_old": {"aliases": {"tasks": {}}}}
+    with patch("apps.tasks.management.commands.reindex_tasks.connections.get_connection", return_value=client):
+        yield client
+
+
+def _bulk_calls(bulk):
+    return [action for call in bulk.call_args_list for action in call.args[1]]
+
+
+@pytest.mark.django_db
+def test_reindex_tasks_builds_new_index_and_swaps_alias(reindex_client, create_task, tmp_path):
+    from django.core.management import call_command
+
+    tasks = [create_task(title=f"Task {i}") for i in range(5)]
+    checkpoint = tmp_path / "checkpoint.json"
+
+    with patch(
+        "apps.tasks.management.commands.reindex_tasks.helpers.bulk",
+        side_effect=lambda client, actions, **kwargs: (len(actions), []),
+    ) as bulk:
+        call_command("reindex_tasks", chunk_size=2, workers=1, checkpoint=str(checkpoint))
+
+    create_kwargs = reindex_client.indices.create.call_args.kwargs
+    new_index = create_kwargs["index"]
+    assert new_index.startswith("tasks_")
+    assert create_kwargs["settings"]["refresh_interval"] == "-1"
+
+    loaded = _bulk_calls(bulk)
+    assert {action["_id"] for action in loaded} == {task.pk for task in tasks}
+    assert all(action["_index"] == new_index for action in loaded)
+
+    alias_actions = reindex_client.indices.update_aliases.call_args.kwargs["actions"]
+    assert {"add": {"index": new_index, "alias": "tasks"}} in alias_actions
+    assert {"remove": {"index": "tasks_old", "alias": "tasks"}} in alias_actions
+    reindex_client.indices.delete.assert_called_once_with(index="tasks_old")
+    assert not checkpoint.exists()
+
+
+@pytest.mark.django_db
+def test_reindex_tasks_resumes_from_checkpoint(reindex_client, create_task, tmp_path):
+    import json
+
+    from django.core.management import call_command
+    from django.utils import timezone
+
+    tasks = [create_task(title=f"Task {i}") for i in range(4)]
+    checkpoint = tmp_path / "checkpoint.json"
+    checkpoint.write_text(
+        json.dumps({"index": "tasks_resumed", "last_pk": tasks[1].pk, "started_at": timezone.now().isoformat()})
+    )
+
+    with patch(
+        "apps.tasks.management.commands.reindex_tasks.helpers.bulk",
+        side_effect=lambda client, actions, **kwargs: (len(actions), []),
+    ) as bulk:
+        call_command("reindex_tasks", chunk_size=1, workers=1, checkpoint=str(checkpoint), resume=True)
+
+    reindex_client.indices.create.assert_not_called()
+    assert {action["_id"] for action in _bulk_calls(bulk)} == {tasks[2].pk, tasks[3].pk}
+
+
+@pytest.mark.django_db
+def test_task_document_building_query_count_is_constant(create_task, create_label, create_user):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    from apps.tasks.models import TaskChecklistItem, TaskComment
+    from apps.tasks.search_document import TaskDocument
+
+    def build_documents():
+        document = TaskDocument()
+        with CaptureQueriesContext(connection) as ctx:
+            documents = [document.prepare(task) for task in document.get_indexing_queryset()]
+        return documents, len(ctx.captured_queries)
+
+    def add_tasks(count):
+        for i in range(count):
+            author = create_user()
+            task = create_task(title=f"Task {i}", creator=author, assignee=author)
+            task.labels.add(create_label(task.workspace, name=f"Label {i}"))
+            task.watchers.add(author)
+            TaskComment.objects.create(task=task, author=author, content="comment")
+            TaskChecklistItem.objects.create(task=task, text="item")
+
+    add_tasks(2)
+    documents, small_queries = build_documents()
+    assert documents[0]["comments"][0]["author"]["fio"] == "Test User"
+
+    add_tasks(8)
+    documents, large_queries = build_documents()
+    assert len(documents) == 10
+    assert small_queries == large_queries
+
+
+@pytest.mark.django_db
+def test_tasks_are_routed_by_workspace_and_dedicated_index(
+    settings, processor, index_queue, create_task, create_workspace, es_client, django_capture_on_commit_callbacks
+):
+    from apps.tasks.models import WorkspaceSearchIndex
+    from apps.tasks.search_document import TaskDocument
+    from apps.tasks.selectors.search import build_task_search
+
+    settings.TASK_SEARCH_INDEX = {**settings.TASK_SEARCH_INDEX, "SHARDS": 4}
+    task = create_task()
+    large = create_task()
+    WorkspaceSearchIndex.objects.create(workspace=large.workspace, index_name=f"tasks-ws-{large.workspace_id}")
+    document = TaskDocument()
+
+    action = document._prepare_action(task, "index")
+    assert (action["_index"], action["routing"]) == ("tasks", str(task.workspace_id))
+    action = document._prepare_action(large, "index")
+    assert action["_index"] == f"tasks-ws-{large.workspace_id}" and "routing" not in action
+
+    search = build_task_search("", {}, workspace_ids={task.workspace_id})
+    assert (search._index, search._params["routing"]) == (["tasks"], str(task.workspace_id))
+    search = build_task_search("", {"workspace": str(large.workspace_id)}, workspace_ids={task.workspace_id})
+    assert "routing" not in search._params
+    search = build_task_search("", {}, workspace_ids={task.workspace_id, large.workspace_id})
+    assert search._index == ["tasks", f"tasks-ws-{large.workspace_id}"] and "routing" not in search._params
+
+    # Удалённую задачу без routing не найти на шарде — удаляется запросом по _id во всех индексах задач
+    deleted_key = make_key(task)
+    task.delete()
+    index_queue.push([deleted_key])
+    with patch("apps.indexing.services.bulk_index.helpers.bulk") as bulk:
+        flush_index_queue.apply()
+    bulk.assert_not_called()
+    kwargs = es_client.delete_by_query.call_args.kwargs
+    assert kwargs["index"] == f"tasks,tasks-ws-{large.workspace_id}"
+    assert kwargs["query"] == {"ids": {"values": [deleted_key.rsplit(":", 1)[1]]}}
+
+    # Перенос в другое пространство удаляет копию со старого шарда
+    moved = create_task()
+    old_workspace_id = moved.workspace_id
+    moved = Task.objects.get(pk=moved.pk)
+    moved.workspace = large.workspace
+    with django_capture_on_commit_callbacks(execute=True):
+        processor.handle_pre_save(Task, moved)
+    kwargs = es_client.delete_by_query.call_args.kwargs
+    assert kwargs["index"] == "tasks"
+    assert {"term": {"workspace.id": old_workspace_id}} in kwargs["query"]["bool"]["filter"]
+
+
+@pytest.mark.django_db
+def test_split_task_index_moves_large_workspace(settings, create_task, create_workspace, create_user):
+    from django.core.management import call_command
+
+    from apps.indexing.services.related_updates import apply_related_update
+    from apps.tasks.models import WorkspaceSearchIndex
+    from apps.tasks.search_routing import index_for_workspace
+
+    settings.TASK_SEARCH_INDEX = {**settings.TASK_SEARCH_INDEX, "SHARDS": 4, "DEDICATED_THRESHOLD": 3}
+    large = create_workspace(create_user())
+    for i in range(3):
+        create_task(workspace=large, title=f"Task {i}")
+    small = create_task()
+    deleted = {"query": {"ids": {"values": ["42"]}}, "script": None}
+    client = MagicMock()
+    client.delete_by_query.return_value = {"deleted": 1, "took": 5}
+
+    def reindex(**kwargs):
+        # Задачу удалили, пока шло копирование: удаление попало только в общий индекс
+        apply_related_update("tasks", deleted, "delete:42")
+        return {"total": 3}
+
+    client.reindex.side_effect = reindex
+    registered_on_refresh = []
+    client.indices.refresh.side_effect = lambda **kwargs: registered_on_refresh.append(
+        WorkspaceSearchIndex.objects.exists()
+    )
+
+    with patch("apps.tasks.management.commands.split_task_index.connections.get_connection", return_value=client):
+        with patch(
+            "apps.tasks.management.commands.split_task_index.helpers.bulk",
+            side_effect=lambda client, actions, **kwargs: (len(list(actions)), []),
+        ) as bulk:
+            call_command("split_task_index", settle=0)
+
+    name = f"tasks-ws-{large.id}"
+    assert WorkspaceSearchIndex.objects.get().index_name == name
+    assert client.indices.create.call_args.kwargs["settings"]["number_of_shards"] == 3
+    reindex = client.reindex.call_args.kwargs
+    assert reindex["source"]["query"] == {"term": {"workspace.id": large.id}}
+    assert reindex["dest"] == {"index": name, "routing": "discard"}
+    bulk.assert_called_once()
+    # Индекс открыт для поиска до регистрации, удаление повторено в нём до очистки общего индекса
+    assert registered_on_refresh == [False]
+    assert [call.kwargs["index"] for call in client.delete_by_query.call_args_list] == ["tasks", name, "tasks"]
+    assert client.delete_by_query.call_args_list[1].kwargs["query"] == deleted["query"]
+    assert client.delete_by_query.call_args == call(
+        index="tasks", query={"term": {"workspace.id": large.id}}, conflicts="proceed", routing=str(large.id)
+    )
+    assert index_for_workspace(large.id) == (name, None)
+    assert index_for_workspace(small.workspace_id) == ("tasks", str(small.workspace_id))
+
+
+@pytest.mark.django_db
+def test_reindex_tasks_replays_changes_made_during_load(reindex_client, create_task, tmp_path):
+    from django.core.cache import cache
+    from django.core.management import call_command
+
+    from apps.indexing.services.bulk_index import bulk_index
+    from apps.indexing.services.journal import ACTIVE_KEY
+    from apps.indexing.services.related_updates import apply_related_update
+
+    # related_updates берёт то же соединение, что и команда
+    es_client = reindex_client
+    tasks = [create_task(title=f"Task {i}") for i in range(3)]
+    deleted_pk = tasks[0].pk
+    rename = {"query": {"term": {"workspace.id": tasks[0].workspace_id}}, "script": {"source": "rename"}}
+
+    def load(client, actions, **kwargs):
+        if not es_client.update_by_query.called:
+            # Уже после копирования чанка: переименование связанного объекта и удаление задачи в старом индексе
+            apply_related_update("tasks", rename, "workspaces.workspace:1")
+            deleted_key = make_key(tasks[0])
+            tasks[0].delete()
+            with patch("apps.indexing.services.bulk_index.helpers.bulk", return_value=(1, [])):
+                bulk_index([deleted_key])
+        return len(actions), []
+
+    with patch("apps.tasks.management.commands.reindex_tasks.helpers.bulk", side_effect=load):
+        call_command("reindex_tasks", chunk_size=10, workers=1, checkpoint=str(tmp_path / "checkpoint.json"))
+
+    new_index = reindex_client.indices.create.call_args.kwargs["index"]
+    assert [call.kwargs["index"] for call in es_client.update_by_query.call_args_list] == ["tasks", new_index]
+    es_client.delete_by_query.assert_called_once()
+    assert es_client.delete_by_query.call_args.kwargs["index"] == new_index
+    assert es_client.delete_by_query.call_args.kwargs["query"] == {"ids": {"values": [str(deleted_pk)]}}
+    assert not cache.get(ACTIVE_KEY)
@@ -0,0 +1,135 @@
+import gzip
+import json
+
+import pytest
+from django.core.management import call_command
+
+from apps.tasks.models import Task, TaskComment, TaskDependency, TaskStatus
+from apps.users.models import Role, User
+from apps.workspaces.models import UserWorkspaceRole
+from integration.models import ImportJob, ImportRecord
+from integration.services.importer import TaskImporter
+from integration.services.readers import read_records
+
+
+def interrupted(records, after):
+    for number, record in enumerate(records):
+        if number == after:
+            raise RuntimeError("worker killed")
+        yield record
+
+
+@pytest.mark.django_db
+def test_import_resumes_from_checkpoint_and_remaps_references(tmp_path, create_user, create_workspace):
+    owner = create_user()
+    workspace = create_workspace(owner)
+    UserWorkspaceRole.objects.create(user=owner, workspace=workspace, role=Role.objects.create(name="Member"))
+    outsider = create_user()
+    source = tmp_path / "tasks.ndjson"
+    records = [
+        {
+            "id": "A-1",
+            "title": "Epic",
+            "status": "Done",
+            "is_closed": True,
+            "assignee": "new.person@example.com",
+            "creator": outsider.email,
+            "labels": ["backend"],
+            "created_at": "2023-05-01T10:00:00+00:00",
+            "comments": [{"author": owner.email, "content": "Imported comment"}],
+        },
+        # Ссылки вперёд: родитель и блокирующая задача идут в файле позже
+        {"id": "A-2", "title": "Child", "parent": "A-4", "dependencies": [{"type": "blocks", "to": "A-3"}]},
+        {"id": "A-2", "title": "Duplicate of A-2"},
+        {"id": "A-3", "title": "Blocker", "parent": "A-1", "labels": ["backend", "api"]},
+        {"id": "A-4", "title": "Parent", "dependencies": [{"type": "blocks", "to": "missing"}]},
+    ]
+    source.write_text("".join(json.dumps(record) + "\n" for record in records))
+    job = ImportJob.objects.create(workspace=workspace, created_by=owner, source_format="ndjson")
+    checkpoint = tmp_path / "checkpoint.json"
+
+    importer = TaskImporter(job, checkpoint=checkpoint, batch_size=2, index=False)
+    with pytest.raises(RuntimeError):
+        importer.run(interrupted(read_records(source, "ndjson"), after=3))
+    assert ImportJob.objects.get(pk=job.pk).status == "failed"
+    assert json.loads(checkpoint.read_text())["processed"] == 2
+
+    job.refresh_from_db()
+    resumed = TaskImporter(job, checkpoint=checkpoint, batch_size=2, index=False)
+    assert resumed.run(read_records(source, "ndjson")) == 5
+
+    job.refresh_from_db()
+    assert (job.status, job.processed, job.imported) == ("done", 5, 4)
+    tasks = {record.source_id: record.task for record in ImportRecord.objects.filter(job=job).select_related("task")}
+    assert set(tasks) == {"A-1", "A-2", "A-3", "A-4"}
+    assert Task.objects.filter(workspace=workspace).count() == 4
+    assert tasks["A-2"].parent_task_id == tasks["A-4"].id
+    assert tasks["A-3"].parent_task_id == tasks["A-1"].id
+    dependencies = TaskDependency.objects.values_list("from_task_id", "to_task_id")
+    assert list(dependencies) == [(tasks["A-2"].id, tasks["A-3"].id)]
+
+    epic = tasks["A-1"]
+    assert epic.created_at.year == 2023
+    assert epic.creator == owner
+    assert epic.status.is_closed and epic.status.workspace_id == workspace.id
+    # Учётки не создаются, а не участники пространства не подставляются
+    assert epic.assignee is None
+    assert not User.objects.filter(email="new.person@example.com").exists()
+    assert sorted(tasks["A-3"].labels.values_list("name", flat=True)) == ["api", "backend"]
+    assert TaskComment.objects.get(task=epic).author == owner
+
+    # Повторный запуск завершённого импорта ничего не дублирует
+    job.refresh_from_db()
+    TaskImporter(job, batch_size=2, index=False).run(read_records(source, "ndjson"))
+    assert Task.objects.filter(workspace=workspace).count() == 4
+    assert TaskDependency.objects.count() == 1
+
+
+@pytest.mark.django_db
+def test_import_tasks_command_reads_gzipped_csv(tmp_path, create_user, create_workspace):
+    owner = create_user()
+    workspace = create_workspace(owner)
+    UserWorkspaceRole.objects.create(user=owner, workspace=workspace, role=Role.objects.create(name="Member"))
+    TaskStatus.objects.create(name="Open", workspace=workspace)
+    source = tmp_path / "tasks.csv.gz"
+    with gzip.open(source, "wt", encoding="utf-8") as output:
+        output.write("id,title,status,priority,watchers,parent_task,dependencies\n")
+        output.write(f"1,First,Open,high,{owner.email}|other@example.com,,relates_to:2\n")
+        output.write("2,Second,Review,urgent,,1,\n")
+
+    call_command("import_tasks", str(source), workspace=workspace.id, user=owner.email, skip_index=True)
+
+    first, second = Task.objects.filter(workspace=workspace).order_by("id")
+    assert (first.title, first.priority, first.status.name) == ("First", "high", "Open")
+    assert second.priority == "medium"
+    assert second.parent_task == first
+    assert TaskStatus.objects.filter(workspace=workspace).count() == 2
+    assert set(first.watchers.values_list("email", flat=True)) == {owner.email}
+    assert not User.objects.filter(email="other@example.com").exists()
+    assert TaskDependency.objects.get().dependency_type == "relates_to"
+
+
+@pytest.mark.django_db
+def test_import_skips_malformed_records_instead_of_failing(tmp_path, create_user, create_workspace):
+    owner = create_user()
+    workspace = create_workspace(owner)
+    source = tmp_path / "tasks.ndjson"
+    lines = [
+        json.dumps({"id": "1", "title": "Long names", "status": "S" * 80, "labels": ["L" * 80]}),
+        json.dumps({"id": "2", "title": "Bad hours", "estimated_time": "abc"}),
+        json.dumps({"id": "3", "title": "Bad date", "due_date": "2024-13-45T00:00:00"}),
+        json.dumps({"id": "4", "title": "Negative", "actual_time": -3}),
+        "{not json",
+        json.dumps({"id": "5", "title": "Fine", "estimated_time": "4"}),
+    ]
+    source.write_text("\n".join(lines) + "\n")
+    job = ImportJob.objects.create(workspace=workspace, created_by=owner, source_format="ndjson")
+
+    assert TaskImporter(job, batch_size=10, index=False).run(read_records(source, "ndjson")) == 6
+
+    job.refresh_from_db()
+    assert (job.status, job.imported) == ("done", 2)
+    long_names = Task.objects.get(title="Long names")
+    assert long_names.status.name == "S" * 50
+    assert list(long_names.labels.values_list("name", flat=True)) == ["L" * 50]
+    assert Task.objects.get(title="Fine").estimated_time == 4
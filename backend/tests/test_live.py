@@ -0,0 +1,166 @@
+import asyncio
+import json
+
+import pytest
+from asgiref.sync import async_to_sync, sync_to_async
+from django.test import override_settings
+from rest_framework.authtoken.models import Token
+
+from apps.live.asgi import LiveFeedRouter
+from apps.live.broker import InMemoryBroker, workspace_channel
+from apps.tasks.models import Task, TaskChecklistItem
+from apps.users.models import Role
+from apps.workspaces.models import UserWorkspaceRole
+
+
+@pytest.fixture
+def live_feed_signals():
+    from apps.live import events
+
+    # conftest снимает pre_save/post_save/post_delete, ленту подключаем обратно только здесь
+    events.connect_signals()
+    yield
+    events.disconnect_signals()
+
+
+@pytest.fixture
+def broker(monkeypatch):
+    from apps.live import asgi, events
+
+    broker = InMemoryBroker()
+    monkeypatch.setattr(asgi, "get_broker", lambda: broker)
+    monkeypatch.setattr(events, "get_broker", lambda: broker)
+    return broker
+
+
+def event(model, pk, action="updated", **fields):
+    return {"event": f"{model}.{action}", "model": model, "id": pk, "task": pk, "fields": fields}
+
+
+@override_settings(LIVE_FEED={"MAX_PENDING": 2, "COALESCE_WINDOW": 0, "HEARTBEAT": 20})
+def test_subscription_coalesces_updates_and_resyncs_slow_clients():
+    broker = InMemoryBroker()
+
+    async def scenario():
+        subscription = broker.subscribe(workspace_channel(1))
+        broker.publish(workspace_channel(1), event("task", 1, "created", title="A", status=1))
+        broker.publish(workspace_channel(1), event("task", 1, status=2))
+        broker.publish(workspace_channel(1), event("task", 1, assignee=5))
+        broker.publish(workspace_channel(2), event("task", 2, title="Other workspace"))
+        await asyncio.sleep(0)
+        assert await subscription.get() == [event("task", 1, "created", title="A", status=2, assignee=5)]
+
+        broker.publish(workspace_channel(1), event("task", 1, status=3))
+        broker.publish(workspace_channel(1), event("task", 1, "deleted"))
+        await asyncio.sleep(0)
+        assert await subscription.get() == [event("task", 1, "deleted")]
+
+        # Отставшее соединение теряет буфер и получает одно событие resync
+        for pk in range(3):
+            broker.publish(workspace_channel(1), event("task", pk))
+        await asyncio.sleep(0)
+        assert await subscription.get() == [{"event": "resync"}]
+
+        subscription.close()
+        assert broker.subscribers_count(workspace_channel(1)) == 0
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.django_db
+@override_settings(LIVE_FEED={"MAX_PENDING": 100, "COALESCE_WINDOW": 0.05, "HEARTBEAT": 20})
+def test_sse_feed_streams_workspace_events(
+    create_user, create_workspace, create_task, broker, live_feed_signals, django_capture_on_commit_callbacks
+):
+    member, outsider = create_user(), create_user()
+    workspace = create_workspace(member)
+    UserWorkspaceRole.objects.create(user=member, workspace=workspace, role=Role.objects.create(name="Member"))
+    task = Task.objects.get(pk=create_task(workspace=workspace, creator=member).pk)
+    app = LiveFeedRouter(application=None)
+
+    def update_task():
+        with django_capture_on_commit_callbacks(execute=True):
+            task.title = "Renamed"
+            task.save()
+            task.priority = "high"
+            task.save()
+            TaskChecklistItem.objects.create(task=task, text="Step")
+
+    async def request(user):
+        token = await sync_to_async(lambda: Token.objects.get(user=user).key)()
+        scope = {
+            "type": "http",
+            "method": "GET",
+            "path": f"/api/live/workspaces/{workspace.id}/events/",
+            "query_string": f"token={token}".encode(),
+            "headers": [],
+        }
+        messages, done = [], asyncio.Event()
+
+        async def receive():
+            await done.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message):
+            messages.append(message)
+            if message.get("body"):
+                done.set()
+
+        feed = asyncio.ensure_future(app(scope, receive, send))
+        while not feed.done() and not broker.subscribers_count(workspace_channel(workspace.id)):
+            await asyncio.sleep(0.01)
+        if not feed.done():
+            await sync_to_async(update_task)()
+        await asyncio.wait_for(feed, 5)
+        return messages
+
+    messages = async_to_sync(request)(outsider)
+    assert messages[0]["status"] == 403
+
+    messages = async_to_sync(request)(member)
+    assert messages[0]["status"] == 200
+    assert (b"content-type", b"text/event-stream") in messages[0]["headers"]
+    chunks = messages[1]["body"].decode().strip().split("\n\n")
+    events = [json.loads(chunk.split("data: ", 1)[1]) for chunk in chunks]
+    # Две правки задачи пришли одним событием
+    assert [(item["event"], item["task"]) for item in events] == [
+        ("task.updated", task.id),
+        ("checklist_item.created", task.id),
+    ]
+    assert events[0]["fields"] == {"title": "Renamed", "priority": "high"}
+    assert broker.subscribers_count(workspace_channel(workspace.id)) == 0
+
+
+@pytest.mark.django_db
+def test_bulk_task_writes_reach_the_feed(
+    auth_client, create_workspace, broker, monkeypatch, django_capture_on_commit_callbacks
+):
+    from django.urls import reverse
+
+    from apps.tasks.models import Label
+
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    label = Label.objects.create(name="Sprint", workspace=workspace)
+    published = []
+    broker.publish = lambda channel, event: published.append((channel, event))
+    monkeypatch.setattr("apps.tasks.services.bulk.enqueue_index", lambda keys: None)
+
+    # bulk_create и bulk_update не шлют сигналы — события публикует сам сервис
+    items = [{"title": f"Task {i}", "workspace": workspace.id} for i in range(2)]
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.post(reverse("tasks-bulk-create"), {"items": items}, format="json")
+    created = [item["id"] for item in response.data["results"]]
+    assert [(event["event"], event["id"]) for _, event in published] == [("task.created", pk) for pk in created]
+    assert published[0][0] == workspace_channel(workspace.id)
+    assert published[0][1]["fields"]["title"] == "Task 0"
+
+    published.clear()
+    items = [{"id": created[0], "priority": "high", "add_labels": [label.id]}, {"id": created[1], "title": "Renamed"}]
+    with django_capture_on_commit_callbacks(execute=True):
+        client.patch(reverse("tasks-bulk-update"), {"items": items}, format="json")
+    assert [(event["event"], event["id"], event["fields"]) for _, event in published] == [
+        ("task.updated", created[0], {"title": "Task 0", "priority": "high", "labels": [label.id]}),
+        ("task.updated", created[1], {"title": "Renamed", "priority": "medium"}),
+    ]
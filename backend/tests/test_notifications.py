@@ -0,0 +1,140 @@
+import json
+from datetime import timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from apps.tasks.models import TaskLog
+from apps.users.models import Role
+from apps.workspaces.models import UserWorkspaceRole
+from notifications.models import Notification, NotificationSettings
+from notifications.services.digests import dispatch_notifications
+from notifications.services.inbox import fan_out
+
+
+@pytest.fixture
+def file_transport(tmp_path, settings):
+    path = tmp_path / "digests.ndjson"
+    settings.NOTIFICATIONS = {
+        **settings.NOTIFICATIONS,
+        "TRANSPORTS": {"email": "notifications.transports.FileTransport"},
+        "FILE_PATH": str(path),
+    }
+    from notifications.services.digests import get_transport
+
+    get_transport.cache_clear()
+    yield path
+    get_transport.cache_clear()
+
+
+@pytest.mark.django_db
+def test_task_log_fans_out_to_watchers_and_sends_one_digest_per_window(create_user, create_task, file_transport):
+    actor, watcher, quiet, assignee, former = (create_user() for _ in range(5))
+    inactive = create_user(is_active=False)
+    task = create_task(creator=actor, assignee=assignee, title="Board")
+    role = Role.objects.create(name="Member")
+    UserWorkspaceRole.objects.bulk_create(
+        UserWorkspaceRole(user=user, workspace=task.workspace, role=role)
+        for user in (actor, watcher, quiet, assignee, inactive)
+    )
+    # Наблюдатель, которого исключили из пространства
+    task.watchers.add(watcher, quiet, inactive, assignee, former)
+    NotificationSettings.objects.create(user=quiet, channel="none")
+
+    TaskLog.objects.bulk_create(
+        [TaskLog(task=task, user=actor, action="update", changes={"priority": ["low", "high"]}) for _ in range(50)]
+        + [TaskLog(task=task, user=watcher, action="comment", changes={"content": "ok"})]
+    )
+    now = timezone.now() + timedelta(seconds=10)
+
+    assert fan_out(now) == 51
+    assert fan_out(now) == 0
+    users = (actor, watcher, quiet, assignee, inactive, former)
+    counts = {user: Notification.objects.filter(recipient=user).count() for user in users}
+    # Автор изменения о нём не узнаёт, неактивные и исключённые из пространства не получают ничего
+    assert counts == {actor: 1, watcher: 50, quiet: 51, assignee: 51, inactive: 0, former: 0}
+    assert Notification.objects.filter(recipient=watcher).first().fields == ["priority"]
+
+    # Окно дайджеста ещё не прошло — ничего не уходит
+    assert dispatch_notifications(now) == 0
+    assert dispatch_notifications(now + timedelta(minutes=10)) == 3
+    digests = [json.loads(line) for line in file_transport.read_text().splitlines()]
+    assert sorted(digest["user"] for digest in digests) == sorted([actor.id, watcher.id, assignee.id])
+    assignee_digest = next(digest for digest in digests if digest["user"] == assignee.id)
+    assert len(assignee_digest["notifications"]) == 51
+    assert assignee_digest["body"].count("\n") == 0 and f"#{task.id} Board" in assignee_digest["body"]
+    assert not Notification.objects.filter(dispatched_at__isnull=True).exists()
+    assert dispatch_notifications(now + timedelta(minutes=20)) == 0
+
+
+@pytest.mark.django_db
+def test_notification_inbox_api(auth_client, create_task, create_user):
+    client, user = auth_client
+    task = create_task(creator=create_user())
+    Notification.objects.bulk_create(
+        [Notification(recipient=user, task=task, action="update", fields=["title"]) for _ in range(3)]
+        + [Notification(recipient=create_user(), task=task, action="update")]
+    )
+
+    url = reverse("notifications-list")
+    response = client.get(url)
+    assert response.status_code == status.HTTP_200_OK
+    assert len(response.data["results"]) == 3
+    assert response.data["results"][0]["task_title"] == task.title
+
+    first = response.data["results"][0]["id"]
+    response = client.post(reverse("notifications-read"), {"ids": [first]}, format="json")
+    assert response.data == {"updated": 1}
+    assert client.get(reverse("notifications-unread-count")).data == {"count": 2}
+    assert len(client.get(url, {"unread": "1"}).data["results"]) == 2
+
+    settings_url = reverse("notifications-preferences")
+    response = client.patch(settings_url, {"channel": "webhook"}, format="json")
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    data = {"channel": "webhook", "webhook_url": "https://hooks.example.com/x", "digest_window": 60}
+    response = client.patch(settings_url, data, format="json")
+    assert response.status_code == status.HTTP_200_OK
+    assert NotificationSettings.objects.get(user=user).digest_window == 60
+
+
+@pytest.mark.django_db
+def test_webhook_url_must_be_public_https(auth_client):
+    from unittest.mock import MagicMock, patch
+
+    from notifications.transports import WebhookTransport
+
+    client, user = auth_client
+    settings_url = reverse("notifications-preferences")
+    for url in (
+        "http://hooks.example.com/x",
+        "https://localhost/x",
+        "https://127.0.0.1/x",
+        "https://10.0.0.5/x",
+        "https://169.254.169.254/latest/meta-data/",
+        "https://[::1]/x",
+    ):
+        response = client.patch(settings_url, {"channel": "webhook", "webhook_url": url}, format="json")
+        assert response.status_code == status.HTTP_400_BAD_REQUEST, url
+        assert "webhook_url" in response.data
+
+    # Публичное имя при отправке разрешается заново: подменённый на внутренний адрес DNS не пропускается
+    digests = [{"user": user.id, "webhook_url": "https://hooks.example.com/x", "notifications": []}]
+    internal = [(None, None, None, "", ("10.0.0.5", 443))]
+    public = [(None, None, None, "", ("93.184.216.34", 443))]
+    connection = MagicMock()
+    connection.getresponse.return_value.status = 204
+    with (
+        patch("notifications.services.webhooks.socket.getaddrinfo", return_value=internal),
+        patch("notifications.transports.PinnedHTTPSConnection", return_value=connection) as connect,
+    ):
+        assert WebhookTransport().send(digests) == set()
+        connect.assert_not_called()
+    with (
+        patch("notifications.services.webhooks.socket.getaddrinfo", return_value=public),
+        patch("notifications.transports.PinnedHTTPSConnection", return_value=connection) as connect,
+    ):
+        assert WebhookTransport().send(digests) == {user.id}
+    assert connect.call_args.args == ("hooks.example.com", 443, "93.184.216.34")
+    assert connection.request.call_args.args[:2] == ("POST", "/x")
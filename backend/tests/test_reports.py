@@ -0,0 +1,78 @@
+from datetime import datetime, time, timedelta
+
+import pytest
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework import status
+
+from apps.tasks.models import Task, TaskLog
+from apps.users.models import Role
+from apps.workspaces.models import UserWorkspaceRole
+from reports.models import DailyRollup, TaskFact
+from reports.services.rollups import refresh_reports
+
+
+def at(day, hour):
+    return timezone.make_aware(datetime.combine(day, time(hour)))
+
+
+@pytest.mark.django_db
+def test_reports_are_rolled_up_incrementally(auth_client, create_workspace, create_task_status):
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    todo = create_task_status(workspace)
+    done = create_task_status(workspace, name="Done")
+    done.is_closed = True
+    done.save()
+    today = timezone.localdate()
+    day1, day2, day3 = (today - timedelta(days=offset) for offset in (4, 3, 2))
+
+    def make_task(created_at, updated_at, **kwargs):
+        task = Task.objects.create(title="Task", workspace=workspace, creator=admin, **kwargs)
+        Task.objects.filter(pk=task.pk).update(created_at=created_at, updated_at=updated_at)
+        return task
+
+    first = make_task(at(day1, 10), at(day3, 11), status=done, estimated_time=4, actual_time=6, assignee=admin)
+    log = TaskLog.objects.create(task=first, action="update", changes={"status": [todo.id, done.id]})
+    TaskLog.objects.filter(pk=log.pk).update(timestamp=at(day3, 10))
+    overdue = make_task(at(day1, 8), at(day1, 8), status=todo, due_date=at(day2, 12))
+    make_task(at(day2, 9), at(day2, 12), status=done, estimated_time=2, actual_time=1)
+
+    assert refresh_reports() == 3
+    assert TaskFact.objects.get(pk=first.pk).closed_at == at(day3, 10)
+    # Отметка сдвинулась: повторный прогон перечитывает только окно LAG перед ней
+    assert refresh_reports() == 1
+
+    url = reverse("workspace-reports-detail", kwargs={"pk": workspace.id})
+    response = client.get(url, {"date_from": day1, "date_to": day3})
+    assert response.status_code == status.HTTP_200_OK
+    days = [(row["created"], row["closed"], row["remaining"], row["overdue"]) for row in response.data["days"]]
+    assert days == [(2, 0, 2, 0), (1, 1, 2, 1), (0, 1, 1, 1)]
+    assert response.data["throughput"]["closed"] == 2
+    assert response.data["cycle_time_hours"]["count"] == 2
+    assert response.data["cycle_time_hours"]["p50"] == 25.5
+    variance = response.data["estimate_variance_hours"]
+    assert (variance["estimated"], variance["actual"], variance["ratio"]) == (6, 7, 1.167)
+
+    overdue.refresh_from_db()
+    overdue.status = done
+    overdue.save()
+    assert refresh_reports() == 2
+    assert DailyRollup.objects.filter(workspace=workspace, day=today).get().closed_count == 1
+
+    response = client.get(url, {"date_from": day3, "date_to": today, "assignee": 0})
+    assert [row["overdue"] for row in response.data["days"]] == [1, 1, 0]
+    assert response.data["days"][-1]["remaining"] == 0
+
+    rollups = set(DailyRollup.objects.values_list("day", "assignee_id", "created_count", "closed_count"))
+    assert refresh_reports(full=True) == 3
+    assert set(DailyRollup.objects.values_list("day", "assignee_id", "created_count", "closed_count")) == rollups
+
+
+@pytest.mark.django_db
+def test_reports_are_hidden_from_non_members(auth_client, create_workspace, create_user):
+    client, _ = auth_client
+    foreign = create_workspace(create_user(), name="Foreign")
+    response = client.get(reverse("workspace-reports-detail", kwargs={"pk": foreign.id}))
+    assert response.status_code == status.HTTP_404_NOT_FOUND
@@ -2,9 +2,12 @@ import pytest
 from django.urls import reverse
 from rest_framework import status
 from django.core.files.uploadedfile import SimpleUploadedFile
-from apps.tasks.models import TaskType, TaskStatus, Label, Task, TaskComment, TaskAttachment, TaskChecklistItem, TaskLog
+from apps.tasks.models import (
+    TaskType, TaskStatus, Label, Task, TaskComment, TaskAttachment, TaskChecklistItem, TaskDependency, TaskLog
+)
 from apps.users.models import Role
 from apps.workspaces.models import UserWorkspaceRole
+from apps.workspaces.membership import invalidate_user_workspaces
 from unittest.mock import patch, MagicMock
 from django.utils import timezone
 from datetime import timedelta
@@ -183,7 +186,7 @@ def test_task_log_list(auth_client, create_task):
     url = reverse("task-logs-list", kwargs={"task_pk": task.id})
     response = client.get(url)
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 1
+    assert len(response.data["results"]) == 1
 
 
 @pytest.mark.django_db
@@ -225,8 +228,8 @@ def test_task_search_basic(auth_client):
         response = client.get(url, {"q": "important"})
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 1  # Исправлено: response.data вместо response.data["results"]
-    assert response.data[0]["title"] == "Important task"  # Исправлено: обращение по индексу
+    assert len(response.data["results"]) == 1
+    assert response.data["results"][0]["title"] == "Important task"
 
 
 @pytest.mark.django_db
@@ -287,8 +290,8 @@ def test_task_search_with_filters(auth_client):
         )
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 1
-    assert response.data[0]["title"] == "Task 1"
+    assert len(response.data["results"]) == 1
+    assert response.data["results"][0]["title"] == "Task 1"
 
 
 @pytest.mark.django_db
@@ -312,8 +315,13 @@ def test_task_search_pagination(auth_client):
     with patch("apps.tasks.views.task_search", return_value=Task.objects.filter(workspace=workspace)):
         url = reverse("tasks-search")
 
-        response1 = client.get(url, {"page": 1})
+        response1 = client.get(url, {"page": 1, "page_size": 10})
         assert response1.status_code == status.HTTP_200_OK
+        assert response1.data["count"] == 15
+        assert len(response1.data["results"]) == 10
+
+        response2 = client.get(url, {"page": 2, "page_size": 10})
+        assert len(response2.data["results"]) == 5
 
 
 @pytest.mark.django_db
@@ -326,7 +334,7 @@ def test_task_search_unauthorized(api_client):
         response = api_client.get(url, {"q": "test"})
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 0
+    assert len(response.data["results"]) == 0
 
 
 @pytest.mark.django_db
@@ -346,8 +354,8 @@ def test_task_search_priority_filter(auth_client):
         response = client.get(url, {"priority": ["high", "medium"]})
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 2
-    priorities = {result["priority"] for result in response.data}
+    assert len(response.data["results"]) == 2
+    priorities = {result["priority"] for result in response.data["results"]}
     assert priorities == {"high", "medium"}
 
 
@@ -381,5 +389,626 @@ def test_task_search_due_date_filter(auth_client):
         )
 
     assert response.status_code == status.HTTP_200_OK
-    assert len(response.data) == 1
-    assert response.data[0]["title"] == "In Range"
+    assert len(response.data["results"]) == 1
+    assert response.data["results"][0]["title"] == "In Range"
+
+
+def _create_board(admin, workspace, count):
+    status_obj = TaskStatus.objects.create(name=f"Open {count}", workspace=workspace)
+    task_type = TaskType.objects.create(name=f"Type {count}")
+    label = Label.objects.create(name=f"Label {count}", workspace=workspace)
+    parent = Task.objects.create(title="Parent", workspace=workspace, creator=admin, status=status_obj)
+    for i in range(count):
+        task = Task.objects.create(
+            title=f"Task {i}",
+            workspace=workspace,
+            creator=admin,
+            assignee=admin,
+            status=status_obj,
+            task_type=task_type,
+            parent_task=parent,
+        )
+        task.labels.add(label)
+        task.watchers.add(admin)
+
+
+@pytest.mark.django_db
+def test_task_list_query_count_is_constant(auth_client):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    client, admin = auth_client
+    role = Role.objects.create(name="Member")
+    url = reverse("tasks-list")
+
+    query_counts = []
+    for count in (2, 10):
+        workspace = Workspace.objects.create(name=f"Board {count}", created_by=admin)
+        UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=role)
+        # post_save в тестах отключён, кеш членства сбрасываем сами
+        invalidate_user_workspaces(admin.pk)
+        _create_board(admin, workspace, count)
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(url, {"workspace": workspace.id})
+        assert response.status_code == status.HTTP_200_OK
+        results = response.data["results"]
+        assert len(results) == count + 1
+        assert sum(len(item["labels_details"]) for item in results) == count
+        query_counts.append(len(ctx.captured_queries))
+
+    assert query_counts[0] == query_counts[1]
+
+
+@pytest.mark.django_db
+def test_task_list_cursor_pagination(auth_client):
+    client, admin = auth_client
+    workspace = Workspace.objects.create(name="Cursor Workspace", created_by=admin)
+    role = Role.objects.create(name="Member")
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=role)
+    for i in range(5):
+        Task.objects.create(title=f"Task {i}", workspace=workspace, creator=admin)
+
+    url = reverse("tasks-list")
+    response = client.get(url, {"page_size": 3})
+    assert response.status_code == status.HTTP_200_OK
+    first_page = [item["id"] for item in response.data["results"]]
+    assert len(first_page) == 3
+    assert response.data["next"]
+
+    response = client.get(response.data["next"])
+    second_page = [item["id"] for item in response.data["results"]]
+    assert len(second_page) == 2
+    assert response.data["next"] is None
+    assert sorted(first_page + second_page, reverse=True) == first_page + second_page
+
+
+def _fake_es_search(ordered_ids):
+    def page(item):
+        sliced = MagicMock()
+        sliced.source.return_value.execute.return_value = [
+            MagicMock(meta=MagicMock(id=str(task_id))) for task_id in ordered_ids[item]
+        ]
+        return sliced
+
+    search = MagicMock()
+    search.extra.return_value.execute.return_value.hits.total.value = len(ordered_ids)
+    search.__getitem__.side_effect = page
+    return search
+
+
+@pytest.mark.django_db
+def test_task_search_paginates_in_elasticsearch(auth_client):
+    client, admin = auth_client
+    workspace = Workspace.objects.create(name="Search Workspace", created_by=admin)
+    role = Role.objects.create(name="Member")
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=role)
+    tasks = [Task.objects.create(title=f"Task {i}", workspace=workspace, creator=admin) for i in range(5)]
+    ordered_ids = [tasks[3].id, tasks[0].id, tasks[4].id, tasks[1].id, tasks[2].id]
+    search = _fake_es_search(ordered_ids)
+
+    with patch("apps.tasks.selectors.search.build_task_search", return_value=search):
+        response = client.get(reverse("tasks-search"), {"q": "task", "page": 2, "page_size": 2})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["count"] == 5
+    assert [item["id"] for item in response.data["results"]] == ordered_ids[2:4]
+    search.__getitem__.assert_called_once_with(slice(2, 4))
+
+
+@pytest.mark.django_db
+def test_task_search_served_from_index(auth_client):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    client, admin = auth_client
+    workspace = Workspace.objects.create(name="Index Workspace", created_by=admin)
+    role = Role.objects.create(name="Member")
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=role)
+
+    source = {
+        "id": 42,
+        "title": "Indexed task",
+        "description": "",
+        "created_at": "2025-01-01T00:00:00+00:00",
+        "updated_at": "2025-01-02T00:00:00+00:00",
+        "priority": "high",
+        "is_closed": False,
+        "workspace": {"id": workspace.id, "name": workspace.name},
+        "labels": [{"id": 1, "name": "Urgent", "color": "#ff0000"}],
+    }
+    hit = MagicMock(meta=MagicMock(version=7))
+    hit.to_dict.return_value = source
+    search = MagicMock()
+    search.extra.return_value.execute.return_value.hits.total.value = 1
+    search.__getitem__.return_value.source.return_value.extra.return_value.execute.return_value = [hit]
+
+    with patch("apps.tasks.selectors.search.build_task_search", return_value=search):
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.get(reverse("tasks-search"), {"q": "indexed", "source": "index"})
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["source"] == "index"
+    item = response.data["results"][0]
+    assert item["title"] == "Indexed task"
+    assert item["index_version"] == 7
+    assert item["assignee"] is None
+    assert item["labels"][0]["name"] == "Urgent"
+    assert not any('"tasks_task"' in query["sql"] for query in ctx.captured_queries)
+
+
+@pytest.mark.django_db
+def test_task_bulk_create_reports_errors_per_item(auth_client, create_workspace, create_user):
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    foreign_workspace = create_workspace(create_user(), name="Foreign")
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    status_obj = TaskStatus.objects.create(name="Open", workspace=workspace)
+    label = Label.objects.create(name="Bug", workspace=workspace)
+    foreign_label = Label.objects.create(name="Foreign", workspace=foreign_workspace)
+
+    items = [
+        {"title": "First", "workspace": workspace.id, "status": status_obj.id, "labels": [label.id]},
+        {"title": "Second", "workspace": workspace.id, "watchers": [admin.id], "priority": "high"},
+        {"title": "Foreign label", "workspace": workspace.id, "labels": [foreign_label.id]},
+        {"title": "No access", "workspace": foreign_workspace.id},
+        {"workspace": workspace.id},
+    ]
+    with patch("apps.tasks.services.bulk.enqueue_index") as enqueue_index:
+        response = client.post(reverse("tasks-bulk-create"), {"items": items}, format="json")
+
+    assert response.status_code == status.HTTP_201_CREATED
+    assert [item["title"] for item in response.data["results"]] == ["First", "Second"]
+    assert [error["index"] for error in response.data["errors"]] == [2, 3, 4]
+    assert "labels" in response.data["errors"][0]["errors"]
+    assert "workspace" in response.data["errors"][1]["errors"]
+    assert "title" in response.data["errors"][2]["errors"]
+
+    first = Task.objects.get(title="First")
+    assert first.creator == admin
+    assert list(first.labels.all()) == [label]
+    assert list(Task.objects.get(title="Second").watchers.all()) == [admin]
+    enqueue_index.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_task_bulk_update_query_count_does_not_grow(auth_client, create_workspace):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    done = TaskStatus.objects.create(name="Done", workspace=workspace)
+    label = Label.objects.create(name="Sprint", workspace=workspace)
+    url = reverse("tasks-bulk-update")
+
+    query_counts = []
+    for count in (2, 10):
+        tasks = [Task.objects.create(title=f"Task {i}", workspace=workspace, creator=admin) for i in range(count)]
+        items = [{"id": task.id, "status": done.id, "assignee": admin.id, "add_labels": [label.id]} for task in tasks]
+        invalidate_user_workspaces(admin.pk)
+        with CaptureQueriesContext(connection) as ctx:
+            response = client.patch(url, {"items": items}, format="json")
+        assert response.status_code == status.HTTP_200_OK
+        assert response.data["errors"] == []
+        query_counts.append(len(ctx.captured_queries))
+
+    assert query_counts[0] == query_counts[1]
+    assert Task.objects.filter(status=done, assignee=admin).count() == 12
+    assert label.tasks.count() == 12
+
+
+@pytest.mark.django_db
+def test_task_bulk_delete_skips_foreign_tasks(auth_client, create_workspace, create_task):
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    own = [create_task(workspace=workspace, creator=admin) for _ in range(3)]
+    foreign = create_task()
+
+    response = client.post(
+        reverse("tasks-bulk-delete"), {"ids": [task.id for task in own] + [foreign.id]}, format="json"
+    )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["deleted"] == sorted(task.id for task in own)
+    assert response.data["errors"] == [{"index": 3, "errors": {"id": ["Not found."]}}]
+    assert list(Task.objects.all()) == [foreign]
+
+
+@pytest.fixture
+def task_log_signals():
+    from apps.tasks.audit import connect_signals, disconnect_signals
+
+    # conftest снимает post_save/post_delete, подключаем журнал обратно только для этих тестов
+    connect_signals()
+    yield
+    # m2m_changed conftest не трогает — без отключения журнал остался бы в следующих тестах
+    disconnect_signals()
+
+
+@pytest.mark.django_db
+def test_task_update_is_logged_with_field_diff(
+    auth_client, create_workspace, task_log_signals, django_capture_on_commit_callbacks
+):
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    task = Task.objects.create(title="Old", workspace=workspace, creator=admin)
+    TaskLog.objects.all().delete()
+
+    with django_capture_on_commit_callbacks(execute=True):
+        response = client.patch(
+            reverse("tasks-detail", kwargs={"pk": task.id}), {"title": "New", "priority": "high"}, format="json"
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    log = TaskLog.objects.get()
+    assert log.action == "update"
+    assert log.user == admin
+    assert log.changes == {"title": ["Old", "New"], "priority": ["medium", "high"]}
+
+
+@pytest.mark.django_db
+def test_task_logs_follow_task_to_another_workspace(
+    create_task, create_workspace, task_log_signals, django_capture_on_commit_callbacks
+):
+    from apps.tasks.audit import task_log_batch
+
+    task = create_task(title="Old")
+    target = create_workspace(task.creator, name="Target")
+    TaskLog.objects.create(task=task, action="update", changes={"title": ["a", "Old"]})
+
+    with task_log_batch():
+        with django_capture_on_commit_callbacks(execute=True):
+            task = Task.objects.get(pk=task.pk)
+            task.workspace = target
+            task.save()
+            TaskComment.objects.create(task=task, author=task.creator, content="moved")
+
+    assert TaskLog.objects.filter(task=task).count() == 3
+    assert set(TaskLog.objects.filter(task=task).values_list("workspace_id", flat=True)) == {target.id}
+
+
+@pytest.mark.django_db
+def test_task_logs_are_flushed_in_one_insert(create_task, task_log_signals, django_capture_on_commit_callbacks):
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    from apps.tasks.audit import task_log_batch
+
+    tasks = [create_task(title=f"Task {i}") for i in range(3)]
+    tasks = list(Task.objects.filter(pk__in=[task.pk for task in tasks]))
+    TaskLog.objects.all().delete()
+
+    with CaptureQueriesContext(connection) as ctx:
+        with task_log_batch():
+            with django_capture_on_commit_callbacks(execute=True):
+                for task in tasks:
+                    task.priority = "low"
+                    task.save()
+                    TaskComment.objects.create(task=task, author=task.creator, content="done")
+    inserts = [query["sql"] for query in ctx.captured_queries if query["sql"].startswith('INSERT INTO "tasks_tasklog"')]
+    assert len(inserts) == 1
+    assert TaskLog.objects.filter(action="update", changes={"priority": ["medium", "low"]}).count() == 3
+    assert TaskLog.objects.filter(action="comment").count() == 3
+    assert not any('SELECT' in query["sql"] and '"tasks_task"' in query["sql"] for query in ctx.captured_queries)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        with pytest.raises(RuntimeError), transaction.atomic():
+            tasks[0].title = "Rolled back"
+            tasks[0].save()
+            raise RuntimeError
+    assert not TaskLog.objects.filter(changes__title__isnull=False).exists()
+
+
+@pytest.mark.django_db
+def test_partition_task_logs_archives_old_rows_without_partitions(create_task, tmp_path):
+    import gzip
+    import json
+
+    from django.core.management import call_command
+
+    task = create_task()
+    old = TaskLog.objects.create(task=task, action="update", changes={"title": ["a", "b"]})
+    recent = TaskLog.objects.create(task=task, action="update", changes={"title": ["b", "c"]})
+    assert old.workspace_id == task.workspace_id
+    TaskLog.objects.filter(pk=old.pk).update(timestamp=timezone.now() - timedelta(days=400))
+
+    call_command("partition_task_logs", retain=3, archive_dir=str(tmp_path))
+
+    assert list(TaskLog.objects.all()) == [recent]
+    (archive,) = tmp_path.glob("tasks_tasklog_p*.jsonl.gz")
+    with gzip.open(archive, "rt") as f:
+        rows = [json.loads(line) for line in f]
+    assert [(row["id"], row["workspace_id"], row["changes"]) for row in rows] == [
+        (old.id, task.workspace_id, {"title": ["a", "b"]})
+    ]
+
+
+@pytest.mark.django_db
+def test_partition_task_logs_archives_old_rows_from_default_partition(tmp_path):
+    from django.core.management import call_command
+
+    from apps.tasks.partitions import add_months, month_start
+
+    command = "apps.tasks.management.commands.partition_task_logs"
+    current = month_start(timezone.now())
+    old_months = [current.replace(year=current.year - 3), current.replace(year=current.year - 2)]
+    with (
+        patch(f"{command}.is_partitioned", return_value=True),
+        patch(f"{command}.list_partitions", return_value={}),
+        patch(f"{command}.create_partition", side_effect=lambda month: f"tasks_tasklog_p{month:%Y_%m}") as create,
+        patch(f"{command}.default_months", return_value=old_months) as default_months,
+        patch(f"{command}.archive_partition", return_value=(tmp_path / "archive.jsonl.gz", 1)) as archive,
+    ):
+        call_command("partition_task_logs", retain=3, ahead=0, archive_dir=str(tmp_path))
+
+    default_months.assert_called_once_with(add_months(current, -2))
+    # Текущий месяц создаётся наперёд, старые месяцы из DEFAULT выносятся в секции и архивируются
+    assert [call.args[0] for call in create.call_args_list] == [current, *old_months]
+    archived = [call.args[0] for call in archive.call_args_list]
+    assert archived == [f"tasks_tasklog_p{month:%Y_%m}" for month in old_months]
+
+
+@pytest.mark.django_db
+def test_task_export_streams_csv_and_gzipped_ndjson(
+    auth_client, create_workspace, create_task_status, create_label, create_user, django_assert_max_num_queries
+):
+    import csv
+    import gzip
+    import io
+    import json
+
+    from apps.tasks.services import export
+
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    invalidate_user_workspaces(admin.pk)
+    todo = create_task_status(workspace)
+    labels = [create_label(workspace, name=f"L{i}") for i in range(2)]
+    watcher = create_user()
+    for i in range(5):
+        task = Task.objects.create(title=f"Task, {i}", workspace=workspace, creator=admin, status=todo, assignee=admin)
+        task.labels.set(labels[: i % 3])
+        task.watchers.add(watcher)
+    foreign = create_workspace(create_user(), name="Foreign")
+    Task.objects.create(title="Hidden", workspace=foreign)
+
+    url = reverse("tasks-export")
+    def in_small_chunks(queryset):
+        return export.iter_task_records(queryset, chunk_size=2)
+
+    # Пачки по две задачи: запросы на связи растут с числом пачек, а не задач
+    with patch("apps.tasks.views.iter_task_records", in_small_chunks):
+        response = client.get(url)
+        with django_assert_max_num_queries(3 + 3 * 4):
+            content = b"".join(response.streaming_content)
+    assert response.status_code == status.HTTP_200_OK
+    assert response["Content-Type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(content.decode())))
+    assert [row["title"] for row in rows] == [f"Task, {i}" for i in range(5)]
+    assert rows[2]["labels"] == "L0|L1" and rows[2]["watchers"] == watcher.email
+    assert rows[0]["status"] == "To Do" and rows[0]["assignee"] == admin.email
+
+    response = client.get(url, {"file_format": "ndjson", "workspace": workspace.id}, HTTP_ACCEPT_ENCODING="gzip")
+    assert response["Content-Encoding"] == "gzip"
+    records = [json.loads(line) for line in gzip.decompress(b"".join(response.streaming_content)).splitlines()]
+    assert len(records) == 5 and records[1]["labels"] == ["L0"]
+
+    response = client.get(url, {"file_format": "xml"})
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+
+
+def test_dependency_graph_orders_tasks_and_finds_critical_path():
+    from apps.tasks.graph import DependencyGraph, blocking_edge
+
+    # 1 -> 2 -> 4, 1 -> 3 -> 4, 5 -> 3; 6 ждёт 4 через is_blocked_by
+    rows = [(1, 2, "blocks"), (2, 4, "blocks"), (1, 3, "blocks"), (3, 4, "blocks"), (5, 3, "blocks")]
+    rows.append((6, 4, "is_blocked_by"))
+    graph = DependencyGraph(blocking_edge(*row) for row in rows)
+
+    assert len(graph) == 6
+    assert graph.blockers(4) == [1, 2, 3, 5]
+    assert graph.blocked(3) == [4, 6]
+    assert graph.blockers(99) == []
+    assert graph.topological_order() == ([1, 2, 5, 3, 4, 6], [])
+    assert graph.creates_cycle(6, 1)
+    assert graph.creates_cycle(3, 3)
+    assert not graph.creates_cycle(5, 2)
+    # Разворот существующего ребра 3 -> 4 цикла не даёт, если само ребро не учитывать
+    assert not graph.creates_cycle(4, 3, ignore=(3, 4))
+
+    weights = {1: 2, 2: 1, 3: 5, 4: 1, 5: 10, 6: 3}
+    assert graph.critical_path(weights) == ([5, 3, 4, 6], 19)
+    assert graph.critical_path(weights, task_id=2) == ([1, 2], 3)
+
+    cyclic = DependencyGraph([(1, 2), (2, 3), (3, 2), (3, 4)])
+    assert cyclic.topological_order() == ([1], [2, 3, 4])
+
+
+@pytest.fixture
+def task_graph_signals():
+    from apps.tasks import graph
+
+    # conftest снимает post_save/post_delete, инвалидацию графа подключаем обратно только здесь
+    graph.connect_signals()
+    yield
+    graph.disconnect_signals()
+
+
+@pytest.mark.django_db
+def test_task_dependency_cycles_are_rejected_and_graph_is_served(
+    auth_client, create_workspace, task_graph_signals, django_assert_num_queries
+):
+    from apps.tasks import graph
+
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    design, build, release = (
+        Task.objects.create(title=title, workspace=workspace, creator=admin, estimated_time=hours)
+        for title, hours in (("Design", 3), ("Build", 8), ("Release", 1))
+    )
+    url = reverse("task-dependencies-list")
+
+    def link(from_task, to_task, dependency_type="blocks"):
+        data = {"from_task": from_task.id, "to_task": to_task.id, "dependency_type": dependency_type}
+        return client.post(url, data, format="json")
+
+    assert link(design, build).status_code == status.HTTP_201_CREATED
+    assert link(release, build, "is_blocked_by").status_code == status.HTTP_201_CREATED
+    response = link(release, design)
+    assert response.status_code == status.HTTP_400_BAD_REQUEST
+    assert "cycle" in str(response.data)
+    assert link(release, design, "relates_to").status_code == status.HTTP_201_CREATED
+
+    response = client.get(reverse("tasks-blockers", kwargs={"pk": release.id}))
+    assert [item["id"] for item in response.data["blockers"]] == [design.id, build.id]
+    response = client.get(reverse("tasks-critical-path", kwargs={"pk": release.id}))
+    assert response.data["estimated_time"] == 12
+    assert [item["title"] for item in response.data["path"]] == ["Design", "Build", "Release"]
+
+    graph.get_dependency_graph(workspace.id)
+    # Граф уже в памяти процесса: повторное обращение не читает связи из БД
+    with django_assert_num_queries(0):
+        graph.get_dependency_graph(workspace.id)
+
+    TaskDependency.objects.get(from_task=design, to_task=build).delete()
+    response = client.get(reverse("tasks-dependency-order"), {"workspace": workspace.id})
+    assert response.data["order"] == [build.id, release.id]
+    assert response.data["critical_path"]["estimated_time"] == 9
+    assert client.get(reverse("tasks-dependency-order")).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_task_tree_rolls_up_subtasks_without_per_node_queries(
+    auth_client, create_workspace, django_assert_num_queries
+):
+    from apps.tasks.selectors.tree import task_subtree
+
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+
+    def make(title, parent=None, estimated=None, actual=None):
+        return Task.objects.create(
+            title=title, workspace=workspace, creator=admin, parent_task=parent,
+            estimated_time=estimated, actual_time=actual,
+        )
+
+    epic = make("Epic", estimated=1)
+    backend = make("Backend", epic, estimated=5, actual=4)
+    frontend = make("Frontend", epic, estimated=3)
+    api = make("API", backend, estimated=2, actual=3)
+    for done in (True, False):
+        TaskChecklistItem.objects.create(task=api, text="step", is_completed=done)
+    TaskChecklistItem.objects.create(task=frontend, text="layout", is_completed=True)
+
+    # CTE, поля узлов и чек-листы: число запросов не зависит от размера дерева
+    with django_assert_num_queries(3):
+        tree = task_subtree(epic)
+    root = tree["root"]
+    assert (tree["count"], tree["truncated"], root["subtasks_count"]) == (4, False, 3)
+    assert [child["title"] for child in root["children"]] == ["Backend", "Frontend"]
+    assert root["rollup"] == {
+        "estimated_time": 11, "actual_time": 7,
+        "checklist_total": 3, "checklist_completed": 2, "checklist_progress": 0.667,
+    }
+    assert root["children"][0]["children"][0]["checklist"] == {"total": 2, "completed": 1}
+
+    url = reverse("tasks-tree", kwargs={"pk": epic.id})
+    response = client.get(url, {"max_depth": 1})
+    assert response.data["truncated"] is True
+    assert [child["children"] for child in response.data["root"]["children"]] == [[], []]
+    response = client.get(url, {"limit": 2})
+    assert (response.data["count"], response.data["truncated"]) == (2, True)
+    assert client.get(url, {"limit": "0"}).status_code == status.HTTP_400_BAD_REQUEST
+
+    response = client.get(reverse("tasks-tree", kwargs={"pk": api.id}), {"direction": "ancestors"})
+    assert [item["title"] for item in response.data["ancestors"]] == ["Epic", "Backend"]
+
+
+@pytest.mark.django_db
+def test_task_suggest_is_scoped_cached_and_drops_stale_requests(
+    auth_client, create_workspace, create_user, django_assert_num_queries
+):
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    foreign = create_workspace(create_user())
+    option = MagicMock()
+    option.to_dict.return_value = {
+        "text": "Fix login",
+        "_source": {"id": 7, "title": "Fix login", "workspace": {"id": workspace.id}, "is_closed": False},
+    }
+    search = MagicMock()
+    search.execute.return_value.suggest.titles = [MagicMock(options=[option])]
+    url = reverse("tasks-suggest")
+
+    with patch("apps.tasks.selectors.suggest.build_title_suggest", return_value=search) as build:
+        response = client.get(url, {"q": "Fix ", "request_id": 1, "client": "tab"})
+        assert response.data["results"] == [
+            {"id": 7, "title": "Fix login", "workspace": workspace.id, "status": None, "is_closed": False}
+        ]
+        build.assert_called_once_with("fix", frozenset({workspace.id}), 8)
+
+        # Тот же префикс в другом регистре отдаётся из кеша процесса: из БД читается только токен
+        client.get(url, {"q": "fix"})
+        with django_assert_num_queries(1):
+            response = client.get(url, {"q": "FIX", "request_id": 3, "client": "tab"})
+        assert (response.data["cached"], response.data["stale"]) == (True, False)
+
+        response = client.get(url, {"q": "fi", "request_id": 2, "client": "tab"})
+        assert (response.data["stale"], response.data["results"]) == (True, [])
+        response = client.get(url, {"q": "fix", "workspace": foreign.id})
+        assert response.data["results"] == []
+        assert build.call_count == 1
+    assert client.get(url, {"q": "fix", "size": "-1"}).status_code == status.HTTP_400_BAD_REQUEST
+
+
+@pytest.mark.django_db
+def test_task_search_returns_facets_from_the_page_request(auth_client):
+    client, admin = auth_client
+    workspace = Workspace.objects.create(name="Facets Workspace", created_by=admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    requests = []
+    aggregations = {
+        "status": {"doc_count": 3, "values": {"buckets": [{"key": 1, "doc_count": 2}, {"key": 2, "doc_count": 1}]}},
+        "is_closed": {"doc_count": 3, "values": {"buckets": [{"key": 0, "key_as_string": "false", "doc_count": 3}]}},
+        "labels": {"doc_count": 2, "values": {"doc_count": 2, "values": {"buckets": [{"key": 5, "doc_count": 2}]}}},
+        "due_date": {
+            "doc_count": 2,
+            "values": {"buckets": [{"key": 1, "key_as_string": "2025-03-01", "doc_count": 2}]},
+        },
+    }
+
+    def execute(search):
+        body = search.to_dict()
+        requests.append(body)
+        response = MagicMock()
+        response.hits.total.value = 2
+        response.__iter__.return_value = []
+        response.aggregations.to_dict.return_value = aggregations
+        return response
+
+    with patch("apps.tasks.selectors.search.Search.execute", execute):
+        response = client.get(
+            reverse("tasks-search"), {"status": 1, "priority": "high", "facets": "true", "source": "index"}
+        )
+
+    assert response.status_code == status.HTTP_200_OK
+    assert response.data["facets"]["status"] == [{"value": 1, "count": 2}, {"value": 2, "count": 1}]
+    assert response.data["facets"]["is_closed"] == [{"value": False, "count": 3}]
+    assert response.data["facets"]["labels"] == [{"value": 5, "count": 2}]
+    assert response.data["facets"]["due_date"] == [{"value": "2025-03-01", "count": 2}]
+
+    # Счётчик без агрегаций, страница вместе с ними; выбор фасета — в post_filter, не в query
+    count_request, page_request = requests
+    assert "aggs" not in count_request
+    assert {"term": {"status.id": "1"}} in page_request["post_filter"]["bool"]["filter"]
+    assert "status.id" not in str(page_request["query"])
+    assert page_request["aggs"]["status"]["filter"] == {"bool": {"filter": [{"terms": {"priority": ["high"]}}]}}
+    assert {"term": {"status.id": "1"}} in page_request["aggs"]["priority"]["filter"]["bool"]["filter"]
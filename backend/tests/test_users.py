@@ -210,3 +210,66 @@ def test_user_search_unauthorized(api_client):
 
     response = api_client.get("/api/auth/users/search/")
     assert response.status_code == status.HTTP_403_FORBIDDEN
+
+
+@pytest.mark.django_db
+def test_permission_matrix_checks_without_queries(create_user, create_workspace, django_assert_num_queries):
+    from apps.users.models import Permission, RolePermission
+    from apps.users.permissions import HasWorkspacePermission
+    from apps.users.signals import invalidate_permission_matrix
+
+    user = create_user()
+    workspace = create_workspace(user)
+    other_workspace = create_workspace(user, name="Other")
+    role = Role.objects.create(name="Editor")
+    edit = Permission.objects.create(code="tasks.edit")
+    delete = Permission.objects.create(code="tasks.delete")
+    RolePermission.objects.create(role=role, permission=edit)
+    UserWorkspaceRole.objects.create(user=user, workspace=workspace, role=role)
+
+    with django_assert_num_queries(1):
+        assert user.has_perm_in_workspace("tasks.edit", workspace)
+    with django_assert_num_queries(0):
+        assert user.has_perm_in_workspace("tasks.edit", workspace.id)
+        assert not user.has_perm_in_workspace("tasks.delete", workspace)
+        assert not user.has_perm_in_workspace("tasks.edit", other_workspace)
+
+    # Сигналы в тестах отключены — обработчик вызываем напрямую
+    grant = RolePermission.objects.create(role=role, permission=delete)
+    invalidate_permission_matrix(RolePermission, grant)
+    assert user.has_perm_in_workspace("tasks.delete", workspace)
+
+    view = MagicMock(action="destroy", detail=True, workspace_permissions={"destroy": "tasks.delete"})
+    request = MagicMock(user=user)
+    obj = MagicMock(workspace_id=workspace.id)
+    with django_assert_num_queries(0):
+        assert HasWorkspacePermission().has_permission(request, view)
+        assert HasWorkspacePermission().has_object_permission(request, view, obj)
+        obj.workspace_id = other_workspace.id
+        assert not HasWorkspacePermission().has_object_permission(request, view, obj)
+
+
+@pytest.mark.django_db
+def test_permission_matrix_versions_are_read_from_shared_cache_on_local_miss(create_user, create_workspace):
+    from django.core.cache import cache
+
+    from apps.users import permission_matrix
+
+    user = create_user()
+    workspace = create_workspace(user)
+
+    with patch.object(permission_matrix, "shared_cache", wraps=cache) as shared_cache:
+        permission_matrix.get_workspace_permissions(user, workspace)
+        permission_matrix.get_workspace_permissions(user, workspace)
+        assert shared_cache.get_many.call_count == 1
+
+        # Инвалидация из другого процесса: локальные версии живут до VERSION_TTL
+        cache.set(permission_matrix.USER_VERSION_KEY.format(user_id=user.pk), 1, None)
+        assert permission_matrix.get_versions(user.pk) == (0, 0)
+        permission_matrix.get_version_cache().clear()
+        assert permission_matrix.get_versions(user.pk) == (0, 1)
+        assert shared_cache.get_many.call_count == 2
+
+        # Инвалидация в этом процессе видна сразу
+        permission_matrix.invalidate_user_permissions(user.pk)
+        assert permission_matrix.get_versions(user.pk) == (0, 2)
@@ -78,4 +78,118 @@ def test_user_workspace_role_delete(auth_client, create_workspace):
     url = reverse("workspace-roles-detail", kwargs={"workspace_pk": workspace.id, "pk": uwr.id})
     response = client.delete(url)
     assert response.status_code == status.HTTP_204_NO_CONTENT
-    assert not UserWorkspaceRole.objects.filter(id=uwr.id).exists()
\ No newline at end of file
+    assert not UserWorkspaceRole.objects.filter(id=uwr.id).exists()
+
+@pytest.mark.django_db
+def test_workspace_membership_is_cached_and_invalidated(
+    create_user, create_workspace, django_assert_num_queries
+):
+    from apps.tasks.models import Task
+    from apps.tasks.selectors.users import filter_by_user_workspaces
+    from apps.workspaces.membership import get_user_workspace_ids
+    from apps.workspaces.signals import invalidate_member
+
+    user = create_user()
+    first = create_workspace(user, name="First")
+    second = create_workspace(user, name="Second")
+    role = Role.objects.create(name="Member")
+    UserWorkspaceRole.objects.create(user=user, workspace=first, role=role)
+
+    assert get_user_workspace_ids(user) == {first.id}
+    with django_assert_num_queries(0):
+        assert get_user_workspace_ids(user) == {first.id}
+        query = str(filter_by_user_workspaces(Task, user).query)
+    assert "userworkspacerole" not in query.lower()
+
+    # Сигналы в тестах отключены — обработчики вызываем напрямую
+    membership = UserWorkspaceRole.objects.create(user=user, workspace=second, role=role)
+    invalidate_member(UserWorkspaceRole, membership)
+    assert get_user_workspace_ids(user) == {first.id, second.id}
+
+    membership.delete()
+    invalidate_member(UserWorkspaceRole, membership)
+    assert get_user_workspace_ids(user) == {first.id}
+
+
+@pytest.fixture
+def task_counter_signals():
+    from apps.tasks import counters
+
+    # conftest снимает pre_save/post_save/post_delete, счётчики подключаем обратно только здесь
+    counters.connect_signals()
+    yield
+    counters.disconnect_signals()
+
+
+@pytest.mark.django_db
+def test_task_counters_follow_task_writes(
+    auth_client, create_workspace, create_task_status, create_label, task_counter_signals,
+    django_capture_on_commit_callbacks,
+):
+    from apps.tasks.counters import reconcile_counters
+    from apps.tasks.models import Task
+
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    todo = create_task_status(workspace)
+    done = create_task_status(workspace, name="Done")
+    done.is_closed = True
+    done.save()
+    label = create_label(workspace)
+
+    with django_capture_on_commit_callbacks(execute=True):
+        first = Task.objects.create(title="First", workspace=workspace, creator=admin, status=todo, assignee=admin)
+        second = Task.objects.create(title="Second", workspace=workspace, creator=admin, status=todo)
+        first.labels.add(label)
+        second.labels.add(label)
+    with django_capture_on_commit_callbacks(execute=True):
+        first = Task.objects.get(pk=first.pk)
+        first.status = done
+        first.save()
+        second.labels.remove(label)
+    with django_capture_on_commit_callbacks(execute=True):
+        Task.objects.create(title="Third", workspace=workspace, creator=admin).delete()
+
+    response = client.get(reverse("workspace-stats", kwargs={"pk": workspace.id}))
+    assert response.status_code == status.HTTP_200_OK
+    assert (response.data["total"], response.data["open"], response.data["closed"]) == (2, 1, 1)
+    by_status = {row["id"]: (row["open"], row["closed"]) for row in response.data["by_status"]}
+    assert by_status == {todo.id: (1, 0), done.id: (0, 1)}
+    assert [(row["id"], row["open"], row["closed"]) for row in response.data["by_label"]] == [(label.id, 0, 1)]
+    assert {row["id"]: row["total"] for row in response.data["by_assignee"]} == {None: 1, admin.id: 1}
+    # Приращения сошлись с пересчётом по таблице задач
+    assert reconcile_counters(workspace.id) == 0
+
+    # Удаление закрытого статуса: его задачи становятся открытыми без статуса
+    with django_capture_on_commit_callbacks(execute=True):
+        done.delete()
+    response = client.get(reverse("workspace-stats", kwargs={"pk": workspace.id}))
+    assert (response.data["total"], response.data["open"], response.data["closed"]) == (2, 2, 0)
+    by_status = {row["id"]: (row["open"], row["closed"]) for row in response.data["by_status"]}
+    assert by_status == {todo.id: (1, 0), None: (1, 0)}
+    assert [(row["id"], row["open"], row["closed"]) for row in response.data["by_label"]] == [(label.id, 1, 0)]
+    assert reconcile_counters(workspace.id) == 0
+
+
+@pytest.mark.django_db
+def test_task_counters_reconcile_drift_and_hide_foreign_stats(auth_client, create_workspace, create_user, create_task):
+    from apps.tasks.counters import reconcile_counters
+    from apps.tasks.models import TaskCounter
+
+    client, admin = auth_client
+    workspace = create_workspace(admin)
+    UserWorkspaceRole.objects.create(user=admin, workspace=workspace, role=Role.objects.create(name="Member"))
+    # Сигналы в тестах отключены — задачи пишутся в обход счётчиков, как при raw SQL
+    create_task(workspace=workspace, creator=admin)
+    create_task(workspace=workspace, creator=admin)
+    TaskCounter.objects.create(workspace=workspace, dimension="label", key=999, open_count=3)
+
+    assert reconcile_counters(workspace.id) > 0
+    assert reconcile_counters(workspace.id) == 0
+    response = client.get(reverse("workspace-stats", kwargs={"pk": workspace.id}))
+    assert (response.data["total"], response.data["open"], response.data["by_label"]) == (2, 2, [])
+
+    foreign = create_workspace(create_user(), name="Foreign")
+    response = client.get(reverse("workspace-stats", kwargs={"pk": foreign.id}))
+    assert response.status_code == status.HTTP_404_NOT_FOUND